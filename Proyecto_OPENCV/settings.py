@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -95,6 +96,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'apps.auth_app.adapters.web.context_processors.permissions',
             ],
         },
     },
@@ -124,6 +126,53 @@ DATABASES = {
     }
 }
 
+# Conexiones persistentes: cada worker reutiliza su conexión durante
+# DB_CONN_MAX_AGE segundos (0 = una por petición) y comprueba que sigue viva
+# antes de reutilizarla. Con DB_POOL=true se usa el pool nativo de Django
+# (requiere psycopg 3 con psycopg_pool), incompatible con CONN_MAX_AGE.
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+if os.getenv('DB_POOL', '').lower() in ('1', 'true', 'yes'):
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            'timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', '60'))
+
+# Réplica de solo lectura para informes e historial (opcional). Sin
+# DATABASE_REPLICA_HOST todas las consultas van a 'default'. En tests la
+# réplica refleja 'default' (MIRROR).
+if os.getenv('DATABASE_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('DATABASE_REPLICA_HOST'),
+        'PORT': os.getenv('DATABASE_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+elif sys.argv[1:2] == ['test']:
+    # Sin réplica real, los tests usan una segunda conexión espejo de
+    # 'default' para comprobar el enrutado de lecturas
+    DATABASES['replica'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['apps.shared.utils.db_routing.ReplicaRouter']
+
+# Caché compartida entre workers (necesaria para que las invalidaciones por
+# señales lleguen a todos los procesos). Sin REDIS_URL se usa la caché local
+# de cada proceso y lo invalidado por señales caduca en pocos segundos.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+# Segundos que un usuario lee de la principal tras guardar un análisis
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '5'))
+
 '''
 DATABASES = {
     'default': {
@@ -211,6 +260,10 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Archivo frío del historial (payloads de análisis antiguos). Contiene datos
+# personales: fuera de MEDIA_ROOT, que se sirve públicamente
+HISTORY_ARCHIVE_ROOT = os.getenv('HISTORY_ARCHIVE_ROOT', os.path.join(BASE_DIR, 'var', 'history_archive'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
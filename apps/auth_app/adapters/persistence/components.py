@@ -5,6 +5,7 @@ from django.contrib.auth.models import Group,Permission
 
 
 from apps.auth_app.core.entities import User
+from apps.auth_app.adapters.persistence.permissions import get_permission_snapshot
 
 
 
@@ -13,16 +14,18 @@ class UserGroupSession:
         self.request = request
 
     def get_group_session(self):
-         
-         return Group.objects.get(pk=self.request.session['group_id'])
+         # El grupo sale de la instantánea cacheada del usuario (sin consultar auth_group)
+         snapshot = get_permission_snapshot(self.request.user)
+         group = snapshot.group(self.request.session['group_id']) if snapshot else None
+         return group or Group.objects.get(pk=self.request.session['group_id'])
 
     def set_group_session(self):
         if 'group_id' not in self.request.session:
           
-            groups =self.request.user.groups.all().order_by('id')
+            snapshot = get_permission_snapshot(self.request.user)
 
-            if groups.exists():
-                self.request.session['group_id'] = groups.first().id
+            if snapshot and snapshot.groups:
+                self.request.session['group_id'] = snapshot.groups[0][0]
              
 
 class GroupPermission:
@@ -30,13 +33,9 @@ class GroupPermission:
     # obtiene los permisos de cada modulo por grupo. Si es superusuario le asigna todos los permisos de cada modulo
     # y si no es superusuario obtiene los permisos del grupo al que pertenece   
     def get_permission_dict_of_group(user: User,group:Group):
+        snapshot = get_permission_snapshot(user)
         if user.is_superuser:
-            permissions = list(Permission.objects.all().values_list('codename',flat=True))
-            permissions = {x: x for x in permissions if x not in (None, '')}
+            permissions = {x: x for x in snapshot.permissions}
         else:
-            print("usuario=>",user)
-            # UserGroupSession = UserGroupSession()
-            # group = user.get_group_session()
-            permissions = list(group.module_permissions.all().values_list('permissions__codename',flat=True))
-            permissions = {x: x for x in permissions if x not in (None, '')}
+            permissions = dict(snapshot.group_permissions.get(group.pk, {}))
         return permissions
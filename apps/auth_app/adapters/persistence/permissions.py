@@ -0,0 +1,173 @@
+"""
+Instantánea de grupos y permisos por usuario.
+
+Las comprobaciones de autorización (is_admin, permisos por grupo, grupo de
+la sesión) leen una instantánea guardada en la caché en lugar de consultar
+auth_group / auth_permission en cada petición. Se invalida con las señales
+de apps/auth_app/signals.py:
+
+- cambios en los grupos o permisos directos de un usuario: se borra su entrada
+- cambios en un grupo o en sus permisos: se incrementa la versión global y se
+  descartan todas las instantáneas
+
+Las señales solo invalidan la caché del proceso que hizo el cambio si el
+backend es local (LocMemCache): en ese caso las instantáneas duran
+PERMISSION_SNAPSHOT_LOCAL_TIMEOUT segundos (5 por defecto), para que un
+permiso retirado deje de valer enseguida en todos los workers.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+
+from apps.shared.utils.caching import invalidation_timeout
+
+ADMIN_GROUP = 'Administrador'
+VERSION_KEY = 'permission_snapshot_version'
+DEFAULT_TIMEOUT = 60 * 60
+LOCAL_TIMEOUT = 5
+
+# Atributo con el que se memoriza la instantánea en request.user
+_USER_ATTR = '_permission_snapshot'
+
+
+@dataclass(frozen=True)
+class PermissionSnapshot:
+    """Grupos y permisos de un usuario en un momento dado"""
+    user_id: str
+    is_superuser: bool = False
+    is_staff: bool = False
+    groups: Tuple[Tuple[int, str], ...] = ()
+    # codename -> codename (formato de GroupPermission) por id de grupo
+    group_permissions: Dict[int, Dict[str, str]] = field(default_factory=dict)
+    permissions: Tuple[str, ...] = ()
+
+    @property
+    def group_names(self) -> Tuple[str, ...]:
+        return tuple(name for _, name in self.groups)
+
+    @property
+    def is_admin(self) -> bool:
+        return ADMIN_GROUP in self.group_names
+
+    def in_group(self, name: str) -> bool:
+        return name in self.group_names
+
+    def has_perm(self, codename: str) -> bool:
+        return self.is_superuser or codename in self.permissions
+
+    def group(self, group_id) -> Optional[Group]:
+        """Group (solo id y nombre) si el usuario pertenece a él"""
+        for pk, name in self.groups:
+            if pk == group_id:
+                return Group(pk=pk, name=name)
+        return None
+
+    def to_dict(self) -> Dict:
+        return {
+            'user_id': self.user_id,
+            'is_superuser': self.is_superuser,
+            'is_staff': self.is_staff,
+            'groups': [list(group) for group in self.groups],
+            'group_permissions': self.group_permissions,
+            'permissions': list(self.permissions),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'PermissionSnapshot':
+        return cls(
+            user_id=data['user_id'],
+            is_superuser=data['is_superuser'],
+            is_staff=data['is_staff'],
+            groups=tuple(tuple(group) for group in data['groups']),
+            group_permissions={int(pk): codenames for pk, codenames in data['group_permissions'].items()},
+            permissions=tuple(data['permissions']),
+        )
+
+
+def _version() -> int:
+    return cache.get_or_set(VERSION_KEY, 1, None)
+
+
+def snapshot_timeout() -> float:
+    """Una hora con caché compartida; unos segundos con caché por proceso"""
+    return invalidation_timeout(
+        getattr(settings, 'PERMISSION_SNAPSHOT_TIMEOUT', DEFAULT_TIMEOUT),
+        getattr(settings, 'PERMISSION_SNAPSHOT_LOCAL_TIMEOUT', LOCAL_TIMEOUT)
+    )
+
+
+def _cache_key(user_id, version: int) -> str:
+    return f'permission_snapshot:{version}:{user_id}'
+
+
+def build_permission_snapshot(user) -> PermissionSnapshot:
+    """Calcula la instantánea desde la BD (grupos + permisos de grupo y directos)"""
+    groups = tuple(user.groups.order_by('id').values_list('id', 'name'))
+
+    group_permissions = {pk: {} for pk, _ in groups}
+    for group_id, codename in Permission.objects.filter(
+        group__id__in=group_permissions
+    ).values_list('group__id', 'codename'):
+        group_permissions[group_id][codename] = codename
+
+    if user.is_superuser:
+        permissions = Permission.objects.values_list('codename', flat=True)
+    else:
+        permissions = Permission.objects.filter(user=user).values_list('codename', flat=True)
+    codenames = set(permissions)
+    for codename_map in group_permissions.values():
+        codenames.update(codename_map)
+
+    return PermissionSnapshot(
+        user_id=str(user.pk),
+        is_superuser=user.is_superuser,
+        is_staff=user.is_staff,
+        groups=groups,
+        group_permissions=group_permissions,
+        permissions=tuple(sorted(codename for codename in codenames if codename)),
+    )
+
+
+def get_permission_snapshot(user) -> Optional[PermissionSnapshot]:
+    """
+    Instantánea del usuario: memorizada en el objeto durante la petición y
+    en la caché entre peticiones. None para usuarios anónimos
+    """
+    if user is None or not user.is_authenticated:
+        return None
+    snapshot = getattr(user, _USER_ATTR, None)
+    if snapshot is not None:
+        return snapshot
+
+    key = _cache_key(user.pk, _version())
+    data = cache.get(key)
+    if data is None:
+        snapshot = build_permission_snapshot(user)
+        cache.set(key, snapshot.to_dict(), snapshot_timeout())
+    else:
+        snapshot = PermissionSnapshot.from_dict(data)
+    setattr(user, _USER_ATTR, snapshot)
+    return snapshot
+
+
+def invalidate_users(*user_ids) -> None:
+    """Descarta la instantánea de los usuarios indicados"""
+    version = _version()
+    cache.delete_many([_cache_key(user_id, version) for user_id in user_ids])
+
+
+def forget(user) -> None:
+    """Descarta la instantánea memorizada en este objeto usuario"""
+    user.__dict__.pop(_USER_ATTR, None)
+
+
+def invalidate_all() -> None:
+    """Descarta todas las instantáneas (cambió un grupo o sus permisos)"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, None)
@@ -0,0 +1,14 @@
+"""
+Context processors de autenticación.
+"""
+
+from django.utils.functional import SimpleLazyObject
+
+from apps.auth_app.adapters.persistence.permissions import get_permission_snapshot
+
+
+def permissions(request):
+    """Instantánea de grupos y permisos del usuario (se calcula solo si la plantilla la usa)"""
+    return {
+        'permission_snapshot': SimpleLazyObject(lambda: get_permission_snapshot(request.user)),
+    }
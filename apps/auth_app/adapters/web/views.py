@@ -7,16 +7,16 @@ from django.contrib import messages
 from django.shortcuts import get_object_or_404, redirect, render
 from django.contrib.auth.models import Group 
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.core.paginator import Paginator
 from django.db.models import Q
 
 from apps.auth_app.adapters.persistence.models import UserModel, ProfileModel
+from apps.auth_app.adapters.persistence.permissions import get_permission_snapshot
 from apps.auth_app.adapters.web.forms import RegisterForm, LoginForm, ProfileForm
+from apps.shared.utils.pagination import cached_count, keyset_paginate
+from apps.shared.utils.db_routing import read_from_replica
+from apps.shared.utils.validators import is_admin
 
 
-def is_admin(user):
-    return user.is_authenticated and user.groups.filter(name='Administrador').exists()
-
 class RegisterView(CreateView):
     """Vista para registro de nuevos usuarios"""
     model = UserModel
@@ -142,6 +142,7 @@ class ProfileView(LoginRequiredMixin, View):
 
 @login_required
 @user_passes_test(is_admin)
+@read_from_replica
 def profiles_list(request):
     profiles = ProfileModel.objects.select_related('user').all().order_by('-created_at')
     
@@ -163,10 +164,8 @@ def profiles_list(request):
     if face_shape_filter:
         profiles = profiles.filter(face_shape=face_shape_filter)
     
-    # Paginación
-    paginator = Paginator(profiles, 12)  # 12 elementos por página
-    page = request.GET.get('page')
-    page_obj = paginator.get_page(page)
+    # Paginación por cursor sobre (created_at, id)
+    page_obj = keyset_paginate(profiles, ('-created_at', '-id'), request.GET.get('cursor'), page_size=12)
     
     # Datos para filtros (géneros y formas de cara únicos)
     genders = ProfileModel.objects.values_list('gender', flat=True).distinct()
@@ -174,7 +173,7 @@ def profiles_list(request):
     
     context = {
         'page_obj': page_obj,
-        'total_count': profiles.count(),
+        'total_count': cached_count(profiles),
         'query': query,
         'gender_filter': gender_filter,
         'face_shape_filter': face_shape_filter,
@@ -201,11 +200,11 @@ def home(request):
     
     # Si el usuario está autenticado, verificar si es administrador
     if request.user.is_authenticated:
-        # Obtener grupos del usuario
-        user_groups = request.user.groups.all()
+        # Grupos del usuario desde la instantánea cacheada
+        snapshot = get_permission_snapshot(request.user)
         
-        if user_groups.exists():
-            first_group = user_groups.first()
+        if snapshot.groups:
+            first_group = snapshot.group(snapshot.groups[0][0])
             context['user_group'] = first_group
             
             # Verificar si pertenece al grupo Administrador
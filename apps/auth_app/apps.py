@@ -5,3 +5,8 @@ class AuthAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.auth_app'
 
+    def ready(self):
+        """
+        Registrar las señales que invalidan las instantáneas de permisos.
+        """
+        from apps.auth_app import signals  # noqa: F401
@@ -0,0 +1,58 @@
+"""
+Señales de autorización: invalidan las instantáneas de grupos y permisos
+(adapters/persistence/permissions.py) cuando cambian.
+"""
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from apps.auth_app.adapters.persistence.permissions import forget, invalidate_all, invalidate_users
+
+UserModel = get_user_model()
+
+
+def _user_relation_changed(instance, action, reverse, **kwargs):
+    """Grupos o permisos directos de un usuario (user.groups / user.user_permissions)"""
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # group.user_set.add(...) / permission.user_set.clear(): pk_set no
+        # siempre trae los usuarios afectados
+        invalidate_all()
+        return
+    forget(instance)
+    invalidate_users(instance.pk)
+
+
+@receiver(m2m_changed, sender=UserModel.groups.through)
+def user_groups_changed(sender, **kwargs):
+    _user_relation_changed(**kwargs)
+
+
+@receiver(m2m_changed, sender=UserModel.user_permissions.through)
+def user_permissions_changed(sender, **kwargs):
+    _user_relation_changed(**kwargs)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate_all()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, raw=False, **kwargs):
+    if not raw:
+        invalidate_all()
+
+
+@receiver(post_save, sender=UserModel)
+def user_changed(sender, instance, created, raw=False, **kwargs):
+    """is_superuser / is_staff forman parte de la instantánea"""
+    if raw or created:
+        return
+    forget(instance)
+    invalidate_users(instance.pk)
@@ -1,3 +1,106 @@
-from django.test import TestCase
+import tempfile
+import time
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser, Group, Permission
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.auth_app.adapters.persistence.components import GroupPermission
+from apps.auth_app.adapters.persistence.models import UserModel
+from apps.auth_app.adapters.persistence.permissions import (
+    DEFAULT_TIMEOUT,
+    get_permission_snapshot,
+    snapshot_timeout
+)
+from apps.shared.utils.validators import is_admin
+
+
+class PermissionSnapshotTest(TestCase):
+    """Autorización sin consultas e invalidada por m2m_changed"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin_group = Group.objects.create(name='Administrador')
+        self.user = UserModel.objects.create_user(email='permisos@example.com', password='x')
+
+    def _fresh_user(self):
+        # Objeto nuevo como el de cada petición (sin la instantánea memorizada)
+        return UserModel.objects.get(pk=self.user.pk)
+
+    def test_admin_check_is_query_free_once_cached(self):
+        self.user.groups.add(self.admin_group)
+        self.assertTrue(is_admin(self._fresh_user()))
+
+        user = self._fresh_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(is_admin(user))
+            self.assertTrue(is_admin(user))
+
+    def test_user_groups_change_invalidates(self):
+        self.assertFalse(is_admin(self._fresh_user()))
+        self.user.groups.add(self.admin_group)
+        self.assertTrue(is_admin(self._fresh_user()))
+        self.user.groups.remove(self.admin_group)
+        self.assertFalse(is_admin(self._fresh_user()))
+
+    def test_reverse_group_membership_change_invalidates(self):
+        self.assertFalse(is_admin(self._fresh_user()))
+        self.admin_group.user_set.add(self.user)
+        self.assertTrue(is_admin(self._fresh_user()))
+        self.admin_group.user_set.clear()
+        self.assertFalse(is_admin(self._fresh_user()))
+
+    def test_group_permissions_change_invalidates(self):
+        permission = Permission.objects.get(codename='add_group')
+        self.user.groups.add(self.admin_group)
+        self.assertEqual(GroupPermission.get_permission_dict_of_group(self._fresh_user(), self.admin_group), {})
+
+        self.admin_group.permissions.add(permission)
+        user = self._fresh_user()
+        self.assertEqual(GroupPermission.get_permission_dict_of_group(user, self.admin_group), {'add_group': 'add_group'})
+        self.assertTrue(get_permission_snapshot(user).has_perm('add_group'))
+
+    def test_anonymous_user(self):
+        self.assertFalse(is_admin(AnonymousUser()))
+
+
+class PermissionSnapshotRevocationTest(TestCase):
+    """
+    Con caché por proceso la invalidación de otro worker no llega: la
+    instantánea debe caducar sola y el admin revocado pierde el acceso
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.admin_group = Group.objects.create(name='Administrador')
+        self.user = UserModel.objects.create_user(email='revocado@example.com', password='x')
+        self.user.groups.add(self.admin_group)
+
+    def _revoke_elsewhere(self):
+        # Borrado directo en la tabla intermedia: sin m2m_changed en este
+        # proceso, como si lo hubiera hecho otro worker
+        UserModel.groups.through.objects.filter(usermodel_id=self.user.pk).delete()
+
+    @override_settings(PERMISSION_SNAPSHOT_LOCAL_TIMEOUT=0.2)
+    def test_revoked_admin_loses_access(self):
+        self.client.force_login(self.user)
+        url = reverse('recomendations:haircuts_list')
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        self._revoke_elsewhere()
+        time.sleep(0.3)
+
+        self.assertFalse(is_admin(UserModel.objects.get(pk=self.user.pk)))
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+    def test_local_cache_uses_short_timeout(self):
+        self.assertLess(snapshot_timeout(), 60)
+
+    def test_shared_cache_uses_long_timeout(self):
+        with tempfile.TemporaryDirectory() as location:
+            with override_settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location,
+            }}):
+                self.assertEqual(snapshot_timeout(), DEFAULT_TIMEOUT)
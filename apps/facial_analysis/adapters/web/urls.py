@@ -8,5 +8,6 @@ urlpatterns = [
     path('results/', views.results, name='results'),
     path('video_feed/', views.video_feed, name='video_feed'),
     path('stop_video/', views.stop_video, name='stop_video'),
+    path('ready/', views.ready, name='ready'),
 
 ]
\ No newline at end of file
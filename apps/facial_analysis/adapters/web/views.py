@@ -1,15 +1,15 @@
-import datetime,json,time,traceback,cv2
+import datetime,json,os,time,traceback,cv2
 from celery import uuid
 from django.shortcuts import render
 from django.http import JsonResponse, StreamingHttpResponse, HttpResponse
 from django.views.decorators import gzip
 from apps.auth_app.adapters.persistence.models import ProfileModel
-from apps.facial_analysis.face_shape_detection import FaceShapeDetector
-from apps.facial_analysis.ml.face_shape_classifier import FaceShapeClassifier
-from django.core.files.base import ContentFile
+from apps.facial_analysis.ml.cascade import FaceShapeCascade
+from apps.facial_analysis.warmup import get_detector, get_classifier, readiness
 import numpy as np
 
-from apps.feedback.core.entities import AnalysisHistory
+from apps.feedback.adapters.persistence.background import AnalysisRecord, get_persistence_worker
+from apps.feedback.core.payloads import compact_measurements
 from apps.recomendations.core.use_cases import (
     GenerateHaircutRecommendationsUseCase,
     GenerateBeardRecommendationsUseCase,
@@ -22,20 +22,21 @@ from apps.recomendations.adapters.persistence.repositories import (
     DjangoRecommendationRepository,
     DjangoStyleRepository
 )
-from apps.recomendations.adapters.ml.recommendation_engine import (
-    RuleBasedRecommendationEngine,
-    StyleCatalogServiceImpl
-)
-from apps.feedback.adapters.persistence.repositories import DjangoAnalysisHistoryRepository
+from apps.recomendations.adapters.ml.recommendation_engine import StyleCatalogServiceImpl
+from apps.recomendations.adapters.ml.vectorized_engine import VectorizedRecommendationEngine
+from apps.recomendations.adapters.ml.collaborative_engine import serving_dependencies
+from apps.recomendations.adapters.ml.diversity import get_diversity_reranker
 
 # Inicializar dependencias de recomendaciones (una vez)
 style_repository = DjangoStyleRepository()
 recommendation_repository = DjangoRecommendationRepository()
-recommendation_engine = RuleBasedRecommendationEngine()
+recommendation_engine = VectorizedRecommendationEngine()
 style_catalog = StyleCatalogServiceImpl(style_repository)
 stop_camera = False  # Bandera global para detener la cámara
-# 🆕 Inicializar repositorio de historial
-history_repository = DjangoAnalysisHistoryRepository()
+# Frames por análisis: mínimo antes de cortar por confianza y máximo absoluto
+MIN_FRAMES = 3
+MAX_FRAMES = 8
+EARLY_STOP_CONFIDENCE = 0.6
 
 # Mapeo de formas de rostro en español a enums
 FACE_SHAPE_MAPPING = {
@@ -158,13 +159,19 @@ def generate_style_recommendations(face_shape_str, gender_str, hair_length_str,
 
         # Generar recomendaciones de cortes
         print(f"    🔍 Llamando a GenerateHaircutRecommendationsUseCase...")
-        haircut_use_case = GenerateHaircutRecommendationsUseCase(recommendation_engine, style_catalog)
-        haircut_styles = haircut_use_case.execute(
+        engine, ranking_table = serving_dependencies(recommendation_engine)
+        reranker = get_diversity_reranker()
+        haircut_use_case = GenerateHaircutRecommendationsUseCase(
+            engine, style_catalog, ranking_table=ranking_table, reranker=reranker
+        )
+        scored_haircuts = haircut_use_case.execute_scored(
             face_shape=face_shape, 
             gender=gender, 
             hair_length=hair_length, 
-            max_results=6
+            max_results=6,
+            user_id=user_id
         )
+        haircut_styles = [style for style, _ in scored_haircuts]
         print(f"    ✓ Cortes obtenidos: {len(haircut_styles)}")
         
         if not haircut_styles:
@@ -176,16 +183,17 @@ def generate_style_recommendations(face_shape_str, gender_str, hair_length_str,
         # Generar recomendaciones de barba (solo hombres)
         if gender == Gender.HOMBRE:
             print(f"    🔍 Llamando a GenerateBeardRecommendationsUseCase...")
-            beard_use_case = GenerateBeardRecommendationsUseCase(recommendation_engine, style_catalog)
-            beard_styles = beard_use_case.execute(face_shape=face_shape, gender=gender, max_results=4)
+            beard_use_case = GenerateBeardRecommendationsUseCase(
+                engine, style_catalog, ranking_table=ranking_table, reranker=reranker
+            )
+            beard_styles = beard_use_case.execute(
+                face_shape=face_shape, gender=gender, max_results=4, user_id=user_id
+            )
             print(f"    ✓ Estilos de barba obtenidos: {len(beard_styles)}")
 
         # Calcular confidence si hay cortes
         if haircut_styles:
-            confidence = sum(
-                recommendation_engine.calculate_style_score(style, face_shape, gender, hair_length)
-                for style in haircut_styles
-            ) / len(haircut_styles) * 100
+            confidence = sum(score for _, score in scored_haircuts) / len(scored_haircuts) * 100
             print(f"    ✓ Confidence calculada: {confidence:.2f}%")
 
         # Obtener tips
@@ -239,13 +247,14 @@ def results(request):
         # Recoger predicciones durante 12 segundos
         while time.time() - start_time < 5:
             _ = camera.get_frame()
-            if len(camera.predictions_history) >= 8:
+            if len(camera.predictions_history) >= MAX_FRAMES or camera.is_confident():
                 predictions_collected = True
                 break
             time.sleep(0.05)
 
         # Obtener resultados agregados
         face_shape_results = camera.get_aggregated_predictions()
+        shape_probabilities = camera.get_aggregated_probabilities()
 
         if not predictions_collected:
             context = {
@@ -350,7 +359,9 @@ def results(request):
                             [str(shape), float(percent)] 
                             for shape, percent in face_shape_results
                         ],
-                        'measurements': convert_to_native(metrics) if metrics else {},
+                        'probabilities': convert_to_native(shape_probabilities),
+                        'frames_used': len(camera.predictions_history),
+                        'measurements': compact_measurements(convert_to_native(metrics)) if metrics else {},
                         'gender': str(user_gender)  # 🔧 Agregar género
                     }
                     
@@ -376,57 +387,26 @@ def results(request):
                         'tips': convert_to_native(recommendations.get('tips', {}))
                     }
                     
-                    # 🆕 GUARDAR LA IMAGEN DEL ROSTRO
-                    image_path_value = None
-                    if frame_array is not None:
-                        try:
-                            # Convertir frame a JPEG
-                            _, buffer = cv2.imencode('.jpg', frame_array)
-                            image_file = ContentFile(buffer.tobytes())
-                            
-                            # Generar nombre único
-                            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                            filename = f'analysis_{request.user.id}_{timestamp}.jpg'
-                            
-                            # Guardar usando el storage de Django
-                            from django.core.files.storage import default_storage
-                            saved_path = default_storage.save(
-                                f'analysis_images/{datetime.now().strftime("%Y/%m/%d")}/{filename}',
-                                image_file
-                            )
-                            image_path_value = saved_path
-                            
-                            print(f"📸 Imagen guardada en: {saved_path}")
-                        except Exception as img_error:
-                            print(f"⚠️ Error al guardar imagen: {img_error}")
-                            import traceback as tb
-                            tb.print_exc()
-                    
-                    # 🆕 CREAR LA ENTIDAD AnalysisHistory
-                    analysis_history_entity = AnalysisHistory(
-                        id=None,  # Se generará en la BD
-                        user_id=str(request.user.id),
-                        face_shape=str(primary_shape),
-                        confidence=float(primary_confidence),
-                        analysis_data=json.dumps(analysis_data_dict),
-                        recommendations_data=json.dumps(recommendations_data_dict),
+                    # La imagen y la fila del historial se guardan en segundo
+                    # plano; la página usa el ID público como ID provisional
+                    record = AnalysisRecord.create(
+                        user_id=request.user.id,
+                        face_shape=primary_shape,
+                        confidence=primary_confidence,
+                        analysis_data=analysis_data_dict,
+                        recommendations_data=recommendations_data_dict,
                         recommendations_count=len(recommendations.get('cortes', [])) + len(recommendations.get('barba', []) or []),
-                        pdf_path=None,
-                        image_path=image_path_value,  # 🆕 AGREGAR IMAGEN
-                        created_at=datetime.now()  # 🔧 Usar datetime.now() en lugar de timezone.now() para compatibilidad
+                        frame=frame_array
                     )
+                    get_persistence_worker().submit(record)
                     
-                    # 🆕 GUARDAR LA ENTIDAD
-                    history_entry = history_repository.save(analysis_history_entity)
-                    
-                    print(f"✅ Análisis guardado en historial con ID: {history_entry.id}")
+                    print(f"✅ Análisis encolado para el historial con ID {record.public_id}")
                     print(f"   Usuario: {request.user.username}")
                     print(f"   Forma: {primary_shape}")
-                    print(f"   Imagen: {image_path_value or 'Sin imagen'}")
                     print(f"   Recomendaciones: {len(recommendations.get('cortes', []))} cortes")
                     print("🔷" * 40 + "\n")
                     
-                    context_history_id = history_entry.id
+                    context_history_id = str(record.public_id)
                     
                 except Exception as e:
                     print(f"❌ ERROR al guardar en historial: {e}")
@@ -445,6 +425,7 @@ def results(request):
                     'face_shape_results': face_shape_results,
                     'primary_shape': primary_shape,
                     'primary_confidence': primary_confidence,
+                    'probabilities': shape_probabilities,
                     'gender': user_gender,
                     'measurements': metrics
                 },
@@ -462,6 +443,10 @@ def results(request):
                     [str(shape), float(percent)] 
                     for shape, percent in analysis.get('face_shape_results', [])
                 ],
+                'probabilities': {
+                    str(shape): float(probability)
+                    for shape, probability in shape_probabilities.items()
+                },
                 'measurements': {
                     k: float(v) if isinstance(v, (int, float)) else str(v)
                     for k, v in (analysis.get('measurements') or {}).items()
@@ -502,48 +487,40 @@ def main(request):
 class VideoCamera:
     def __init__(self):
         self.video = cv2.VideoCapture(0)
-        self.face_detector = FaceShapeDetector()
+        self.face_detector = get_detector()
         self.predictions_history = []
         self.last_frame = None
-        try:
-            self.classifier = FaceShapeClassifier()
-            # Reparar compatibilidad de estimadores sklearn
-            try:
-                model = getattr(self.classifier, 'model', None)
-                if model is not None:
-                    estimators = getattr(model, 'estimators_', None)
-                    if estimators:
-                        for est in estimators:
-                            if not hasattr(est, 'monotonic_cst'):
-                                setattr(est, 'monotonic_cst', None)
-            except Exception:
-                traceback.print_exc()
-        except Exception as e:
-            print(f"Error initializing classifier: {e}")
-            self.classifier = None
+        self.classifier = get_classifier()
+        # Modelo con las reglas de respaldo (sin modelo entrenado)
+        self.cascade = FaceShapeCascade(classifier=self.classifier)
 
     def __del__(self):
         if hasattr(self, 'video') and self.video.isOpened():
             self.video.release()
 
+    def get_aggregated_probabilities(self):
+        """Promedio de las distribuciones por clase de los frames recientes"""
+        totals = {}
+        for _, _, probabilities in self.predictions_history:
+            for face_type, probability in probabilities.items():
+                totals[face_type] = totals.get(face_type, 0.0) + float(probability)
+        count = len(self.predictions_history)
+        return {face_type: total / count for face_type, total in totals.items()} if count else {}
+
     def get_aggregated_predictions(self):
         if not self.predictions_history:
             return [("No detectado", 0)]
-        face_types = {}
-        total_confidence = {}
-        total_predictions = len(self.predictions_history)
-        for pred, conf in self.predictions_history:
-            face_types.setdefault(pred, 0)
-            total_confidence.setdefault(pred, 0)
-            face_types[pred] += 1
-            total_confidence[pred] += conf
-        results = []
-        for face_type, count in face_types.items():
-            percentage = (count / total_predictions) * 100
-            avg_confidence = total_confidence[face_type] / count
-            results.append((face_type, percentage, avg_confidence))
+        probabilities = self.get_aggregated_probabilities()
+        results = [(face_type, probability * 100) for face_type, probability in probabilities.items()]
         results.sort(key=lambda x: x[1], reverse=True)
-        return [(face_type, percentage) for face_type, percentage, _ in results]
+        return results
+
+    def is_confident(self):
+        """Corte temprano: suficientes frames y distribución promedio concentrada"""
+        if len(self.predictions_history) < MIN_FRAMES:
+            return False
+        probabilities = self.get_aggregated_probabilities()
+        return max(probabilities.values(), default=0.0) >= EARLY_STOP_CONFIDENCE
 
     def get_frame(self):
         global stop_camera
@@ -558,28 +535,16 @@ class VideoCamera:
         self.last_frame = image.copy()
         try:
             processed_image, face_data = self.face_detector.detect_face_shape(image.copy())
-            if face_data and self.classifier:
+            if face_data:
                 face_info = face_data[0]
                 face_region = image[
                     face_info['bbox'][1]:face_info['bbox'][1] + face_info['bbox'][3],
                     face_info['bbox'][0]:face_info['bbox'][0] + face_info['bbox'][2]
                 ]
                 try:
-                    features = self.classifier.extract_features(face_region, face_info['measurements'])
-                    features = np.array(features).reshape(1, -1)
-                    try:
-                        prediction, confidence = self.classifier.predict(features)
-                    except AttributeError:
-                        model = getattr(self.classifier, 'model', None)
-                        if model is not None:
-                            estimators = getattr(model, 'estimators_', None)
-                            if estimators:
-                                for est in estimators:
-                                    if not hasattr(est, 'monotonic_cst'):
-                                        setattr(est, 'monotonic_cst', None)
-                        prediction, confidence = self.classifier.predict(features)
-
-                    self.predictions_history.append((prediction, confidence))
+                    prediction, confidence, probabilities = self.cascade.classify(face_region, face_info)
+
+                    self.predictions_history.append((prediction, confidence, probabilities))
                     if len(self.predictions_history) > 60:
                         self.predictions_history.pop(0)
                     x, y, w, h = face_info['bbox']
@@ -669,4 +634,10 @@ def video_feed(request):
         )
     except Exception as e:
         print(f"Error in video feed: {str(e)}")
-        return HttpResponse("Video feed error")
\ No newline at end of file
+        return HttpResponse("Video feed error")
+
+
+def ready(request):
+    """Readiness: 503 solo mientras el calentamiento está en curso o pendiente de reintento"""
+    state = readiness()
+    return JsonResponse(state, status=200 if state['serving'] else 503)
@@ -1,6 +1,28 @@
+import os
+import sys
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class FacialAnalysisConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.facial_analysis'
+
+    def ready(self):
+        """
+        Calentar detector y clasificador al iniciar el servidor
+        """
+        if not getattr(settings, 'FACIAL_ANALYSIS_WARMUP', True):
+            return
+
+        # Solo en procesos que sirven peticiones (no en migrate, test, shell...)
+        command = sys.argv[1] if len(sys.argv) > 1 else ''
+        if os.path.basename(sys.argv[0]) == 'manage.py':
+            if command != 'runserver':
+                return
+            # El proceso padre del autoreloader no atiende peticiones
+            if os.environ.get('RUN_MAIN') != 'true' and '--noreload' not in sys.argv:
+                return
+
+        from apps.facial_analysis.warmup import start_warm_up
+        start_warm_up()
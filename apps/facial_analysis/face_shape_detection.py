@@ -109,9 +109,9 @@ class FaceShapeDetector:
             'cheek_width': cheek_width
         }
     
-    def classify_face_shape(self, measurements, contour=None):
+    def score_face_shape(self, measurements, contour=None):
         """
-        Clasificación en 5 formas: Corazón, Diamante, Ovalado, Redondo, Triangular
+        Puntajes por forma: Corazón, Diamante, Ovalado, Redondo, Triangular
         
         DIAMANTE: Pómulos anchos (medio), frente y mandíbula estrechas
         - Medio más ancho que frente y mandíbula
@@ -229,6 +229,14 @@ class FaceShapeDetector:
         if ratio < 1.1 and abs(forehead_to_jaw - 1.0) < 0.15:
             scores['Redondo'] += 2
         
+        return scores
+    
+    def classify_face_shape(self, measurements, contour=None, scores=None):
+        """Clasificación en 5 formas a partir de los puntajes de score_face_shape"""
+        if scores is None:
+            scores = self.score_face_shape(measurements, contour)
+        ratio = measurements['ratio']
+        
         # Encontrar mejor forma
         best_shape = max(scores.keys(), key=lambda k: scores[k])
         max_score = scores[best_shape]
@@ -273,7 +281,8 @@ class FaceShapeDetector:
             face_region = image[y:y+h, x:x+w]
             contour, edges = self.analyze_face_contour(face_region)
             measurements = self.calculate_face_measurements(x, y, w, h, face_region)
-            face_shape = self.classify_face_shape(measurements, contour)
+            shape_scores = self.score_face_shape(measurements, contour)
+            face_shape = self.classify_face_shape(measurements, contour, scores=shape_scores)
             
             # Dibujar
             cv2.rectangle(image, (x, y), (x + w, y + h), (255, 0, 0), 2)
@@ -304,7 +313,8 @@ class FaceShapeDetector:
                 'face_shape': face_shape,
                 'measurements': measurements,
                 'bbox': (x, y, w, h),
-                'contour': contour
+                'contour': contour,
+                'shape_scores': shape_scores
             })
         
         return image, results
\ No newline at end of file
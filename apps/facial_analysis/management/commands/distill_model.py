@@ -0,0 +1,82 @@
+# apps/facial_analysis/management/commands/distill_model.py
+from django.core.management.base import BaseCommand
+from apps.facial_analysis.ml.distilled_classifier import DistilledFaceShapeClassifier
+from apps.facial_analysis.ml.face_shape_classifier import FaceShapeClassifier
+from apps.facial_analysis.ml.image_loader import ImageLoader
+from apps.facial_analysis.face_shape_detection import FaceShapeDetector
+
+
+class Command(BaseCommand):
+    help = 'Destila el Random Forest en un modelo compacto para la vía rápida'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dataset',
+            type=str,
+            default='dataset/faces',
+            help='Ruta al directorio del dataset'
+        )
+        parser.add_argument(
+            '--student',
+            type=str,
+            choices=DistilledFaceShapeClassifier.STUDENT_TYPES,
+            default='tree',
+            help='Tipo de modelo compacto (tree o logistic)'
+        )
+        parser.add_argument(
+            '--max-depth',
+            type=int,
+            default=6,
+            help='Profundidad máxima del árbol estudiante'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=None,
+            help='Confianza mínima para aceptar la predicción del estudiante (por defecto se ajusta)'
+        )
+        parser.add_argument(
+            '--target-agreement',
+            type=float,
+            default=0.95,
+            help='Acuerdo mínimo con el bosque en la vía rápida al ajustar el umbral'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('\n========== DESTILACIÓN DE MODELO ==========\n'))
+
+        teacher = FaceShapeClassifier()
+        if teacher.model is None:
+            self.stdout.write(self.style.ERROR('✗ Modelo no encontrado. Ejecuta primero train_model'))
+            return
+
+        # Validar dataset
+        loader = ImageLoader(options['dataset'])
+        if not loader.validate_dataset_structure():
+            self.stdout.write(self.style.ERROR('✗ Dataset inválido o incompleto'))
+            return
+
+        # Cargar características de entrenamiento
+        self.stdout.write(self.style.SUCCESS('\n[1/3] Cargando imágenes...'))
+        X, _, loaded = loader.load_images_from_directory(FaceShapeDetector())
+
+        if loaded == 0:
+            self.stdout.write(self.style.ERROR('✗ No se cargaron imágenes'))
+            return
+
+        # Destilar
+        self.stdout.write(self.style.SUCCESS('\n[2/3] Destilando modelo...'))
+        distilled = DistilledFaceShapeClassifier(teacher=teacher)
+        distilled.distill(
+            X,
+            student_type=options['student'],
+            max_depth=options['max_depth'],
+            threshold=options['threshold'],
+            target_agreement=options['target_agreement']
+        )
+
+        # Guardar
+        self.stdout.write(self.style.SUCCESS('\n[3/3] Guardando modelo...'))
+        distilled.save_model()
+
+        self.stdout.write(self.style.SUCCESS('\n✓ ¡Destilación completada exitosamente!\n'))
@@ -0,0 +1,72 @@
+# apps/facial_analysis/management/commands/evaluate_cascade.py
+import os
+from pathlib import Path
+import cv2
+from django.core.management.base import BaseCommand
+from apps.facial_analysis.ml.cascade import FaceShapeCascade
+from apps.facial_analysis.ml.face_shape_classifier import FaceShapeClassifier
+from apps.facial_analysis.face_shape_detection import FaceShapeDetector
+
+
+class Command(BaseCommand):
+    help = 'Evalúa el modelo y las reglas de forma de rostro sobre un dataset etiquetado'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dataset',
+            type=str,
+            default='dataset/faces',
+            help='Ruta al directorio del dataset (una carpeta por forma)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('\n========== EVALUACIÓN DE CASCADA ==========\n'))
+
+        dataset_path = options['dataset']
+        if not os.path.isdir(dataset_path):
+            self.stdout.write(self.style.ERROR(f'✗ Dataset no encontrado: {dataset_path}'))
+            return
+
+        detector = FaceShapeDetector()
+        classifier = FaceShapeClassifier()
+        if classifier.model is None:
+            self.stdout.write(self.style.WARNING('⚠ Modelo no encontrado: solo se evaluará la vía de reglas'))
+
+        cascade = FaceShapeCascade(classifier=classifier)
+
+        # Precalcular puntajes y probabilidades una sola vez por imagen
+        self.stdout.write(self.style.SUCCESS('\n[1/2] Procesando imágenes...'))
+        records = []
+        valid_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff'}
+
+        for class_name in sorted(os.listdir(dataset_path)):
+            class_path = os.path.join(dataset_path, class_name)
+            if not os.path.isdir(class_path):
+                continue
+
+            for image_file in os.listdir(class_path):
+                if Path(image_file).suffix.lower() not in valid_extensions:
+                    continue
+
+                image = cv2.imread(os.path.join(class_path, image_file))
+                if image is None:
+                    continue
+
+                _, face_data = detector.detect_face_shape(image.copy())
+                if not face_data:
+                    continue
+
+                face_info = face_data[0]
+                x, y, w, h = face_info['bbox']
+                records.append(cascade.build_record(image[y:y + h, x:x + w], face_info, class_name))
+
+            self.stdout.write(f'    ✓ {class_name}')
+
+        if not records:
+            self.stdout.write(self.style.ERROR('✗ No se detectaron rostros en el dataset'))
+            return
+
+        self.stdout.write(self.style.SUCCESS('\n[2/2] Evaluando...'))
+        cascade.evaluate(records)
+
+        self.stdout.write(self.style.SUCCESS('\n✓ ¡Evaluación completada!\n'))
@@ -0,0 +1,322 @@
+# apps/facial_analysis/ml/distilled_classifier.py
+import os
+import pickle
+import time
+import numpy as np
+from sklearn.tree import DecisionTreeRegressor
+from sklearn.linear_model import LogisticRegression
+
+from apps.facial_analysis.ml.face_shape_classifier import FaceShapeClassifier
+
+DEFAULT_STUDENT_PATH = 'apps/facial_analysis/ml/models/distilled_model.pkl'
+
+
+class DistilledFaceShapeClassifier:
+    """
+    Modelo compacto destilado del Random Forest (vía rápida de baja latencia)
+
+    El estudiante (árbol poco profundo o regresión logística multinomial) se
+    entrena sobre las probabilidades suaves del bosque. Al predecir se usa el
+    estudiante cuando su confianza supera el umbral y, si no, el bosque completo.
+    """
+
+    STUDENT_TYPES = ('tree', 'logistic')
+
+    def __init__(self, teacher=None, student_path=None, confidence_threshold=0.75):
+        self.teacher = teacher or FaceShapeClassifier()
+        self.student = None
+        self.student_type = None
+        self.classes = None
+        self.confidence_threshold = confidence_threshold
+        self.student_path = student_path or DEFAULT_STUDENT_PATH
+        self.reset_stats()
+
+        # Cargar estudiante si existe
+        if os.path.exists(self.student_path):
+            self.load_model()
+
+    @property
+    def model(self):
+        """Modelo completo (bosque) usado como respaldo"""
+        return self.teacher.model
+
+    def extract_features(self, face_region, measurements):
+        """Delegado al clasificador completo"""
+        return self.teacher.extract_features(face_region, measurements)
+
+    def reset_stats(self):
+        """Reinicia los contadores de la vía rápida / respaldo"""
+        self.stats = {
+            'fast_count': 0,
+            'fallback_count': 0,
+            'fast_time': 0.0,
+            'fallback_time': 0.0,
+        }
+
+    def distill(self, X, student_type='tree', max_depth=6, threshold=None, target_agreement=0.95):
+        """
+        Entrena el modelo compacto sobre las predicciones suaves del bosque
+
+        Args:
+            X: features array (N, 11) sin normalizar
+            student_type: 'tree' (árbol de regresión) o 'logistic'
+            max_depth: profundidad máxima del árbol estudiante
+            threshold: umbral de confianza fijo (None = ajustarlo)
+            target_agreement: acuerdo mínimo en la vía rápida al ajustar el umbral
+
+        Returns:
+            dict con el reporte de evaluación (ver evaluate)
+        """
+        if self.teacher.model is None:
+            raise ValueError("Modelo no entrenado")
+        if student_type not in self.STUDENT_TYPES:
+            raise ValueError(f"Tipo de estudiante inválido: {student_type}")
+
+        X_scaled = self.teacher.scaler.transform(X)
+        soft_targets = self.teacher.scaled_proba(X_scaled)
+        self.classes = np.array(self.teacher.model.classes_)
+        n_classes = len(self.classes)
+
+        print(f"[*] Destilando {len(X)} muestras en un estudiante '{student_type}'...")
+        if student_type == 'tree':
+            # Regresión multi-salida: cada hoja guarda la media de las probabilidades
+            self.student = DecisionTreeRegressor(
+                max_depth=max_depth,
+                min_samples_leaf=2,
+                random_state=42
+            )
+            self.student.fit(X_scaled, soft_targets)
+        else:
+            # Etiquetas suaves mediante réplicas ponderadas por la probabilidad
+            X_rep = np.repeat(X_scaled, n_classes, axis=0)
+            y_rep = np.tile(self.classes, len(X_scaled))
+            weights = soft_targets.ravel()
+            self.student = LogisticRegression(max_iter=1000)
+            self.student.fit(X_rep, y_rep, sample_weight=weights)
+
+        self.student_type = student_type
+
+        if threshold is None:
+            self.tune_threshold(X, target_agreement=target_agreement)
+        else:
+            self.confidence_threshold = threshold
+
+        return self.evaluate(X)
+
+    def tune_threshold(self, X, target_agreement=0.95):
+        """
+        Elige el umbral de confianza más bajo cuya vía rápida mantiene
+        el acuerdo mínimo con el bosque
+
+        Args:
+            X: features array (N, 11) sin normalizar
+            target_agreement: acuerdo mínimo exigido en la vía rápida
+
+        Returns:
+            umbral elegido
+        """
+        if self.student is None:
+            raise ValueError("Estudiante no entrenado")
+
+        X_scaled = self.teacher.scaler.transform(X)
+        teacher_labels = self.teacher.model.classes_[
+            np.argmax(self.teacher.scaled_proba(X_scaled), axis=1)
+        ]
+        student_probabilities = self._student_proba(X_scaled)
+        confidences = np.max(student_probabilities, axis=1)
+        agree = self.classes[np.argmax(student_probabilities, axis=1)] == teacher_labels
+
+        # Acuerdo acumulado aceptando muestras de mayor a menor confianza
+        order = np.argsort(-confidences)
+        cumulative = np.cumsum(agree[order]) / np.arange(1, len(order) + 1)
+        valid = np.where(cumulative >= target_agreement)[0]
+
+        # Sin umbral válido la vía rápida queda desactivada
+        self.confidence_threshold = float(confidences[order][valid[-1]]) if len(valid) else np.inf
+        print(f"[*] Umbral de confianza ajustado: {self.confidence_threshold:.4f}")
+        return self.confidence_threshold
+
+    def _student_proba(self, X_scaled):
+        """Probabilidades del estudiante en el orden de clases del bosque"""
+        if self.student_type == 'tree':
+            probabilities = np.clip(self.student.predict(X_scaled), 0.0, None)
+            probabilities = probabilities.reshape(len(X_scaled), -1)
+            totals = probabilities.sum(axis=1, keepdims=True)
+            totals[totals == 0] = 1.0
+            return probabilities / totals
+
+        probabilities = self.student.predict_proba(X_scaled)
+        order = [list(self.student.classes_).index(c) for c in self.classes]
+        return probabilities[:, order]
+
+    def _serve(self, features):
+        """Vía rápida con respaldo del bosque; retorna (clases, probabilidades)"""
+        start = time.perf_counter()
+        features_scaled = self.teacher.scaler.transform(np.asarray(features).reshape(1, -1))
+        probabilities = self._student_proba(features_scaled)[0]
+
+        if np.max(probabilities) >= self.confidence_threshold:
+            self.stats['fast_count'] += 1
+            self.stats['fast_time'] += time.perf_counter() - start
+            return self.classes, probabilities
+
+        probabilities = self.teacher.scaled_proba(features_scaled)[0]
+        self.stats['fallback_count'] += 1
+        self.stats['fallback_time'] += time.perf_counter() - start
+        return self.teacher.model.classes_, probabilities
+
+    def predict(self, features):
+        """
+        Predice la forma del rostro con la vía rápida y respaldo del bosque
+
+        Args:
+            features: array de características
+
+        Returns:
+            (clase_predicha, confianza)
+        """
+        if self.student is None:
+            return self.teacher.predict(features)
+
+        classes, probabilities = self._serve(features)
+        return classes[np.argmax(probabilities)], np.max(probabilities)
+
+    def predict_proba(self, features):
+        """
+        Probabilidades por clase (del estudiante si es confiable, si no del bosque)
+
+        Args:
+            features: array de características
+
+        Returns:
+            dict {clase: probabilidad}
+        """
+        if self.student is None:
+            return self.teacher.predict_proba(features)
+
+        classes, probabilities = self._serve(features)
+        return dict(zip(classes, probabilities))
+
+    def predict_batch(self, features_list):
+        """
+        Predice múltiples rostros
+
+        Args:
+            features_list: lista de arrays de características
+
+        Returns:
+            lista de (predicción, confianza)
+        """
+        if self.student is None:
+            return self.teacher.predict_batch(features_list)
+
+        features_scaled = self.teacher.scaler.transform(features_list)
+        probabilities = self._student_proba(features_scaled)
+        confidences = np.max(probabilities, axis=1)
+        labels = self.classes[np.argmax(probabilities, axis=1)]
+
+        fallback = confidences < self.confidence_threshold
+        if np.any(fallback):
+            teacher_probabilities = self.teacher.scaled_proba(features_scaled[fallback])
+            labels[fallback] = self.teacher.model.classes_[np.argmax(teacher_probabilities, axis=1)]
+            confidences[fallback] = np.max(teacher_probabilities, axis=1)
+
+        return list(zip(labels, confidences))
+
+    def evaluate(self, X):
+        """
+        Mide el acuerdo estudiante/bosque y el reparto de latencia
+
+        Args:
+            X: features array (N, 11) sin normalizar
+
+        Returns:
+            dict con tasa de acuerdo, cobertura de la vía rápida y latencias (ms)
+        """
+        if self.student is None:
+            raise ValueError("Estudiante no entrenado")
+
+        X_scaled = self.teacher.scaler.transform(X)
+        teacher_labels = self.teacher.model.classes_[
+            np.argmax(self.teacher.scaled_proba(X_scaled), axis=1)
+        ]
+        student_probabilities = self._student_proba(X_scaled)
+        student_labels = self.classes[np.argmax(student_probabilities, axis=1)]
+        fast_mask = np.max(student_probabilities, axis=1) >= self.confidence_threshold
+
+        # Latencia por muestra individual (el caso real: un rostro por frame)
+        student_times = []
+        teacher_times = []
+        for row in X_scaled:
+            row = row.reshape(1, -1)
+            start = time.perf_counter()
+            self._student_proba(row)
+            student_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            self.teacher.scaled_proba(row)
+            teacher_times.append(time.perf_counter() - start)
+
+        student_ms = np.mean(student_times) * 1000
+        teacher_ms = np.mean(teacher_times) * 1000
+        fast_rate = float(np.mean(fast_mask))
+        # La vía de respaldo paga el estudiante y luego el bosque
+        served_ms = fast_rate * student_ms + (1 - fast_rate) * (student_ms + teacher_ms)
+
+        report = {
+            'agreement_rate': float(np.mean(student_labels == teacher_labels)),
+            'fast_path_agreement': float(np.mean(student_labels[fast_mask] == teacher_labels[fast_mask])) if np.any(fast_mask) else 0.0,
+            'fast_path_rate': fast_rate,
+            'student_latency_ms': float(student_ms),
+            'teacher_latency_ms': float(teacher_ms),
+            'served_latency_ms': float(served_ms),
+        }
+
+        print(f"\n✓ Destilación evaluada ({len(X)} muestras)")
+        print(f"  - Acuerdo con el bosque: {report['agreement_rate']:.4f}")
+        print(f"  - Vía rápida: {report['fast_path_rate']:.2%} (acuerdo {report['fast_path_agreement']:.4f})")
+        print(f"  - Latencia estudiante: {report['student_latency_ms']:.3f} ms")
+        print(f"  - Latencia bosque: {report['teacher_latency_ms']:.3f} ms")
+        print(f"  - Latencia servida (media): {report['served_latency_ms']:.3f} ms")
+
+        return report
+
+    def latency_split(self):
+        """Reparto de llamadas y latencia media (ms) observado al servir"""
+        fast = self.stats['fast_count']
+        fallback = self.stats['fallback_count']
+        return {
+            'fast_count': fast,
+            'fallback_count': fallback,
+            'fast_avg_ms': self.stats['fast_time'] / fast * 1000 if fast else 0.0,
+            'fallback_avg_ms': self.stats['fallback_time'] / fallback * 1000 if fallback else 0.0,
+        }
+
+    def save_model(self):
+        """Guarda el estudiante"""
+        os.makedirs(os.path.dirname(self.student_path), exist_ok=True)
+
+        with open(self.student_path, 'wb') as f:
+            pickle.dump({
+                'student': self.student,
+                'student_type': self.student_type,
+                'classes': self.classes,
+                'confidence_threshold': self.confidence_threshold,
+            }, f)
+
+        print(f"✓ Modelo destilado guardado: {self.student_path}")
+
+    def load_model(self):
+        """Carga el estudiante"""
+        try:
+            with open(self.student_path, 'rb') as f:
+                data = pickle.load(f)
+
+            self.student = data['student']
+            self.student_type = data['student_type']
+            self.classes = data['classes']
+            self.confidence_threshold = data.get('confidence_threshold', self.confidence_threshold)
+
+            print(f"✓ Modelo destilado cargado: {self.student_path}")
+        except Exception as e:
+            print(f"✗ Error al cargar modelo destilado: {e}")
+            self.student = None
@@ -4,9 +4,44 @@ import pickle
 import os
 import cv2
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.calibration import CalibratedClassifierCV
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
+from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, brier_score_loss, log_loss
+
+# Medidas usadas por el modelo, como array estructurado para el cálculo por lotes
+MEASUREMENT_DTYPE = np.dtype([
+    ('ratio', np.float64),
+    ('forehead_to_middle_ratio', np.float64),
+    ('jaw_to_middle_ratio', np.float64),
+    ('forehead_to_jaw_ratio', np.float64),
+    ('width', np.float64),
+    ('forehead_width', np.float64),
+    ('middle_width', np.float64),
+    ('jaw_width', np.float64),
+])
+
+
+def measurements_to_array(measurements_list):
+    """Convierte una lista de diccionarios de medidas en un array estructurado"""
+    return np.array(
+        [tuple(m[name] for name in MEASUREMENT_DTYPE.names) for m in measurements_list],
+        dtype=MEASUREMENT_DTYPE
+    )
+
+
+def image_statistics(face_region):
+    """
+    Contraste y suavidad de la región de la cara
+
+    Usa la diferencia absoluta en uint8 y sumas exactas, sin copias en float.
+    """
+    gray = cv2.cvtColor(face_region, cv2.COLOR_BGR2GRAY)
+    _, std = cv2.meanStdDev(gray)
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    diff_sum = cv2.sumElems(cv2.absdiff(gray, blurred))[0]
+    return std[0, 0] / 255.0, diff_sum / (gray.size * 255)
+
 
 class FaceShapeClassifier:
     """
@@ -16,11 +51,13 @@ class FaceShapeClassifier:
     
     def __init__(self, model_path=None):
         self.model = None
+        self.calibrator = None
         self.scaler = StandardScaler()
         # 5 clases actualizadas
         self.classes = ['Corazón', 'Diamante', 'Ovalado', 'Redondo', 'Triangular']
         self.model_path = model_path or 'apps/facial_analysis/ml/models/face_shape_model.pkl'
         self.scaler_path = model_path or 'apps/facial_analysis/ml/models/scaler.pkl'
+        self.calibrator_path = os.path.join(os.path.dirname(self.model_path), 'calibrator.pkl')
         
         # Crear directorio de modelos si no existe
         os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
@@ -68,20 +105,57 @@ class FaceShapeClassifier:
         features.append(width_std)
         features.append(width_max_diff)
         
-        # 4. Características de la imagen
-        gray = cv2.cvtColor(face_region, cv2.COLOR_BGR2GRAY)
-        
-        # Contraste
-        contrast = np.std(gray) / 255.0
+        # 4. Características de la imagen (contraste y suavidad)
+        contrast, smoothness = image_statistics(face_region)
         features.append(contrast)
-        
-        # Suavidad
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-        smoothness = np.sum(np.abs(gray.astype(float) - blurred.astype(float))) / (gray.size * 255)
         features.append(smoothness)
         
         return np.array(features)
     
+    def extract_features_batch(self, face_regions, measurements):
+        """
+        Extrae características de varios rostros a la vez
+        
+        Args:
+            face_regions: lista de regiones de cara (imágenes OpenCV)
+            measurements: array estructurado (MEASUREMENT_DTYPE) o lista de diccionarios
+        
+        Returns:
+            matriz (N, 11) float32, igual a extract_features fila a fila
+        """
+        if not isinstance(measurements, np.ndarray):
+            measurements = measurements_to_array(measurements)
+        
+        features = np.empty((len(measurements), 11), dtype=np.float32)
+        if len(measurements) == 0:
+            return features
+        
+        # 1. Ratios básicos
+        features[:, 0] = measurements['ratio']
+        features[:, 1] = measurements['forehead_to_middle_ratio']
+        features[:, 2] = measurements['jaw_to_middle_ratio']
+        features[:, 3] = measurements['forehead_to_jaw_ratio']
+        
+        # 2. Proporciones de ancho
+        widths = np.column_stack((
+            measurements['forehead_width'],
+            measurements['middle_width'],
+            measurements['jaw_width']
+        ))
+        face_width = np.maximum(measurements['width'], 1)
+        features[:, 4:7] = widths / face_width[:, None]
+        
+        # 3. Variabilidad de anchos
+        mean_width = np.maximum(np.mean(widths, axis=1), 1)
+        features[:, 7] = np.std(widths, axis=1) / mean_width
+        features[:, 8] = (widths.max(axis=1) - widths.min(axis=1)) / mean_width
+        
+        # 4. Características de la imagen
+        for idx, face_region in enumerate(face_regions):
+            features[idx, 9:11] = image_statistics(face_region)
+        
+        return features
+    
     def train(self, X, y, test_size=0.2):
         """
         Entrena el modelo Random Forest
@@ -103,7 +177,7 @@ class FaceShapeClassifier:
         )
         
         print(f"[*] Creando modelo Random Forest...")
-        self.model = RandomForestClassifier(
+        forest = RandomForestClassifier(
             n_estimators=100,
             max_depth=10,
             min_samples_split=5,
@@ -113,29 +187,56 @@ class FaceShapeClassifier:
             verbose=1
         )
         
-        print(f"[*] Entrenando modelo...")
-        self.model.fit(X_train, y_train)
+        # Calibración sigmoide con validación cruzada; con ensemble=False el
+        # bosque final se entrena con todo el conjunto de entrenamiento
+        print(f"[*] Entrenando modelo calibrado...")
+        self.calibrator = CalibratedClassifierCV(forest, method='sigmoid', cv=3, ensemble=False)
+        self.calibrator.fit(X_train, y_train)
+        self.model = self.calibrator.calibrated_classifiers_[0].estimator
         
         # Evaluar
         train_accuracy = self.model.score(X_train, y_train)
         test_accuracy = self.model.score(X_test, y_test)
         
         y_pred = self.model.predict(X_test)
+        raw_proba = self.model.predict_proba(X_test)
+        calibrated_proba = self.calibrator.predict_proba(X_test)
         
         print(f"\n✓ Entrenamiento completado!")
         print(f"  - Precisión entrenamiento: {train_accuracy:.4f}")
         print(f"  - Precisión test: {test_accuracy:.4f}")
+        print(f"  - Log-loss test (sin calibrar / calibrado): "
+              f"{log_loss(y_test, raw_proba, labels=self.model.classes_):.4f} / "
+              f"{log_loss(y_test, calibrated_proba, labels=self.model.classes_):.4f}")
+        print(f"  - Brier test (sin calibrar / calibrado): "
+              f"{self._brier(y_test, raw_proba):.4f} / {self._brier(y_test, calibrated_proba):.4f}")
         print(f"\nReporte de clasificación:")
-        print(classification_report(y_test, y_pred, target_names=self.classes))
+        print(classification_report(y_test, y_pred))
         
         return {
             'train_accuracy': train_accuracy,
             'test_accuracy': test_accuracy,
             'y_true': y_test,
             'y_pred': y_pred,
-            'classes': self.classes
+            'classes': list(self.model.classes_)
         }
     
+    def _brier(self, y_true, probabilities):
+        """Brier multiclase promedio (uno contra todos)"""
+        return np.mean([
+            brier_score_loss(np.asarray(y_true) == label, probabilities[:, idx])
+            for idx, label in enumerate(self.model.classes_)
+        ])
+    
+    def scaled_proba(self, features_scaled):
+        """
+        Matriz de probabilidades (calibradas si hay calibrador) para
+        características ya normalizadas, en el orden de model.classes_
+        """
+        if self.calibrator is not None:
+            return self.calibrator.predict_proba(features_scaled)
+        return self.model.predict_proba(features_scaled)
+    
     def predict(self, features):
         """
         Predice la forma del rostro
@@ -149,13 +250,31 @@ class FaceShapeClassifier:
         if self.model is None:
             raise ValueError("Modelo no entrenado")
         
-        features_scaled = self.scaler.transform(features.reshape(1, -1))
-        prediction = self.model.predict(features_scaled)[0]
-        probabilities = self.model.predict_proba(features_scaled)[0]
+        features_scaled = self.scaler.transform(np.asarray(features).reshape(1, -1))
+        probabilities = self.scaled_proba(features_scaled)[0]
+        prediction = self.model.classes_[np.argmax(probabilities)]
         confidence = np.max(probabilities)
         
         return prediction, confidence
     
+    def predict_proba(self, features):
+        """
+        Probabilidades por clase (calibradas si hay calibrador)
+        
+        Args:
+            features: array de características
+        
+        Returns:
+            dict {clase: probabilidad}
+        """
+        if self.model is None:
+            raise ValueError("Modelo no entrenado")
+        
+        features_scaled = self.scaler.transform(np.asarray(features).reshape(1, -1))
+        probabilities = self.scaled_proba(features_scaled)[0]
+        
+        return dict(zip(self.model.classes_, probabilities))
+    
     def predict_batch(self, features_list):
         """
         Predice múltiples rostros
@@ -170,8 +289,8 @@ class FaceShapeClassifier:
             raise ValueError("Modelo no entrenado")
         
         features_scaled = self.scaler.transform(features_list)
-        predictions = self.model.predict(features_scaled)
-        probabilities = self.model.predict_proba(features_scaled)
+        probabilities = self.scaled_proba(features_scaled)
+        predictions = self.model.classes_[np.argmax(probabilities, axis=1)]
         confidences = np.max(probabilities, axis=1)
         
         return list(zip(predictions, confidences))
@@ -186,6 +305,10 @@ class FaceShapeClassifier:
         with open(self.scaler_path, 'wb') as f:
             pickle.dump(self.scaler, f)
         
+        if self.calibrator is not None:
+            with open(self.calibrator_path, 'wb') as f:
+                pickle.dump(self.calibrator, f)
+        
         print(f"✓ Modelo guardado: {self.model_path}")
     
     def load_model(self):
@@ -197,6 +320,24 @@ class FaceShapeClassifier:
             with open(self.scaler_path, 'rb') as f:
                 self.scaler = pickle.load(f)
             
+            # Compatibilidad con árboles serializados en versiones antiguas de sklearn
+            for est in getattr(self.model, 'estimators_', None) or []:
+                if not hasattr(est, 'monotonic_cst'):
+                    setattr(est, 'monotonic_cst', None)
+                # sklearn < 1.4 guardaba conteos por hoja; ahora se esperan fracciones
+                values = est.tree_.value
+                totals = values.sum(axis=-1, keepdims=True)
+                if not np.allclose(totals, 1.0):
+                    values /= np.where(totals == 0, 1, totals)
+            
+            # Calibrador opcional (modelos entrenados antes no lo tienen)
+            self.calibrator = None
+            if os.path.exists(self.calibrator_path):
+                with open(self.calibrator_path, 'rb') as f:
+                    self.calibrator = pickle.load(f)
+                # Usar el mismo bosque cargado dentro del calibrador
+                self.model = self.calibrator.calibrated_classifiers_[0].estimator
+            
             print(f"✓ Modelo cargado: {self.model_path}")
         except Exception as e:
             print(f"✗ Error al cargar modelo: {e}")
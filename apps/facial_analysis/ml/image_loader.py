@@ -36,9 +36,10 @@ class ImageLoader:
             face_detector: instancia de FaceShapeDetector para extraer rostros
         
         Returns:
-            (features_list, labels_list, images_loaded_count)
+            (features (N, 11) float32, labels_list, images_loaded_count)
         """
-        features_list = []
+        face_regions = []
+        measurements_list = []
         labels_list = []
         loaded_count = 0
         failed_count = 0
@@ -81,15 +82,11 @@ class ImageLoader:
                             face_info['bbox'][1]:face_info['bbox'][1] + face_info['bbox'][3],
                             face_info['bbox'][0]:face_info['bbox'][0] + face_info['bbox'][2]
                         ]
-                        
-                        # Extraer features
-                        from apps.facial_analysis.ml.face_shape_classifier import FaceShapeClassifier
-                        classifier = FaceShapeClassifier()
-                        features = classifier.extract_features(face_region, face_info['measurements'])
                     else:
                         raise ValueError("Face detector requerido")
                     
-                    features_list.append(features)
+                    face_regions.append(face_region)
+                    measurements_list.append(face_info['measurements'])
                     labels_list.append(class_name)
                     loaded_count += 1
                     
@@ -100,11 +97,14 @@ class ImageLoader:
                     print(f"    ✗ [{idx+1}/{len(image_files)}] {image_file}: {str(e)}")
                     failed_count += 1
         
+        # Extraer features de todos los rostros en un solo lote
+        features = FaceShapeClassifier().extract_features_batch(face_regions, measurements_list)
+        
         print(f"\n✓ Carga completa!")
         print(f"  - Imágenes procesadas: {loaded_count}")
         print(f"  - Errores: {failed_count}")
         
-        return np.array(features_list), np.array(labels_list), loaded_count
+        return features, np.array(labels_list), loaded_count
     
     def load_single_image(self, image_path, face_detector):
         """
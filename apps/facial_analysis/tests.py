@@ -1,165 +1,332 @@
-from django.test import TestCase
-
-# Create your tests here.
-"""
-Script de diagnóstico para verificar el sistema de recomendaciones
-Ejecutar con: python manage.py shell < debug_recommendations.py
-O copiar y pegar en: python manage.py shell
-"""
-
-print("=" * 60)
-print("DIAGNÓSTICO DEL SISTEMA DE RECOMENDACIONES")
-print("=" * 60)
-
-# 1. Verificar modelos
-print("\n1. VERIFICANDO MODELOS EN BASE DE DATOS:")
-try:
-    from apps.recomendations.models import (
-        HaircutStyleModel,
-        BeardStyleModel,
-        RecommendationModel
-    )
-    
-    haircut_count = HaircutStyleModel.objects.count()
-    beard_count = BeardStyleModel.objects.count()
-    recommendation_count = RecommendationModel.objects.count()
-    
-    print(f"✓ Cortes de cabello: {haircut_count}")
-    print(f"✓ Estilos de barba: {beard_count}")
-    print(f"✓ Recomendaciones guardadas: {recommendation_count}")
-    
-    if haircut_count == 0:
-        print("\n⚠️ NO HAY CORTES EN LA BD - Ejecuta: python manage.py populate_styles")
-    
-    # Mostrar algunos ejemplos
-    if haircut_count > 0:
-        print("\n  Ejemplos de cortes:")
-        for style in HaircutStyleModel.objects.all()[:3]:
-            print(f"    - {style.name} (para: {style.suitable_for_shapes})")
-    
-except Exception as e:
-    print(f"✗ Error al verificar modelos: {e}")
-    import traceback
-    traceback.print_exc()
-
-# 2. Verificar repositorios
-print("\n2. VERIFICANDO REPOSITORIOS:")
-try:
-    from apps.recomendations.adapters.persistence.repositories import (
-        DjangoStyleRepository
-    )
-    from apps.recomendations.core.entities import Gender, HairLength
-    
-    repo = DjangoStyleRepository()
-    
-    # Probar obtener cortes
-    haircuts = repo.get_haircuts(
-        gender=Gender.HOMBRE,
-        hair_length=HairLength.MEDIO
-    )
-    print(f"✓ Repositorio funciona: {len(haircuts)} cortes para hombre/medio")
-    
-    if len(haircuts) > 0:
-        print(f"  Primer corte: {haircuts[0].name}")
-    
-except Exception as e:
-    print(f"✗ Error en repositorio: {e}")
-    import traceback
-    traceback.print_exc()
-
-# 3. Verificar motor de recomendaciones
-print("\n3. VERIFICANDO MOTOR DE RECOMENDACIONES:")
-try:
-    from apps.recomendations.adapters.ml.recommendation_engine import (
-        RuleBasedRecommendationEngine,
-        StyleCatalogServiceImpl
-    )
-    from apps.recomendations.core.entities import FaceShape
-    
-    engine = RuleBasedRecommendationEngine()
-    catalog = StyleCatalogServiceImpl(repo)
-    
-    # Probar obtener tips
-    tips = engine.get_face_shape_tips(FaceShape.OVAL)
-    print(f"✓ Motor funciona: {len(tips)} tips para rostro oval")
-    print(f"  Tip 1: {tips[0] if tips else 'N/A'}")
-    
-except Exception as e:
-    print(f"✗ Error en motor: {e}")
-    import traceback
-    traceback.print_exc()
-
-# 4. Verificar casos de uso
-print("\n4. VERIFICANDO CASOS DE USO:")
-try:
-    from apps.recomendations.core.use_cases import (
-        GenerateHaircutRecommendationsUseCase
-    )
-    
-    use_case = GenerateHaircutRecommendationsUseCase(engine, catalog)
-    recommendations = use_case.execute(
-        face_shape=FaceShape.OVAL,
-        gender=Gender.HOMBRE,
-        hair_length=HairLength.MEDIO,
-        max_results=3
-    )
-    
-    print(f"✓ Caso de uso funciona: {len(recommendations)} recomendaciones")
-    for i, rec in enumerate(recommendations, 1):
-        print(f"  {i}. {rec.name}")
-    
-except Exception as e:
-    print(f"✗ Error en caso de uso: {e}")
-    import traceback
-    traceback.print_exc()
-
-# 5. Probar mapeo de formas
-print("\n5. VERIFICANDO MAPEO DE FORMAS DE ROSTRO:")
-try:
-    from apps.facial_analysis.adapters.web.views import FACE_SHAPE_MAPPING
-    
-    test_shapes = ['oval', 'ovalado', 'redondo', 'cuadrado', 'corazón']
-    for shape_str in test_shapes:
-        mapped = FACE_SHAPE_MAPPING.get(shape_str.lower())
-        if mapped:
-            print(f"✓ '{shape_str}' → {mapped.value}")
-        else:
-            print(f"✗ '{shape_str}' → NO MAPEADO")
-    
-except Exception as e:
-    print(f"✗ Error verificando mapeo: {e}")
-
-# 6. Test completo de generación
-print("\n6. TEST COMPLETO DE GENERACIÓN:")
-try:
-    from apps.facial_analysis.adapters.web.views import generate_style_recommendations
-    
-    test_result = generate_style_recommendations(
-        face_shape_str='oval',
-        gender_str='hombre',
-        hair_length_str='medio',
-        user_id=1
-    )
-    
-    if test_result:
-        print(f"✓ Generación exitosa!")
-        print(f"  Cortes: {len(test_result['cortes'])}")
-        print(f"  Barbas: {len(test_result['barba']) if test_result['barba'] else 0}")
-        print(f"  Tips: {len(test_result['tips'])}")
-        print(f"  Confidence: {test_result['confidence']:.1f}%")
-        
-        if test_result['cortes']:
-            print(f"\n  Top 3 cortes recomendados:")
-            for i, corte in enumerate(test_result['cortes'][:3], 1):
-                print(f"    {i}. {corte['nombre']}")
-    else:
-        print("✗ La generación retornó None")
-    
-except Exception as e:
-    print(f"✗ Error en generación completa: {e}")
-    import traceback
-    traceback.print_exc()
-
-print("\n" + "=" * 60)
-print("DIAGNÓSTICO COMPLETADO")
-print("=" * 60)
\ No newline at end of file
+import os
+import tempfile
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from sklearn.ensemble import RandomForestClassifier
+
+from apps.facial_analysis import warmup
+from apps.facial_analysis.adapters.web.views import EARLY_STOP_CONFIDENCE, MIN_FRAMES, VideoCamera
+from apps.facial_analysis.ml.cascade import FaceShapeCascade
+from apps.facial_analysis.ml.distilled_classifier import DistilledFaceShapeClassifier
+from apps.facial_analysis.ml.face_shape_classifier import (
+    MEASUREMENT_DTYPE,
+    FaceShapeClassifier,
+    measurements_to_array
+)
+
+
+def synthetic_faces(classes, per_class, seed=0):
+    """Características (N, 11) agrupadas por clase, con solape entre clases"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(scale=2.0, size=(len(classes), 11))
+    y = np.repeat(classes, per_class)
+    X = centers[np.repeat(np.arange(len(classes)), per_class)] + rng.normal(size=(len(y), 11))
+    return X, y
+
+
+class DistilledClassifierBatchTest(SimpleTestCase):
+    """predict_batch (vectorizado) da lo mismo que predict rostro a rostro"""
+
+    CLASSES = ['Corazón', 'Diamante', 'Ovalado', 'Redondo', 'Triangular']
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp = tempfile.TemporaryDirectory()
+
+        # Clases con solape: el estudiante no siempre es confiable
+        X, y = synthetic_faces(cls.CLASSES, 60)
+        cls.X_train, cls.X_test = X[::2], X[1::2]
+
+        cls.teacher = FaceShapeClassifier(model_path=os.path.join(cls.tmp.name, 'model.pkl'))
+        X_scaled = cls.teacher.scaler.fit_transform(cls.X_train)
+        cls.teacher.model = RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0)
+        cls.teacher.model.fit(X_scaled, y[::2])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+        super().tearDownClass()
+
+    def _distilled(self, student_type):
+        distilled = DistilledFaceShapeClassifier(
+            teacher=self.teacher, student_path=os.path.join(self.tmp.name, f'{student_type}.pkl')
+        )
+        distilled.distill(self.X_train, student_type=student_type, threshold=0.0)
+        return distilled
+
+    def _assert_batch_matches_scalar(self, distilled):
+        batch = distilled.predict_batch(self.X_test)
+        self.assertEqual(len(batch), len(self.X_test))
+        for row, (label, confidence) in zip(self.X_test, batch):
+            scalar_label, scalar_confidence = distilled.predict(row)
+            self.assertEqual(label, scalar_label)
+            self.assertAlmostEqual(confidence, scalar_confidence, places=9)
+
+            probabilities = distilled.predict_proba(row)
+            self.assertEqual(max(probabilities, key=probabilities.get), label)
+
+    def test_batch_equals_scalar_on_both_paths(self):
+        for student_type in DistilledFaceShapeClassifier.STUDENT_TYPES:
+            with self.subTest(student_type=student_type):
+                distilled = self._distilled(student_type)
+                confidences = distilled._student_proba(
+                    self.teacher.scaler.transform(self.X_test)
+                ).max(axis=1)
+
+                # Todo por la vía rápida, todo por el bosque y un umbral que reparte
+                for threshold in (0.0, np.inf, float(np.median(confidences))):
+                    distilled.confidence_threshold = threshold
+                    distilled.reset_stats()
+                    self._assert_batch_matches_scalar(distilled)
+
+                split = distilled.latency_split()
+                self.assertGreater(split['fast_count'], 0)
+                self.assertGreater(split['fallback_count'], 0)
+
+    def test_without_student_uses_teacher(self):
+        distilled = DistilledFaceShapeClassifier(
+            teacher=self.teacher, student_path=os.path.join(self.tmp.name, 'missing.pkl')
+        )
+        self.assertEqual(distilled.predict_batch(self.X_test), self.teacher.predict_batch(self.X_test))
+
+
+class StubClassifier:
+    """Clasificador con probabilidades fijas"""
+
+    model = object()
+
+    def __init__(self, probabilities):
+        self.probabilities = probabilities
+        self.calls = 0
+
+    def extract_features(self, face_region, measurements):
+        return np.zeros(11)
+
+    def predict_proba(self, features):
+        self.calls += 1
+        return self.probabilities
+
+
+class FaceShapeCascadeTest(SimpleTestCase):
+    """Modelo cuando está entrenado; reglas solo como respaldo"""
+
+    FACE_INFO = {
+        'shape_scores': {'Ovalado': 12, 'Redondo': 1},
+        'face_shape': 'Ovalado',
+        'measurements': {},
+    }
+
+    def setUp(self):
+        FaceShapeCascade.reset_stats()
+        self.addCleanup(FaceShapeCascade.reset_stats)
+
+    def test_model_decides_even_with_wide_rule_margin(self):
+        classifier = StubClassifier({'Redondo': 0.7, 'Ovalado': 0.3})
+        label, confidence, _ = FaceShapeCascade(classifier=classifier).classify(None, self.FACE_INFO)
+        self.assertEqual((label, confidence), ('Redonda', 0.7))
+        self.assertEqual(classifier.calls, 1)
+
+    def test_rules_are_fallback_without_model(self):
+        classifier = StubClassifier({})
+        classifier.model = None
+        label, confidence, probabilities = FaceShapeCascade(classifier=classifier).classify(None, self.FACE_INFO)
+        self.assertEqual(label, 'Ovalada')
+        self.assertEqual(classifier.calls, 0)
+        self.assertAlmostEqual(sum(probabilities.values()), 1.0)
+        self.assertEqual(confidence, max(probabilities.values()))
+
+    def test_path_counters_outlive_instances(self):
+        FaceShapeCascade(classifier=StubClassifier({'Redondo': 1.0})).classify(None, self.FACE_INFO)
+        FaceShapeCascade().classify(None, self.FACE_INFO)
+        FaceShapeCascade().classify(None, self.FACE_INFO)
+        self.assertEqual(FaceShapeCascade().stats, {'rules': 2, 'model': 1})
+        self.assertEqual(FaceShapeCascade().path_rates(), {'rules': 2 / 3, 'model': 1 / 3})
+
+    def test_trusted_rule_margin(self):
+        def record(margin, rules_ok, model_ok):
+            return {
+                'scores': {'Ovalada': margin, 'Redonda': 0},
+                'rule_label': 'Ovalada' if rules_ok else 'Redonda',
+                'model_proba': {'Ovalada': 0.9 if model_ok else 0.1, 'Redonda': 0.5},
+                'true_label': 'Ovalada',
+            }
+
+        cascade = FaceShapeCascade()
+        # Reglas fiables solo con margen alto
+        records = [record(10, True, True), record(8, True, True), record(2, False, True), record(1, False, True)]
+        self.assertEqual(cascade.trusted_rule_margin(records), 8.0)
+        # Reglas peores que el modelo con cualquier margen
+        records = [record(10, False, True), record(2, True, True)]
+        self.assertEqual(cascade.trusted_rule_margin(records), np.inf)
+
+
+class CalibratedClassifierTest(SimpleTestCase):
+    """train() deja un calibrador y scaled_proba devuelve distribuciones"""
+
+    def test_scaled_proba_rows_sum_to_one(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            classifier = FaceShapeClassifier(model_path=os.path.join(tmp, 'model.pkl'))
+            X, y = synthetic_faces(DistilledClassifierBatchTest.CLASSES, 30)
+            classifier.train(X, y)
+
+        self.assertIsNotNone(classifier.calibrator)
+        probabilities = classifier.scaled_proba(classifier.scaler.transform(X))
+        self.assertEqual(probabilities.shape, (len(X), len(classifier.model.classes_)))
+        np.testing.assert_allclose(probabilities.sum(axis=1), 1.0)
+        self.assertAlmostEqual(sum(classifier.predict_proba(X[0]).values()), 1.0)
+
+
+class FrameAggregationTest(SimpleTestCase):
+    """Promedio de probabilidades por frame y corte temprano por confianza"""
+
+    def setUp(self):
+        # Sin abrir la cámara: solo interesa el historial de predicciones
+        self.camera = VideoCamera.__new__(VideoCamera)
+        self.camera.predictions_history = []
+
+    def _frames(self, *distributions):
+        self.camera.predictions_history = [
+            (max(probabilities, key=probabilities.get), max(probabilities.values()), probabilities)
+            for probabilities in distributions
+        ]
+
+    def test_average_beats_majority_vote(self):
+        # Dos frames votan Redonda por poco; uno muy seguro de Ovalada gana en promedio
+        self._frames(
+            {'Redonda': 0.5, 'Ovalada': 0.4, 'Corazón': 0.1},
+            {'Redonda': 0.5, 'Ovalada': 0.4, 'Corazón': 0.1},
+            {'Redonda': 0.0, 'Ovalada': 1.0, 'Corazón': 0.0},
+        )
+        results = self.camera.get_aggregated_predictions()
+        self.assertEqual(results[0][0], 'Ovalada')
+        self.assertAlmostEqual(results[0][1], 60.0)
+        self.assertAlmostEqual(sum(score for _, score in results), 100.0)
+
+    def test_early_stop_needs_min_frames_and_confidence(self):
+        confident = {'Redonda': EARLY_STOP_CONFIDENCE + 0.1, 'Ovalada': 0.9 - EARLY_STOP_CONFIDENCE}
+        self._frames(*[confident] * (MIN_FRAMES - 1))
+        self.assertFalse(self.camera.is_confident())
+
+        self._frames(*[confident] * MIN_FRAMES)
+        self.assertTrue(self.camera.is_confident())
+
+        spread = {'Redonda': 0.4, 'Ovalada': 0.35, 'Corazón': 0.25}
+        self._frames(*[spread] * MIN_FRAMES)
+        self.assertFalse(self.camera.is_confident())
+
+    def test_no_frames(self):
+        self.assertEqual(self.camera.get_aggregated_predictions(), [('No detectado', 0)])
+        self.assertFalse(self.camera.is_confident())
+
+
+class BatchFeatureExtractionTest(SimpleTestCase):
+    """extract_features_batch coincide con extract_features fila a fila"""
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.classifier = FaceShapeClassifier(model_path=os.path.join(tmp.name, 'model.pkl'))
+        self.regions = [
+            rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+            for height, width in ((40, 32), (64, 64), (25, 50), (80, 60))
+        ]
+        names = MEASUREMENT_DTYPE.names
+        self.measurements = [
+            dict(zip(names, rng.uniform(0.5, 200, len(names)).tolist())) for _ in self.regions
+        ]
+        # Anchos por debajo de 1: rama del max(..., 1)
+        self.measurements[2].update(width=0.0, forehead_width=0.2, middle_width=0.4, jaw_width=0.1)
+
+    def test_batch_equals_row_by_row(self):
+        expected = np.array([
+            self.classifier.extract_features(region, measurements)
+            for region, measurements in zip(self.regions, self.measurements)
+        ])
+        batch = self.classifier.extract_features_batch(self.regions, self.measurements)
+        self.assertEqual(batch.shape, (len(self.regions), 11))
+        np.testing.assert_allclose(batch, expected, rtol=1e-6, atol=1e-7)
+
+        structured = self.classifier.extract_features_batch(self.regions, measurements_to_array(self.measurements))
+        np.testing.assert_array_equal(structured, batch)
+
+    def test_empty_batch(self):
+        self.assertEqual(self.classifier.extract_features_batch([], []).shape, (0, 11))
+
+
+class SyncThread:
+    """Ejecuta el calentamiento en el hilo del test"""
+
+    def __init__(self, target, **kwargs):
+        self.target = target
+
+    def start(self):
+        self.target()
+
+
+@mock.patch.object(warmup.threading, 'Thread', SyncThread)
+class ReadinessProbeTest(SimpleTestCase):
+    """La sonda no se queda en 503 con el calentamiento desactivado o fallido"""
+
+    def setUp(self):
+        saved = dict(warmup._state)
+        warmup._state.update(
+            ready=False, warming_up=False, error=None, duration_ms=None, attempts=0, failed_at=None
+        )
+        self.addCleanup(warmup._state.update, saved)
+
+    def _probe(self):
+        return self.client.get(reverse('analysis:ready'))
+
+    @override_settings(FACIAL_ANALYSIS_WARMUP=False)
+    def test_disabled_warm_up_is_ready(self):
+        with mock.patch.object(warmup, 'warm_up') as warm_up:
+            response = self._probe()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'disabled')
+        warm_up.assert_not_called()
+
+    def test_probe_starts_pending_warm_up(self):
+        with mock.patch.object(warmup, 'warm_up', side_effect=lambda: warmup._state.update(
+            ready=True, warming_up=False
+        )) as warm_up:
+            response = self._probe()
+        warm_up.assert_called_once()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'ready')
+
+    @override_settings(FACIAL_ANALYSIS_WARMUP_RETRY_SECONDS=3600)
+    def test_failure_waits_for_retry_interval(self):
+        with mock.patch.object(warmup, 'get_detector', side_effect=RuntimeError('sin cascadas')):
+            self.assertFalse(warmup.warm_up())
+            response = self._probe()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['error'], 'sin cascadas')
+        self.assertEqual(warmup._state['attempts'], 1)
+
+    @override_settings(FACIAL_ANALYSIS_WARMUP_RETRY_SECONDS=0)
+    def test_probe_retries_after_failure(self):
+        with mock.patch.object(warmup, 'get_detector', side_effect=RuntimeError('sin cascadas')):
+            self.assertFalse(warmup.warm_up())
+
+        with mock.patch.object(warmup, 'get_detector'), \
+                mock.patch.object(warmup, 'get_classifier', return_value=None):
+            response = self._probe()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'ready')
+        self.assertEqual(warmup._state['attempts'], 2)
+
+    @override_settings(FACIAL_ANALYSIS_WARMUP_RETRY_SECONDS=0, FACIAL_ANALYSIS_WARMUP_ATTEMPTS=2)
+    def test_exhausted_retries_serve_degraded(self):
+        with mock.patch.object(warmup, 'get_detector', side_effect=RuntimeError('sin cascadas')):
+            self.assertFalse(warmup.warm_up())
+            response = self._probe()
+            self.assertEqual(warmup._state['attempts'], 2)
+            response = self._probe()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'degraded')
+        self.assertEqual(warmup._state['attempts'], 2)
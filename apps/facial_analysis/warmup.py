@@ -0,0 +1,170 @@
+# apps/facial_analysis/warmup.py
+"""
+Instancias compartidas del detector y el clasificador, y calentamiento al
+iniciar el proceso (lectura de cascadas XML, carga de modelos y primera
+inferencia de OpenCV/sklearn).
+
+La sonda de readiness nunca queda en 503 para siempre:
+
+- con settings.FACIAL_ANALYSIS_WARMUP = False no hay calentamiento y el
+  proceso está listo desde el inicio (los modelos se cargan en la primera
+  petición)
+- si el calentamiento no empezó (p. ej. un servidor distinto de runserver)
+  la sonda lo lanza
+- si falla, la sonda lo reintenta cada FACIAL_ANALYSIS_WARMUP_RETRY_SECONDS;
+  tras FACIAL_ANALYSIS_WARMUP_ATTEMPTS fallos se sirve en modo degradado
+  (carga perezosa y respaldo por reglas), informando del error
+"""
+import os
+import threading
+import time
+import traceback
+import cv2
+import numpy as np
+
+from django.conf import settings
+
+from apps.facial_analysis.face_shape_detection import FaceShapeDetector
+from apps.facial_analysis.ml.face_shape_classifier import FaceShapeClassifier
+from apps.facial_analysis.ml.distilled_classifier import DistilledFaceShapeClassifier, DEFAULT_STUDENT_PATH
+
+_lock = threading.Lock()
+_detector = None
+_classifier = None
+_classifier_loaded = False
+
+RETRY_SECONDS = 30
+MAX_ATTEMPTS = 3
+
+_state = {
+    'ready': False,
+    'warming_up': False,
+    'error': None,
+    'duration_ms': None,
+    'attempts': 0,
+    'failed_at': None,
+}
+
+
+def get_detector():
+    """Detector de rostros compartido por todas las peticiones"""
+    global _detector
+    if _detector is None:
+        with _lock:
+            if _detector is None:
+                _detector = FaceShapeDetector()
+    return _detector
+
+
+def get_classifier():
+    """Clasificador compartido (destilado si hay estudiante); None si falla"""
+    global _classifier, _classifier_loaded
+    if not _classifier_loaded:
+        with _lock:
+            if not _classifier_loaded:
+                try:
+                    classifier = FaceShapeClassifier()
+                    # Usar el modelo destilado como vía rápida si fue entrenado
+                    if classifier.model is not None and os.path.exists(DEFAULT_STUDENT_PATH):
+                        classifier = DistilledFaceShapeClassifier(teacher=classifier)
+                    _classifier = classifier
+                except Exception as e:
+                    print(f"Error initializing classifier: {e}")
+                    _classifier = None
+                _classifier_loaded = True
+    return _classifier
+
+
+def _synthetic_face():
+    """Imagen sintética con un óvalo claro sobre fondo oscuro"""
+    image = np.full((240, 320, 3), 40, dtype=np.uint8)
+    cv2.ellipse(image, (160, 120), (60, 80), 0, 0, 360, (170, 190, 210), -1)
+    return image
+
+
+def warm_up():
+    """
+    Carga detector y clasificador y ejecuta una inferencia sintética completa
+
+    Returns:
+        True si el calentamiento terminó sin errores
+    """
+    _state.update(warming_up=True, error=None)
+    _state['attempts'] += 1
+    start = time.perf_counter()
+
+    try:
+        detector = get_detector()
+        classifier = get_classifier()
+
+        image = _synthetic_face()
+        detector.detect_face_shape(image.copy())
+
+        if classifier is not None and classifier.model is not None:
+            # Medidas sintéticas: basta con recorrer extracción y predicción
+            x, y, w, h = 100, 40, 120, 160
+            face_region = image[y:y + h, x:x + w]
+            measurements = detector.calculate_face_measurements(x, y, w, h, face_region)
+            features = classifier.extract_features(face_region, measurements)
+            classifier.predict_proba(features)
+
+        _state.update(ready=True, failed_at=None, duration_ms=(time.perf_counter() - start) * 1000)
+        print(f"✓ Análisis facial listo ({_state['duration_ms']:.0f} ms de calentamiento)")
+    except Exception as e:
+        traceback.print_exc()
+        _state.update(ready=False, error=str(e), failed_at=time.monotonic())
+        print(f"✗ Error en el calentamiento del análisis facial: {e}")
+    finally:
+        _state['warming_up'] = False
+
+    return _state['ready']
+
+
+def warm_up_enabled():
+    return getattr(settings, 'FACIAL_ANALYSIS_WARMUP', True)
+
+
+def _max_attempts():
+    return getattr(settings, 'FACIAL_ANALYSIS_WARMUP_ATTEMPTS', MAX_ATTEMPTS)
+
+
+def _should_start():
+    """Sin empezar, o último intento fallido hace más del intervalo de reintento"""
+    if _state['ready'] or _state['warming_up'] or _state['attempts'] >= _max_attempts():
+        return False
+    if _state['failed_at'] is None:
+        return True
+    retry = getattr(settings, 'FACIAL_ANALYSIS_WARMUP_RETRY_SECONDS', RETRY_SECONDS)
+    return time.monotonic() - _state['failed_at'] >= retry
+
+
+def start_warm_up():
+    """Lanza el calentamiento en segundo plano (o lo reintenta tras un fallo)"""
+    with _lock:
+        if not _should_start():
+            return
+        _state['warming_up'] = True
+
+    threading.Thread(target=warm_up, name='facial-analysis-warmup', daemon=True).start()
+
+
+def readiness():
+    """
+    Estado para la sonda de readiness (lanza o reintenta el calentamiento)
+
+    Returns:
+        copia del estado con 'status' (ready, disabled, degraded o
+        warming_up) y 'serving' (si el proceso debe recibir tráfico)
+    """
+    if not warm_up_enabled():
+        return {**_state, 'status': 'disabled', 'serving': True}
+
+    start_warm_up()
+    state = dict(_state)
+    if state['ready']:
+        status = 'ready'
+    elif state['attempts'] >= _max_attempts() and not state['warming_up']:
+        status = 'degraded'
+    else:
+        status = 'warming_up'
+    return {**state, 'status': status, 'serving': status != 'warming_up'}
@@ -0,0 +1,137 @@
+"""
+Archivo frío del historial de análisis.
+
+Las filas más antiguas que el horizonte de retención conservan en la tabla
+solo su resumen (forma, confianza, fecha, feedback...) y sus payloads JSON se
+mueven a un fichero NDJSON comprimido con gzip por mes de creación:
+
+    HISTORY_ARCHIVE_ROOT/AAAA/MM.ndjson.gz
+
+Los payloads contienen datos personales: el directorio (por defecto
+BASE_DIR/var/history_archive) no puede estar dentro de MEDIA_ROOT, que se
+sirve públicamente.
+
+Cada ejecución añade un miembro gzip al fichero del mes (gzip lee los
+miembros concatenados como un único flujo). Si una fila se archivó dos veces
+(p. ej. un fallo entre escribir el fichero y marcar la fila) vale la última
+línea.
+"""
+
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from ...core.payloads import decode_payload
+from .models import AnalysisHistoryModel
+
+
+def archive_root() -> str:
+    return getattr(settings, 'HISTORY_ARCHIVE_ROOT', os.path.join(settings.BASE_DIR, 'var', 'history_archive'))
+
+
+def check_archive_root(root: str) -> str:
+    """Ruta absoluta del archivo; ImproperlyConfigured si queda bajo MEDIA_ROOT"""
+    root = os.path.realpath(root)
+    media_root = getattr(settings, 'MEDIA_ROOT', '')
+    if media_root:
+        media_root = os.path.realpath(media_root)
+        if os.path.commonpath([root, media_root]) == media_root:
+            raise ImproperlyConfigured(
+                f'HISTORY_ARCHIVE_ROOT ({root}) no puede estar dentro de MEDIA_ROOT ({media_root})'
+            )
+    return root
+
+
+class HistoryArchive:
+    """Ficheros NDJSON.gz mensuales con los payloads de las filas archivadas"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = check_archive_root(root or archive_root())
+
+    def path_for(self, created_at: datetime) -> str:
+        month = timezone.localtime(created_at) if timezone.is_aware(created_at) else created_at
+        return os.path.join(self.root, f'{month:%Y}', f'{month:%m}.ndjson.gz')
+
+    def write(self, models: Iterable[AnalysisHistoryModel]) -> Dict[str, int]:
+        """
+        Añade los payloads de `models` al fichero de su mes
+
+        Returns:
+            {ruta: filas escritas}
+        """
+        by_path = defaultdict(list)
+        for model in models:
+            by_path[self.path_for(model.created_at)].append({
+                'id': model.id,
+                'public_id': model.public_id,
+                'user_id': model.user_id,
+                'created_at': model.created_at,
+                'analysis_data': decode_payload(model.analysis_data),
+                'recommendations_data': decode_payload(model.recommendations_data),
+            })
+
+        for path, rows in by_path.items():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            lines = ''.join(
+                json.dumps(row, cls=DjangoJSONEncoder, separators=(',', ':')) + '\n' for row in rows
+            )
+            with open(path, 'ab') as raw_file:
+                with gzip.GzipFile(fileobj=raw_file, mode='ab') as archive_file:
+                    archive_file.write(lines.encode('utf-8'))
+                # En disco antes de vaciar las filas en la BD
+                raw_file.flush()
+                os.fsync(raw_file.fileno())
+        return {path: len(rows) for path, rows in by_path.items()}
+
+    def read(self, history_id: int, created_at: datetime) -> Optional[Dict]:
+        """Payloads archivados de una fila (None si no está en su fichero)"""
+        path = self.path_for(created_at)
+        if not os.path.exists(path):
+            return None
+        found = None
+        with gzip.open(path, 'rt', encoding='utf-8') as archive_file:
+            for line in archive_file:
+                # Descarta sin parsear las líneas de otros registros
+                if f'"id":{history_id},' not in line:
+                    continue
+                row = json.loads(line)
+                if row['id'] == history_id:
+                    found = row
+        return found
+
+
+def archive_history(cutoff: datetime, batch_size: int = 500, archive: Optional[HistoryArchive] = None,
+                    dry_run: bool = False) -> int:
+    """
+    Archiva las filas creadas antes de `cutoff`: escribe sus payloads en el
+    archivo mensual y deja en la tabla la fila sin payloads
+
+    Returns:
+        Número de filas archivadas (o que se archivarían con dry_run)
+    """
+    archive = archive or HistoryArchive()
+    pending = AnalysisHistoryModel.objects.filter(created_at__lt=cutoff, archived_at__isnull=True)
+    if dry_run:
+        return pending.count()
+
+    archived = 0
+    while True:
+        batch = list(pending.order_by('id')[:batch_size])
+        if not batch:
+            return archived
+        # Primero el fichero: si falla, las filas siguen calientes
+        archive.write(batch)
+        with transaction.atomic():
+            AnalysisHistoryModel.objects.filter(
+                id__in=[model.id for model in batch], archived_at__isnull=True
+            ).update(analysis_data=None, recommendations_data=None, archived_at=timezone.now())
+        archived += len(batch)
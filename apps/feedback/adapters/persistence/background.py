@@ -0,0 +1,183 @@
+"""
+Persistencia en segundo plano de los análisis.
+
+La vista de resultados no espera a codificar la imagen, subirla al storage ni
+insertar el historial: construye un AnalysisRecord inmutable (con su ID
+público ya asignado), lo entrega al worker y responde enseguida. El worker
+usa un pool de hilos del propio proceso; en modo eager (tests, o
+ANALYSIS_PERSISTENCE_EAGER = True) el trabajo se hace en el mismo hilo.
+
+Mientras un análisis está en cola su ID público queda marcado en la caché
+(compartida entre workers si el backend lo es): el feedback sobre un ID aún
+no guardado distingue así "todavía guardándose" de "no existe".
+"""
+
+import atexit
+import copy
+import threading
+import traceback
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from django.utils import timezone
+
+from apps.feedback.core.entities import AnalysisHistory
+
+DEFAULT_WORKERS = 2
+# Segundos que un ID sigue marcado como pendiente si el proceso muere sin guardarlo
+PENDING_TIMEOUT = 300
+
+
+def _pending_key(public_id) -> str:
+    return f'analysis_pending:{public_id}'
+
+
+@dataclass(frozen=True)
+class AnalysisRecord:
+    """Instantánea inmutable de un análisis pendiente de guardar"""
+    public_id: uuid.UUID
+    user_id: str
+    face_shape: str
+    confidence: float
+    recommendations_count: int
+    analysis_data: Dict[str, Any] = field(default_factory=dict)
+    recommendations_data: Dict[str, Any] = field(default_factory=dict)
+    created_at: datetime = field(default_factory=timezone.now)
+    frame: Optional[np.ndarray] = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def create(cls, user_id, face_shape, confidence, analysis_data, recommendations_data,
+               recommendations_count, frame=None) -> 'AnalysisRecord':
+        """
+        Copia los datos de la petición para que el hilo de fondo no comparta
+        estructuras mutables con la vista (el frame queda de solo lectura)
+        """
+        if frame is not None:
+            frame = np.array(frame, copy=True)
+            frame.setflags(write=False)
+        return cls(
+            public_id=uuid.uuid4(),
+            user_id=str(user_id),
+            face_shape=str(face_shape),
+            confidence=float(confidence),
+            recommendations_count=int(recommendations_count),
+            analysis_data=copy.deepcopy(analysis_data or {}),
+            recommendations_data=copy.deepcopy(recommendations_data or {}),
+            frame=frame,
+        )
+
+
+class AnalysisPersistenceWorker:
+    """Codifica la imagen, la guarda en el storage e inserta el historial"""
+
+    def __init__(self, repository, storage=None, max_workers: int = DEFAULT_WORKERS, eager: bool = False):
+        self.repository = repository
+        self.storage = storage or default_storage
+        self.eager = eager
+        self._executor = None if eager else ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='analysis-persist'
+        )
+
+    @staticmethod
+    def mark_pending(record: AnalysisRecord):
+        """Marca el ID público como en cola (hasta que se guarde o falle)"""
+        cache.set(_pending_key(record.public_id), record.user_id, timeout=PENDING_TIMEOUT)
+
+    @staticmethod
+    def is_pending(public_id, user_id) -> bool:
+        """Si el análisis de ese usuario está en cola y aún no se guardó"""
+        return cache.get(_pending_key(public_id)) == str(user_id)
+
+    def submit(self, record: AnalysisRecord) -> Future:
+        """Encola el guardado; en modo eager se ejecuta antes de volver"""
+        self.mark_pending(record)
+        if self._executor is None:
+            future = Future()
+            try:
+                future.set_result(self._persist(record))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self._executor.submit(self._run, record)
+
+    def _run(self, record: AnalysisRecord) -> Optional[AnalysisHistory]:
+        # Los hilos del pool no pasan por el ciclo de petición de Django
+        close_old_connections()
+        try:
+            return self._persist(record)
+        except Exception as e:
+            print(f"✗ Error al guardar el análisis {record.public_id}: {e}")
+            traceback.print_exc()
+            raise
+        finally:
+            close_old_connections()
+
+    def _persist(self, record: AnalysisRecord) -> AnalysisHistory:
+        try:
+            history = self.repository.save(AnalysisHistory(
+                id=None,
+                user_id=record.user_id,
+                face_shape=record.face_shape,
+                confidence=record.confidence,
+                analysis_data=record.analysis_data,
+                recommendations_data=record.recommendations_data,
+                recommendations_count=record.recommendations_count,
+                image_path=self._store_image(record),
+                public_id=record.public_id,
+            ))
+        finally:
+            cache.delete(_pending_key(record.public_id))
+        print(f"✓ Análisis {record.public_id} guardado en historial (ID {history.id})")
+        return history
+
+    def _store_image(self, record: AnalysisRecord) -> Optional[str]:
+        """Guarda el frame como JPEG; un fallo aquí no impide guardar el historial"""
+        if record.frame is None:
+            return None
+        try:
+            ok, buffer = cv2.imencode('.jpg', record.frame)
+            if not ok:
+                raise ValueError('cv2.imencode no pudo codificar el frame')
+            day = timezone.localtime(record.created_at)
+            return self.storage.save(
+                f"analysis_images/{day:%Y/%m/%d}/analysis_{record.user_id}_{record.public_id.hex}.jpg",
+                ContentFile(buffer.tobytes())
+            )
+        except Exception as e:
+            print(f"⚠ Error al guardar la imagen del análisis {record.public_id}: {e}")
+            return None
+
+    def shutdown(self, wait: bool = True):
+        """Espera a los guardados pendientes (se llama al salir del proceso)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+
+_lock = threading.Lock()
+_worker = None
+
+
+def get_persistence_worker() -> AnalysisPersistenceWorker:
+    """Worker compartido del proceso, configurado desde settings"""
+    global _worker
+    if _worker is None:
+        with _lock:
+            if _worker is None:
+                from .repositories import DjangoAnalysisHistoryRepository
+                _worker = AnalysisPersistenceWorker(
+                    DjangoAnalysisHistoryRepository(),
+                    max_workers=getattr(settings, 'ANALYSIS_PERSISTENCE_WORKERS', DEFAULT_WORKERS),
+                    eager=getattr(settings, 'ANALYSIS_PERSISTENCE_EAGER', False),
+                )
+                atexit.register(_worker.shutdown)
+    return _worker
@@ -3,6 +3,8 @@ Modelos Django para el módulo de Feedback.
 Representan las tablas en la base de datos.
 """
 
+import uuid
+
 from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -63,6 +65,9 @@ class FeedbackModel(models.Model):
         indexes = [
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['analysis_history']),
+            # Filtro por rating mínimo (EXISTS) y último rating del análisis
+            models.Index(fields=['analysis_history', 'rating'], name='feedback_history_rating_idx'),
+            models.Index(fields=['analysis_history', '-created_at'], name='feedback_history_latest_idx'),
         ]
     
     def __str__(self):
@@ -80,6 +85,14 @@ class AnalysisHistoryModel(models.Model):
     """
     Modelo Django para almacenar el historial de análisis faciales.
     """
+    # Identificador público: se asigna antes de guardar (la página de
+    # resultados lo muestra mientras el registro se persiste en segundo plano)
+    public_id = models.UUIDField(
+        default=uuid.uuid4,
+        unique=True,
+        editable=False,
+        verbose_name='ID público'
+    )
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -135,6 +148,14 @@ class AnalysisHistoryModel(models.Model):
         auto_now_add=True,
         verbose_name='Fecha de análisis'
     )
+    # Fila "fría": los payloads JSON se movieron al archivo mensual
+    # (comando archive_history) y aquí queda solo el resumen
+    archived_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Archivado el'
+    )
 
     class Meta:
         db_table = 'feedback_analysishistorymodel'
@@ -144,6 +165,14 @@ class AnalysisHistoryModel(models.Model):
         indexes = [
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['face_shape']),
+            # Filtro por forma de rostro + rango de fechas del historial
+            models.Index(fields=['user', 'face_shape', '-created_at'], name='history_user_shape_date_idx'),
+            # Candidatas a archivar (filas calientes más antiguas)
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(archived_at__isnull=True),
+                name='history_hot_created_idx'
+            ),
         ]
     def __str__(self):
         created_display = self.created_at.strftime('%Y-%m-%d %H:%M')
@@ -156,10 +185,53 @@ class AnalysisHistoryModel(models.Model):
     @property
     def feedback_rating(self):
         """Retorna el rating del feedback asociado si existe"""
+        # Los listados del repositorio lo anotan con una subconsulta
+        if 'latest_feedback_rating' in self.__dict__:
+            return self.latest_feedback_rating
         feedback = self.feedbacks.first()
         return feedback.rating if feedback else None
     
     @property
     def has_feedback(self):
         """Verifica si tiene feedback asociado"""
-        return self.feedbacks.exists()
\ No newline at end of file
+        return self.feedbacks.exists()
+
+class UserHistorySummaryModel(models.Model):
+    """
+    Resumen precalculado del historial de un usuario.
+
+    Se recalcula (una consulta agregada + una agrupación por mes) cada vez
+    que el usuario guarda un análisis o un feedback, así las páginas de
+    historial y estadísticas leen una sola fila.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='history_summary',
+        verbose_name='Usuario'
+    )
+    total_analyses = models.PositiveIntegerField(default=0, verbose_name='Total de análisis')
+    total_feedbacks = models.PositiveIntegerField(default=0, verbose_name='Total de feedbacks')
+    average_rating = models.FloatField(default=0.0, verbose_name='Calificación promedio')
+    most_common_shape = models.CharField(
+        max_length=50,
+        blank=True,
+        default='',
+        verbose_name='Forma más detectada'
+    )
+    monthly_counts = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Análisis por mes',
+        help_text='{"YYYY-MM": cantidad}'
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Última actualización')
+
+    class Meta:
+        db_table = 'feedback_user_history_summary'
+        verbose_name = 'Resumen de Historial'
+        verbose_name_plural = 'Resúmenes de Historial'
+
+    def __str__(self):
+        return f"Resumen de {self.user_id}: {self.total_analyses} análisis"
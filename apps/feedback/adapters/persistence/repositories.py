@@ -4,14 +4,24 @@ Implementación de los repositorios usando Django ORM.
 from typing import List, Optional, Union
 import uuid
 
-from datetime import datetime
+from datetime import datetime, time, timedelta
+from urllib.parse import urlencode
 
-from ...core.entities import Feedback, AnalysisHistory
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Exists, OuterRef, Subquery
+from django.utils import timezone
+
+from apps.shared.utils.pagination import KeysetPage, cached_count, keyset_paginate
+from ...core.entities import Feedback, AnalysisHistory, HistoryFilter
+from ...core.payloads import compact_analysis_data, decode_payload
 from ...ports.repositories import (
     FeedbackRepositoryInterface,
     AnalysisHistoryRepositoryInterface
 )
+from .archive import HistoryArchive
 from .models import FeedbackModel, AnalysisHistoryModel
+from .statistics import HistoryStatisticsService
 
 
 class DjangoFeedbackRepository(FeedbackRepositoryInterface):
@@ -90,8 +100,87 @@ class DjangoAnalysisHistoryRepository(AnalysisHistoryRepositoryInterface):
     Repositorio de Historial de Análisis usando Django ORM.
     """
     
+    # Ordenación de las páginas: usa el índice (user, -created_at)
+    PAGE_ORDERING = ('-created_at', '-id')
+    
+    @staticmethod
+    def _version_cache_key(user_id) -> str:
+        return f'analysis_history_version:{user_id}'
+    
+    @classmethod
+    def invalidate_counts(cls, *user_ids) -> None:
+        """Descarta los totales cacheados de los usuarios (nueva versión)"""
+        for user_id in user_ids:
+            try:
+                cache.incr(cls._version_cache_key(user_id))
+            except ValueError:
+                cache.set(cls._version_cache_key(user_id), 1, None)
+    
+    def _count_cache_key(self, user_id, filters: Optional[HistoryFilter] = None) -> str:
+        """
+        Clave del total cacheado de un usuario y filtro. Incluye una versión
+        por usuario que las señales de apps/feedback/signals.py incrementan al
+        guardar o eliminar un análisis o un feedback sobre sus análisis
+        """
+        version = cache.get(self._version_cache_key(user_id), 0)
+        params = urlencode(sorted(filters.to_params().items())) if filters else ''
+        return f'analysis_history_count:{user_id}:{version}:{params}'
+    
+    @staticmethod
+    def _apply_filters(queryset, filters: Optional[HistoryFilter]):
+        """
+        Combina todos los criterios en una sola consulta. Con el usuario
+        fijado, los índices (user, face_shape, -created_at) y
+        (user, -created_at) cubren forma y rango de fechas; el rating es un
+        EXISTS sobre (analysis_history, rating)
+        """
+        if not filters:
+            return queryset
+        if filters.face_shape:
+            queryset = queryset.filter(face_shape=filters.face_shape)
+        if filters.date_from:
+            queryset = queryset.filter(
+                created_at__gte=timezone.make_aware(datetime.combine(filters.date_from, time.min))
+            )
+        if filters.date_to:
+            # Día final incluido: hasta la medianoche siguiente
+            queryset = queryset.filter(
+                created_at__lt=timezone.make_aware(datetime.combine(filters.date_to + timedelta(days=1), time.min))
+            )
+        if filters.min_rating:
+            queryset = queryset.filter(Exists(FeedbackModel.objects.filter(
+                analysis_history=OuterRef('pk'),
+                rating__gte=filters.min_rating
+            )))
+        return queryset
+    
+    # Columnas JSON grandes: solo se leen en el detalle
+    PAYLOAD_FIELDS = ('analysis_data', 'recommendations_data')
+    
+    @classmethod
+    def _queryset(cls, with_payload: bool = False):
+        """
+        Historial con el rating del último feedback anotado en la misma
+        consulta (evita una consulta extra por fila al convertir a entidad).
+        Los listados difieren (defer) los payloads JSON
+        """
+        latest_rating = (
+            FeedbackModel.objects
+            .filter(analysis_history=OuterRef('pk'))
+            .order_by('-created_at', '-id')
+            .values('rating')[:1]
+        )
+        queryset = AnalysisHistoryModel.objects.annotate(latest_feedback_rating=Subquery(latest_rating))
+        return queryset if with_payload else queryset.defer(*cls.PAYLOAD_FIELDS)
+    
     def _to_entity(self, model: AnalysisHistoryModel) -> AnalysisHistory:
-        """Convierte modelo Django a entidad de dominio"""
+        """Convierte modelo Django a entidad de dominio (sin payload si está diferido)"""
+        deferred = model.get_deferred_fields()
+        if model.archived_at and not deferred & set(self.PAYLOAD_FIELDS):
+            # Fila fría: los payloads están en el archivo mensual
+            archived = HistoryArchive().read(model.id, model.created_at) or {}
+            model.analysis_data = archived.get('analysis_data')
+            model.recommendations_data = archived.get('recommendations_data')
         return AnalysisHistory(
             id=model.id,
             user_id=model.user_id,
@@ -101,8 +190,12 @@ class DjangoAnalysisHistoryRepository(AnalysisHistoryRepositoryInterface):
             pdf_path=model.pdf_path,
             feedback_rating=model.feedback_rating,
             created_at=model.created_at,
-            analysis_data=model.analysis_data,
-            recommendations_data=model.recommendations_data
+            analysis_data=None if 'analysis_data' in deferred else decode_payload(model.analysis_data),
+            recommendations_data=(
+                None if 'recommendations_data' in deferred else decode_payload(model.recommendations_data)
+            ),
+            image_path=model.image_path.name if model.image_path else None,
+            public_id=model.public_id
         )
     
     def save(self, history: AnalysisHistory) -> AnalysisHistory:
@@ -113,9 +206,13 @@ class DjangoAnalysisHistoryRepository(AnalysisHistoryRepositoryInterface):
             confidence=history.confidence,
             recommendations_count=history.recommendations_count,
             pdf_path=history.pdf_path,
-            analysis_data=history.analysis_data,
-            recommendations_data=history.recommendations_data
+            analysis_data=compact_analysis_data(history.analysis_data),
+            recommendations_data=decode_payload(history.recommendations_data),
+            image_path=history.image_path,
+            **({'public_id': history.public_id} if history.public_id else {})
         )
+        # Recién creado: todavía no tiene feedback
+        model.latest_feedback_rating = None
         return self._to_entity(model)
     
     def find_by_user_id(
@@ -125,7 +222,7 @@ class DjangoAnalysisHistoryRepository(AnalysisHistoryRepositoryInterface):
         offset: Optional[int] = None
     ) -> List[AnalysisHistory]:
         """Obtiene el historial de un usuario con paginación"""
-        queryset = AnalysisHistoryModel.objects.filter(user_id=user_id)
+        queryset = self._queryset().filter(user_id=user_id)
         
         if offset:
             queryset = queryset[offset:]
@@ -134,14 +231,45 @@ class DjangoAnalysisHistoryRepository(AnalysisHistoryRepositoryInterface):
         
         return [self._to_entity(m) for m in queryset]
     
+    def find_page_by_user_id(
+        self,
+        user_id: int,
+        cursor: Optional[str] = None,
+        limit: int = 10,
+        filters: Optional[HistoryFilter] = None
+    ) -> KeysetPage:
+        """
+        Página del historial (con todos los filtros combinados) paginada por
+        cursor sobre (created_at, id)
+        
+        Una consulta para la página y, como mucho, otra para el total del
+        conjunto filtrado, que se cachea hasta que el usuario guarda otro análisis
+        """
+        queryset = self._apply_filters(AnalysisHistoryModel.objects.filter(user_id=user_id), filters)
+        page = keyset_paginate(
+            self._apply_filters(self._queryset().filter(user_id=user_id), filters),
+            self.PAGE_ORDERING, cursor, limit
+        )
+        page.object_list = [self._to_entity(m) for m in page.object_list]
+        page.count_estimate = cached_count(queryset, key=self._count_cache_key(user_id, filters))
+        return page
+    
     def find_by_id(self, history_id: int) -> Optional[AnalysisHistory]:
         """Busca un registro específico del historial"""
         try:
-            model = AnalysisHistoryModel.objects.get(id=history_id)
+            model = self._queryset(with_payload=True).get(id=history_id)
             return self._to_entity(model)
         except AnalysisHistoryModel.DoesNotExist:
             return None
     
+    def find_by_public_id(self, public_id: Union[uuid.UUID, str]) -> Optional[AnalysisHistory]:
+        """Busca por el ID público (el provisional que muestra la página de resultados)"""
+        try:
+            model = self._queryset(with_payload=True).filter(public_id=public_id).first()
+        except ValidationError:
+            return None
+        return self._to_entity(model) if model else None
+    
     def filter_by_date_range(
         self,
         user_id: int,
@@ -149,7 +277,7 @@ class DjangoAnalysisHistoryRepository(AnalysisHistoryRepositoryInterface):
         end_date: datetime
     ) -> List[AnalysisHistory]:
         """Filtra historial por rango de fechas"""
-        models = AnalysisHistoryModel.objects.filter(
+        models = self._queryset().filter(
             user_id=user_id,
             created_at__range=[start_date, end_date]
         )
@@ -161,7 +289,7 @@ class DjangoAnalysisHistoryRepository(AnalysisHistoryRepositoryInterface):
         face_shape: str
     ) -> List[AnalysisHistory]:
         """Filtra historial por forma de rostro"""
-        models = AnalysisHistoryModel.objects.filter(
+        models = self._queryset().filter(
             user_id=user_id,
             face_shape=face_shape
         )
@@ -173,43 +301,30 @@ class DjangoAnalysisHistoryRepository(AnalysisHistoryRepositoryInterface):
         min_rating: int
     ) -> List[AnalysisHistory]:
         """Filtra historial por rating mínimo"""
-        models = AnalysisHistoryModel.objects.filter(
-            user_id=user_id,
-            feedbacks__rating__gte=min_rating
+        # EXISTS en lugar de JOIN: un análisis con varios feedbacks no se repite
+        models = self._apply_filters(
+            self._queryset().filter(user_id=user_id),
+            HistoryFilter(min_rating=min_rating)
         )
         return [self._to_entity(m) for m in models]
     
     def count_by_user_id(self, user_id: int) -> int:
-        """Cuenta total de análisis de un usuario"""
-        return AnalysisHistoryModel.objects.filter(user_id=user_id).count()
+        """Cuenta total de análisis de un usuario (cacheada)"""
+        return cached_count(
+            AnalysisHistoryModel.objects.filter(user_id=user_id),
+            key=self._count_cache_key(user_id)
+        )
     
     def get_statistics(self, user_id: int) -> dict:
-        """Obtiene estadísticas del historial de un usuario."""
-        from django.db.models import Count, Avg
-        
-        total_analyses = AnalysisHistoryModel.objects.filter(user_id=user_id).count()
-        
-        # Promedio de calificaciones (usando 'feedbacks' plural)
-        avg_rating = AnalysisHistoryModel.objects.filter(
-            user_id=user_id,
-            feedbacks__isnull=False
-        ).aggregate(
-            avg=Avg('feedbacks__rating')
-        )['avg'] or 0
-        
-        # Forma más detectada
-        most_common_shape = AnalysisHistoryModel.objects.filter(
-            user_id=user_id
-        ).values('face_shape').annotate(
-            count=Count('id')
-        ).order_by('-count').first()
-        
-        # Total de feedbacks dados
-        total_feedbacks = FeedbackModel.objects.filter(user_id=user_id).count()
-        
+        """
+        Obtiene estadísticas del historial de un usuario desde su resumen
+        precalculado (una fila; se recalcula al guardar análisis o feedback)
+        """
+        summary = HistoryStatisticsService().get(user_id)
         return {
-            'total_analyses': total_analyses,
-            'average_rating': round(avg_rating, 1) if avg_rating else 0,
-            'most_common_shape': most_common_shape['face_shape'] if most_common_shape else 'N/A',
-            'total_feedbacks': total_feedbacks
-        }
\ No newline at end of file
+            'total_analyses': summary.total_analyses,
+            'average_rating': summary.average_rating,
+            'most_common_shape': summary.most_common_shape or 'N/A',
+            'total_feedbacks': summary.total_feedbacks,
+            'monthly_counts': summary.monthly_counts,
+        }
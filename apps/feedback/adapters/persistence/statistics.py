@@ -0,0 +1,107 @@
+"""
+Servicio de estadísticas del historial.
+
+Todas las cifras de un usuario salen de una sola consulta (subconsultas
+escalares sobre la fila del usuario) y el desglose mensual se agrupa en la
+base de datos con TruncMonth. El resultado se guarda en
+UserHistorySummaryModel, que se recalcula al guardar análisis o feedback.
+"""
+
+from typing import Dict, Union
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.db.models import Avg, Count, FloatField, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, TruncMonth
+
+from .models import AnalysisHistoryModel, FeedbackModel, UserHistorySummaryModel
+
+
+def _scalar(queryset, user_field, aggregate, output_field):
+    """Subconsulta con un único agregado de `queryset` (correlacionada por usuario)"""
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(user_field).annotate(value=aggregate).values('value')[:1],
+            output_field=output_field
+        ),
+        Value(0, output_field=output_field)
+    )
+
+
+class HistoryStatisticsService:
+    """Cálculo y lectura del resumen de historial por usuario"""
+
+    def compute(self, user_id: Union[uuid.UUID, str]) -> Dict:
+        """
+        Calcula el resumen desde las tablas de detalle
+
+        Returns:
+            Diccionario con total_analyses, average_rating, most_common_shape,
+            total_feedbacks y monthly_counts ({'YYYY-MM': n})
+        """
+        most_common_shape = (
+            AnalysisHistoryModel.objects
+            .filter(user=OuterRef('pk'))
+            .order_by()
+            .values('face_shape')
+            .annotate(shape_count=Count('id'))
+            .order_by('-shape_count', 'face_shape')
+            .values('face_shape')[:1]
+        )
+        row = (
+            get_user_model().objects
+            .filter(pk=user_id)
+            .annotate(
+                total_analyses=_scalar(
+                    AnalysisHistoryModel.objects.filter(user=OuterRef('pk')),
+                    'user', Count('id'), IntegerField()
+                ),
+                # Promedio de los feedbacks recibidos por sus análisis
+                average_rating=_scalar(
+                    FeedbackModel.objects.filter(analysis_history__user=OuterRef('pk')),
+                    'analysis_history__user', Avg('rating'), FloatField()
+                ),
+                total_feedbacks=_scalar(
+                    FeedbackModel.objects.filter(user=OuterRef('pk')),
+                    'user', Count('id'), IntegerField()
+                ),
+                most_common_shape=Subquery(most_common_shape),
+            )
+            .values('total_analyses', 'average_rating', 'total_feedbacks', 'most_common_shape')
+            .first()
+        ) or {'total_analyses': 0, 'average_rating': 0, 'total_feedbacks': 0, 'most_common_shape': None}
+
+        monthly = (
+            AnalysisHistoryModel.objects
+            .filter(user_id=user_id)
+            .annotate(month=TruncMonth('created_at'))
+            .values('month')
+            .annotate(total=Count('id'))
+            .order_by('month')
+        )
+
+        return {
+            'total_analyses': row['total_analyses'],
+            'average_rating': round(row['average_rating'], 1) if row['average_rating'] else 0,
+            'most_common_shape': row['most_common_shape'] or '',
+            'total_feedbacks': row['total_feedbacks'],
+            'monthly_counts': {
+                entry['month'].strftime('%Y-%m'): entry['total']
+                for entry in monthly if entry['month']
+            },
+        }
+
+    def refresh(self, user_id: Union[uuid.UUID, str]) -> UserHistorySummaryModel:
+        """Recalcula y guarda el resumen del usuario"""
+        summary, _ = UserHistorySummaryModel.objects.update_or_create(
+            user_id=user_id,
+            defaults=self.compute(user_id)
+        )
+        return summary
+
+    def get(self, user_id: Union[uuid.UUID, str]) -> UserHistorySummaryModel:
+        """Resumen precalculado (se calcula la primera vez si no existe)"""
+        summary = UserHistorySummaryModel.objects.filter(user_id=user_id).first()
+        if summary is None:
+            summary = self.refresh(user_id)
+        return summary
@@ -13,6 +13,7 @@ urlpatterns = [
     
     # Historial
     path('history/', views.history_list, name='history_list'),
+    path('history/api/', views.history_api, name='history_api'),
     path('history/<int:history_id>/', views.history_detail, name='history_detail'),
     
     # Estadísticas
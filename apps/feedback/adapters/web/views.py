@@ -8,20 +8,25 @@ from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST, require_http_methods
 from django.contrib import messages
-from datetime import datetime, timedelta
-import json
+from django.utils import timezone
+import uuid
+from datetime import timedelta
+from urllib.parse import urlencode
 
+from apps.shared.utils.db_routing import read_from_replica
+
+from ...core.entities import HistoryFilter
 from ...core.use_cases import (
     SaveFeedbackUseCase,
     GetUserHistoryUseCase,
     FilterHistoryUseCase,
     GetHistoryStatisticsUseCase
 )
+from ..persistence.background import get_persistence_worker
 from ..persistence.repositories import (
     DjangoFeedbackRepository,
     DjangoAnalysisHistoryRepository
 )
-from ..persistence.models import AnalysisHistoryModel
 
 
 @login_required
@@ -31,7 +36,7 @@ def submit_feedback(request):
     Vista para guardar el feedback de un análisis.
     
     POST params:
-        - analysis_id: ID del análisis
+        - analysis_id: ID del análisis (o su ID público provisional)
         - rating: Calificación (1-5)
         - liked: True/False (opcional)
         - comment: Comentario (opcional)
@@ -64,6 +69,31 @@ def submit_feedback(request):
                 'error': 'Rating debe estar entre 1 y 5'
             }, status=400)
         
+        # La página de resultados solo conoce el ID público: el historial se
+        # guarda en segundo plano y puede no estar aún en la BD
+        if not analysis_id.isdigit():
+            try:
+                public_id = uuid.UUID(analysis_id)
+            except ValueError:
+                return JsonResponse({
+                    'success': False,
+                    'error': 'ID de análisis inválido'
+                }, status=400)
+
+            history_entry = DjangoAnalysisHistoryRepository().find_by_public_id(public_id)
+            if history_entry is not None and str(history_entry.user_id) == str(request.user.id):
+                analysis_id = history_entry.id
+            elif history_entry is None and get_persistence_worker().is_pending(public_id, request.user.id):
+                return JsonResponse({
+                    'success': False,
+                    'error': 'El análisis todavía se está guardando, inténtalo en unos segundos'
+                }, status=409)
+            else:
+                return JsonResponse({
+                    'success': False,
+                    'error': 'Análisis no encontrado'
+                }, status=404)
+        
         # Ejecutar caso de uso
         feedback_repo = DjangoFeedbackRepository()
         use_case = SaveFeedbackUseCase(feedback_repo)
@@ -95,88 +125,84 @@ def submit_feedback(request):
 
 
 @login_required
+@read_from_replica
 def history_list(request):
     """
     Vista para mostrar el historial de análisis del usuario.
     
     GET params (opcionales):
-        - page: Número de página (default: 1)
+        - cursor: Cursor opaco de la página (sin cursor: la más reciente)
         - face_shape: Filtrar por forma de rostro
         - min_rating: Filtrar por rating mínimo
-        - date_from: Fecha inicial
-        - date_to: Fecha final
+        - date_from: Fecha inicial (YYYY-MM-DD)
+        - date_to: Fecha final, incluida (YYYY-MM-DD)
     """
-    # Obtener parámetros de filtrado
-    page = int(request.GET.get('page', 1))
-    face_shape = request.GET.get('face_shape')
-    min_rating = request.GET.get('min_rating')
-    date_from = request.GET.get('date_from')
-    date_to = request.GET.get('date_to')
-    
-    # Configuración de paginación
+    # Todos los filtros se combinan en una única consulta paginada
+    history_filter = HistoryFilter.from_params(request.GET)
     items_per_page = 10
-    offset = (page - 1) * items_per_page
     
     # Repositorio
     history_repo = DjangoAnalysisHistoryRepository()
     
-    # Aplicar filtros si existen
-    if any([face_shape, min_rating, date_from, date_to]):
-        filter_use_case = FilterHistoryUseCase(history_repo)
-        
-        if date_from and date_to:
-            start_date = datetime.strptime(date_from, '%Y-%m-%d')
-            end_date = datetime.strptime(date_to, '%Y-%m-%d')
-            history_entries = filter_use_case.filter_by_date(
-                request.user.id,
-                start_date,
-                end_date
-            )
-        elif face_shape:
-            history_entries = filter_use_case.filter_by_face_shape(
-                request.user.id,
-                face_shape
-            )
-        elif min_rating:
-            history_entries = filter_use_case.filter_by_rating(
-                request.user.id,
-                int(min_rating)
-            )
-    else:
-        # Sin filtros, obtener historial normal
-        history_use_case = GetUserHistoryUseCase(history_repo)
-        history_entries = history_use_case.execute(
-            request.user.id,
-            limit=items_per_page,
-            offset=offset
-        )
+    filter_use_case = FilterHistoryUseCase(history_repo)
+    page_obj = filter_use_case.page(
+        request.user.id,
+        history_filter,
+        cursor=request.GET.get('cursor'),
+        limit=items_per_page
+    )
     
     # Obtener estadísticas
     stats_use_case = GetHistoryStatisticsUseCase(history_repo)
     statistics = stats_use_case.execute(request.user.id)
     
-    # Calcular paginación
-    total_items = history_repo.count_by_user_id(request.user.id)
-    total_pages = (total_items + items_per_page - 1) // items_per_page
-    
+    filter_params = history_filter.to_params()
     context = {
-        'history_entries': history_entries,
+        'history_entries': page_obj.object_list,
         'statistics': statistics,
-        'current_page': page,
-        'total_pages': total_pages,
-        'has_previous': page > 1,
-        'has_next': page < total_pages,
-        'filters': {
-            'face_shape': face_shape,
-            'min_rating': min_rating,
-            'date_from': date_from,
-            'date_to': date_to,
-        }
+        'page_obj': page_obj,
+        'total_items': page_obj.count_estimate,
+        'filters': filter_params,
+        'filter_query': urlencode(filter_params),
     }
     
     return render(request, 'feedback/history_list.html', context)
 
 
+@login_required
+@read_from_replica
+def history_api(request):
+    """
+    API JSON del historial paginada por cursor.
+    
+    GET params:
+        - cursor: Cursor opaco (next_cursor / previous_cursor de otra respuesta)
+        - limit: Elementos por página (1-50, default: 10)
+        - face_shape, min_rating, date_from, date_to: Filtros combinables
+    """
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+    except ValueError:
+        limit = 10
+    
+    history_filter = HistoryFilter.from_params(request.GET)
+    filter_use_case = FilterHistoryUseCase(DjangoAnalysisHistoryRepository())
+    page_obj = filter_use_case.page(
+        request.user.id,
+        history_filter,
+        cursor=request.GET.get('cursor'),
+        limit=limit
+    )
+    
+    return JsonResponse({
+        'filters': history_filter.to_params(),
+        'results': [entry.to_dict() for entry in page_obj],
+        'next_cursor': page_obj.next_cursor,
+        'previous_cursor': page_obj.previous_cursor,
+        'count_estimate': page_obj.count_estimate,
+    })
+
+
 @login_required
 def history_detail(request, history_id):
     """
@@ -193,9 +219,9 @@ def history_detail(request, history_id):
     if history_entry.user_id != request.user.id:
         return render(request, '403.html', status=403)
     
-    # Parsear los datos JSON
-    analysis_data = json.loads(history_entry.analysis_data) if history_entry.analysis_data else {}
-    recommendations = json.loads(history_entry.recommendations_data) if history_entry.recommendations_data else {}
+    # Los payloads ya llegan como objetos JSON nativos
+    analysis_data = history_entry.analysis_data or {}
+    recommendations = history_entry.recommendations_data or {}
     
     # 🆕 OBTENER EL FEEDBACK ASOCIADO
     feedback_repo = DjangoFeedbackRepository()
@@ -212,6 +238,7 @@ def history_detail(request, history_id):
 
 
 @login_required
+@read_from_replica
 def statistics_view(request):
     """
     Vista para mostrar estadísticas del usuario.
@@ -220,19 +247,13 @@ def statistics_view(request):
     stats_use_case = GetHistoryStatisticsUseCase(history_repo)
     statistics = stats_use_case.execute(request.user.id)
     
-    # Datos adicionales para gráficos
-    # Análisis por mes (últimos 6 meses)
-    six_months_ago = datetime.now() - timedelta(days=180)
-    recent_analyses = AnalysisHistoryModel.objects.filter(
-        user_id=request.user.id,
-        created_at__gte=six_months_ago
-    ).order_by('created_at')
-    
-    # Agrupar por mes
-    monthly_data = {}
-    for analysis in recent_analyses:
-        month_key = analysis.created_at.strftime('%Y-%m')
-        monthly_data[month_key] = monthly_data.get(month_key, 0) + 1
+    # Análisis por mes (últimos 6 meses), ya agrupados en el resumen
+    first_month = (timezone.now() - timedelta(days=180)).strftime('%Y-%m')
+    monthly_data = {
+        month: total
+        for month, total in sorted(statistics.get('monthly_counts', {}).items())
+        if month >= first_month
+    }
     
     context = {
         'statistics': statistics,
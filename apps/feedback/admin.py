@@ -80,6 +80,10 @@ class AnalysisHistoryAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        """El listado no necesita los payloads JSON (se cargan en el formulario)"""
+        return super().get_queryset(request).defer('analysis_data', 'recommendations_data')
+    
     def has_image(self, obj):
         """Indica si tiene imagen asociada."""
         if obj.image_path:
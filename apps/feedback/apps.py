@@ -12,7 +12,9 @@ class FeedbackConfig(AppConfig):
     
     def ready(self):
         """
-        Importar modelos cuando la app esté lista.
+        Importar modelos y registrar las señales que mantienen el resumen
+        precalculado del historial.
         """
         # Importar modelos desde la ubicación personalizada
-        from apps.feedback.adapters.persistence import models
\ No newline at end of file
+        from apps.feedback.adapters.persistence import models
+        from apps.feedback import signals  # noqa: F401
\ No newline at end of file
@@ -3,8 +3,9 @@ Entidades del dominio de Feedback.
 Representan los conceptos del negocio relacionados con feedback e historial.
 """
 
+import uuid
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, Dict, Any
 
 
@@ -78,6 +79,8 @@ class AnalysisHistory:
     # Datos completos del análisis (para vista detallada)
     analysis_data: Optional[Dict[str, Any]] = None
     recommendations_data: Optional[Dict[str, Any]] = None
+    image_path: Optional[str] = None
+    public_id: Optional[uuid.UUID] = None
     
     def has_feedback(self) -> bool:
         """Retorna True si el análisis tiene feedback"""
@@ -97,6 +100,7 @@ class AnalysisHistory:
         """Convierte la entidad a diccionario"""
         return {
             'id': self.id,
+            'public_id': str(self.public_id) if self.public_id else None,
             'user_id': self.user_id,
             'face_shape': self.face_shape,
             'confidence': self.confidence,
@@ -106,4 +110,51 @@ class AnalysisHistory:
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'has_feedback': self.has_feedback(),
             'formatted_date': self.get_formatted_date()
-        }
\ No newline at end of file
+        }
+
+
+@dataclass(frozen=True)
+class HistoryFilter:
+    """
+    Criterios combinables para filtrar el historial de un usuario.
+    Los campos vacíos no filtran.
+    """
+    face_shape: Optional[str] = None
+    min_rating: Optional[int] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None  # incluido
+    
+    @classmethod
+    def from_params(cls, params) -> 'HistoryFilter':
+        """Construye el filtro desde parámetros GET (ignora valores inválidos)"""
+        def parse_date(value):
+            try:
+                return date.fromisoformat(value) if value else None
+            except ValueError:
+                return None
+        
+        try:
+            min_rating = int(params.get('min_rating') or 0) or None
+        except ValueError:
+            min_rating = None
+        
+        return cls(
+            face_shape=params.get('face_shape') or None,
+            min_rating=min_rating,
+            date_from=parse_date(params.get('date_from')),
+            date_to=parse_date(params.get('date_to'))
+        )
+    
+    def is_empty(self) -> bool:
+        """True si no hay ningún criterio activo"""
+        return not any([self.face_shape, self.min_rating, self.date_from, self.date_to])
+    
+    def to_params(self) -> Dict[str, str]:
+        """Parámetros GET de los criterios activos (para enlaces de paginación)"""
+        params = {
+            'face_shape': self.face_shape,
+            'min_rating': self.min_rating,
+            'date_from': self.date_from.isoformat() if self.date_from else None,
+            'date_to': self.date_to.isoformat() if self.date_to else None,
+        }
+        return {key: str(value) for key, value in params.items() if value}
@@ -0,0 +1,58 @@
+"""
+Esquema de los datos JSON guardados en el historial de análisis.
+
+analysis_data y recommendations_data son JSONField: se guardan como objetos
+nativos (no como texto JSON). Las medidas faciales se reducen a un conjunto
+fijo de claves numéricas redondeadas.
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+# Medida -> decimales guardados
+MEASUREMENT_FIELDS = {
+    'face_height': 1,
+    'face_width': 1,
+    'upper_third': 1,
+    'middle_third': 1,
+    'lower_third': 1,
+    'eye_distance': 1,
+    'forehead_width': 1,
+    'jaw_width': 1,
+    'nose_length': 1,
+    'ratio': 2,
+    'symmetry': 1,
+}
+
+
+def decode_payload(value: Any) -> Optional[Dict[str, Any]]:
+    """
+    Devuelve el payload como objeto. Acepta los registros antiguos que
+    guardaban texto JSON (doble codificación)
+    """
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    return value
+
+
+def compact_measurements(measurements: Optional[Dict[str, Any]]) -> Dict[str, float]:
+    """Solo las medidas conocidas, como float redondeado (se omiten las no numéricas)"""
+    compact = {}
+    for name, decimals in MEASUREMENT_FIELDS.items():
+        value = (measurements or {}).get(name)
+        try:
+            compact[name] = round(float(value), decimals)
+        except (TypeError, ValueError):
+            continue
+    return compact
+
+
+def compact_analysis_data(analysis_data: Any) -> Optional[Dict[str, Any]]:
+    """Payload de análisis decodificado y con las medidas compactadas"""
+    data = decode_payload(analysis_data)
+    if isinstance(data, dict) and 'measurements' in data:
+        data = {**data, 'measurements': compact_measurements(data['measurements'])}
+    return data
@@ -6,7 +6,7 @@ Implementa la lógica de negocio para feedback e historial.
 from typing import List, Optional
 from datetime import datetime
 
-from .entities import Feedback, AnalysisHistory
+from .entities import Feedback, AnalysisHistory, HistoryFilter
 from ..ports.repositories import (
     FeedbackRepositoryInterface,
     AnalysisHistoryRepositoryInterface
@@ -72,6 +72,21 @@ class GetUserHistoryUseCase:
             limit=limit,
             offset=offset
         )
+    
+    def page(
+        self,
+        user_id: int,
+        cursor: Optional[str] = None,
+        limit: int = 10
+    ):
+        """
+        Obtiene una página del historial paginada por cursor.
+        """
+        return self.history_repository.find_page_by_user_id(
+            user_id=user_id,
+            cursor=cursor,
+            limit=limit
+        )
 
 
 class FilterHistoryUseCase:
@@ -116,6 +131,24 @@ class FilterHistoryUseCase:
             user_id=user_id,
             min_rating=min_rating
         )
+    
+    def page(
+        self,
+        user_id: int,
+        filters: HistoryFilter,
+        cursor: Optional[str] = None,
+        limit: int = 10
+    ):
+        """
+        Aplica todos los criterios a la vez en una página paginada por cursor
+        (el total estimado de la página es el del conjunto filtrado).
+        """
+        return self.history_repository.find_page_by_user_id(
+            user_id=user_id,
+            cursor=cursor,
+            limit=limit,
+            filters=filters
+        )
 
 
 class GetHistoryStatisticsUseCase:
@@ -0,0 +1,66 @@
+"""
+Comando Django para archivar el historial de análisis más antiguo que el
+horizonte de retención.
+
+Los payloads JSON de esas filas pasan a ficheros NDJSON.gz mensuales bajo
+HISTORY_ARCHIVE_ROOT (por defecto BASE_DIR/var/history_archive, nunca dentro
+de MEDIA_ROOT) y en la tabla
+queda la fila resumen que usan el listado, los filtros y el feedback. El
+detalle de un análisis archivado lee sus payloads del fichero.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.feedback.adapters.persistence.archive import HistoryArchive, archive_history
+
+DEFAULT_RETENTION_DAYS = 365
+
+
+class Command(BaseCommand):
+    help = 'Mueve los payloads del historial antiguo a ficheros NDJSON.gz mensuales'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'HISTORY_RETENTION_DAYS', DEFAULT_RETENTION_DAYS),
+            help='Antigüedad (días) a partir de la cual se archiva'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Filas archivadas por transacción'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo cuenta las filas que se archivarían'
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days debe ser al menos 1')
+
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        try:
+            archive = HistoryArchive()
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+        archived = archive_history(
+            cutoff,
+            batch_size=options['batch_size'],
+            archive=archive,
+            dry_run=options['dry_run']
+        )
+
+        if options['dry_run']:
+            self.stdout.write(f'{archived} análisis anteriores a {cutoff:%Y-%m-%d} se archivarían')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {archived} análisis anteriores a {cutoff:%Y-%m-%d} archivados en {archive.root}'
+        ))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0002_alter_feedbackmodel_analysis_history'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='analysishistorymodel',
+            index=models.Index(fields=['user', 'face_shape', '-created_at'], name='history_user_shape_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedbackmodel',
+            index=models.Index(fields=['analysis_history', 'rating'], name='feedback_history_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedbackmodel',
+            index=models.Index(fields=['analysis_history', '-created_at'], name='feedback_history_latest_idx'),
+        ),
+    ]
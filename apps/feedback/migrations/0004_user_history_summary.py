@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0001_initial'),
+        ('feedback', '0003_history_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserHistorySummaryModel',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='history_summary', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+                ('total_analyses', models.PositiveIntegerField(default=0, verbose_name='Total de análisis')),
+                ('total_feedbacks', models.PositiveIntegerField(default=0, verbose_name='Total de feedbacks')),
+                ('average_rating', models.FloatField(default=0.0, verbose_name='Calificación promedio')),
+                ('most_common_shape', models.CharField(blank=True, default='', max_length=50, verbose_name='Forma más detectada')),
+                ('monthly_counts', models.JSONField(blank=True, default=dict, help_text='{"YYYY-MM": cantidad}', verbose_name='Análisis por mes')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Última actualización')),
+            ],
+            options={
+                'verbose_name': 'Resumen de Historial',
+                'verbose_name_plural': 'Resúmenes de Historial',
+                'db_table': 'feedback_user_history_summary',
+            },
+        ),
+    ]
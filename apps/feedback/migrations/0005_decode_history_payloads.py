@@ -0,0 +1,95 @@
+"""
+Decodifica los payloads del historial guardados como texto JSON dentro de
+los JSONField (doble codificación) y compacta las medidas faciales.
+
+Los helpers y la lista de medidas están copiados de
+apps/feedback/core/payloads.py tal como eran al escribir la migración: un
+cambio posterior en ese módulo no debe alterar lo que hace esta migración.
+"""
+
+import json
+
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+# Medida -> decimales guardados
+MEASUREMENT_FIELDS = {
+    'face_height': 1,
+    'face_width': 1,
+    'upper_third': 1,
+    'middle_third': 1,
+    'lower_third': 1,
+    'eye_distance': 1,
+    'forehead_width': 1,
+    'jaw_width': 1,
+    'nose_length': 1,
+    'ratio': 2,
+    'symmetry': 1,
+}
+
+
+def decode_payload(value):
+    """Payload como objeto (acepta texto JSON doblemente codificado)"""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    return value
+
+
+def compact_measurements(measurements):
+    """Solo las medidas conocidas, como float redondeado"""
+    compact = {}
+    for name, decimals in MEASUREMENT_FIELDS.items():
+        value = (measurements or {}).get(name)
+        try:
+            compact[name] = round(float(value), decimals)
+        except (TypeError, ValueError):
+            continue
+    return compact
+
+
+def compact_analysis_data(analysis_data):
+    """Payload de análisis decodificado y con las medidas compactadas"""
+    data = decode_payload(analysis_data)
+    if isinstance(data, dict) and 'measurements' in data:
+        data = {**data, 'measurements': compact_measurements(data['measurements'])}
+    return data
+
+
+def decode_payloads(apps, schema_editor):
+    AnalysisHistoryModel = apps.get_model('feedback', 'AnalysisHistoryModel')
+    queryset = (
+        AnalysisHistoryModel.objects
+        .only('id', 'analysis_data', 'recommendations_data')
+        .order_by('id')
+    )
+
+    batch = []
+    for history in queryset.iterator(chunk_size=BATCH_SIZE):
+        analysis_data = compact_analysis_data(history.analysis_data)
+        recommendations_data = decode_payload(history.recommendations_data)
+        if analysis_data == history.analysis_data and recommendations_data == history.recommendations_data:
+            continue
+        history.analysis_data = analysis_data
+        history.recommendations_data = recommendations_data
+        batch.append(history)
+        if len(batch) >= BATCH_SIZE:
+            AnalysisHistoryModel.objects.bulk_update(batch, ['analysis_data', 'recommendations_data'])
+            batch = []
+
+    if batch:
+        AnalysisHistoryModel.objects.bulk_update(batch, ['analysis_data', 'recommendations_data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0004_user_history_summary'),
+    ]
+
+    operations = [
+        migrations.RunPython(decode_payloads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0005_decode_history_payloads'),
+    ]
+
+    # Campo único sobre filas existentes en tres pasos (columna nula ->
+    # valores por fila -> restricción única), en migraciones separadas para
+    # que PostgreSQL no mezcle el UPDATE y el ALTER TABLE en una transacción
+    operations = [
+        migrations.AddField(
+            model_name='analysishistorymodel',
+            name='public_id',
+            field=models.UUIDField(editable=False, null=True, verbose_name='ID público'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+import uuid
+
+from django.db import migrations
+
+
+def assign_public_ids(apps, schema_editor):
+    AnalysisHistoryModel = apps.get_model('feedback', 'AnalysisHistoryModel')
+    batch = []
+    for history in AnalysisHistoryModel.objects.filter(public_id__isnull=True).only('id').iterator(chunk_size=500):
+        history.public_id = uuid.uuid4()
+        batch.append(history)
+        if len(batch) >= 500:
+            AnalysisHistoryModel.objects.bulk_update(batch, ['public_id'])
+            batch = []
+    if batch:
+        AnalysisHistoryModel.objects.bulk_update(batch, ['public_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0006_analysishistorymodel_public_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(assign_public_ids, migrations.RunPython.noop),
+    ]
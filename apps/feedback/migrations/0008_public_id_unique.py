@@ -0,0 +1,18 @@
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0007_assign_public_ids'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='analysishistorymodel',
+            name='public_id',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='ID público'),
+        ),
+    ]
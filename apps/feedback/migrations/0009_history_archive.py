@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0008_public_id_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysishistorymodel',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Archivado el'),
+        ),
+        migrations.AddIndex(
+            model_name='analysishistorymodel',
+            index=models.Index(condition=models.Q(('archived_at__isnull', True)), fields=['created_at'], name='history_hot_created_idx'),
+        ),
+    ]
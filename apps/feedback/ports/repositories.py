@@ -7,7 +7,7 @@ from abc import ABC, abstractmethod
 from typing import List, Optional
 from datetime import datetime
 
-from ..core.entities import Feedback, AnalysisHistory
+from ..core.entities import Feedback, AnalysisHistory, HistoryFilter
 
 
 class FeedbackRepositoryInterface(ABC):
@@ -61,11 +61,27 @@ class AnalysisHistoryRepositoryInterface(ABC):
         """Obtiene el historial de un usuario con paginación"""
         pass
     
+    @abstractmethod
+    def find_page_by_user_id(
+        self,
+        user_id: int,
+        cursor: Optional[str] = None,
+        limit: int = 10,
+        filters: Optional[HistoryFilter] = None
+    ):
+        """Obtiene una página del historial, opcionalmente filtrada, paginada por cursor (KeysetPage)"""
+        pass
+    
     @abstractmethod
     def find_by_id(self, history_id: int) -> Optional[AnalysisHistory]:
         """Busca un registro específico del historial"""
         pass
     
+    @abstractmethod
+    def find_by_public_id(self, public_id) -> Optional[AnalysisHistory]:
+        """Busca un registro por su ID público (UUID)"""
+        pass
+    
     @abstractmethod
     def filter_by_date_range(
         self,
@@ -0,0 +1,52 @@
+"""
+Señales del historial: tras guardar o eliminar un análisis o un feedback se
+recalcula el resumen precalculado de los usuarios afectados, se invalidan sus
+totales cacheados del listado y sus lecturas quedan fijadas unos segundos a
+la base principal (réplica con retraso).
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.feedback.adapters.persistence.models import AnalysisHistoryModel, FeedbackModel
+from apps.feedback.adapters.persistence.repositories import DjangoAnalysisHistoryRepository
+from apps.feedback.adapters.persistence.statistics import HistoryStatisticsService
+from apps.shared.utils.db_routing import pin_to_primary
+
+
+def refresh_summaries(*user_ids):
+    """Tras el commit: fijar a la principal, invalidar los totales y recalcular los resúmenes"""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+
+    def refresh():
+        DjangoAnalysisHistoryRepository.invalidate_counts(*user_ids)
+        service = HistoryStatisticsService()
+        for user_id in user_ids:
+            pin_to_primary(user_id)
+            service.refresh(user_id)
+
+    transaction.on_commit(refresh)
+
+
+@receiver(post_save, sender=AnalysisHistoryModel)
+@receiver(post_delete, sender=AnalysisHistoryModel)
+def analysis_history_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_summaries(instance.user_id)
+
+
+@receiver(post_save, sender=FeedbackModel)
+@receiver(post_delete, sender=FeedbackModel)
+def feedback_changed(sender, instance, raw=False, **kwargs):
+    """El feedback cuenta para su autor y para el promedio del dueño del análisis"""
+    if raw:
+        return
+    owner_id = (
+        AnalysisHistoryModel.objects
+        .filter(pk=instance.analysis_history_id)
+        .values_list('user_id', flat=True)
+        .first()
+    )
+    refresh_summaries(instance.user_id, owner_id)
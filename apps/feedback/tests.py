@@ -0,0 +1,389 @@
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import InMemoryStorage
+from django.core.management import CommandError, call_command
+from django.template.loader import render_to_string
+from django.db import connections
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.feedback.adapters.persistence.background import AnalysisPersistenceWorker, AnalysisRecord
+from apps.feedback.adapters.persistence.models import AnalysisHistoryModel, FeedbackModel
+from apps.feedback.adapters.persistence.repositories import DjangoAnalysisHistoryRepository
+from apps.feedback.adapters.persistence.statistics import HistoryStatisticsService
+from apps.feedback.core.entities import AnalysisHistory, HistoryFilter
+from apps.shared.utils.db_routing import ReplicaRouter, replica_reads
+
+
+class AnalysisHistoryRepositoryQueriesTest(TestCase):
+    """El rating del feedback se obtiene en la misma consulta del listado"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(email='historial@example.com', password='x')
+        for index in range(12):
+            history = AnalysisHistoryModel.objects.create(
+                user=cls.user,
+                face_shape='oval' if index % 2 else 'redondo',
+                confidence=80.0
+            )
+            # Dos feedbacks por análisis: el listado debe mostrar el último
+            FeedbackModel.objects.create(user=cls.user, analysis_history=history, rating=2)
+            FeedbackModel.objects.create(user=cls.user, analysis_history=history, rating=index % 5 + 1)
+
+    def setUp(self):
+        self.repository = DjangoAnalysisHistoryRepository()
+
+    def test_history_page_uses_constant_queries(self):
+        for page_size in (1, 5, 10):
+            with self.assertNumQueries(1):
+                entries = self.repository.find_by_user_id(self.user.id, limit=page_size)
+                ratings = [entry.feedback_rating for entry in entries]
+            self.assertEqual(len(ratings), page_size)
+
+    def test_filters_use_constant_queries(self):
+        with self.assertNumQueries(1):
+            entries = self.repository.filter_by_face_shape(self.user.id, 'oval')
+            [entry.feedback_rating for entry in entries]
+        self.assertEqual(len(entries), 6)
+
+    def test_rating_is_latest_feedback(self):
+        for entry in self.repository.find_by_user_id(self.user.id):
+            latest = FeedbackModel.objects.filter(analysis_history_id=entry.id).order_by('-created_at', '-id').first()
+            self.assertEqual(entry.feedback_rating, latest.rating)
+
+    def test_filter_by_rating_does_not_duplicate(self):
+        with self.assertNumQueries(1):
+            entries = self.repository.filter_by_rating(self.user.id, 2)
+            [entry.feedback_rating for entry in entries]
+        ids = [entry.id for entry in entries]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(len(ids), 12)
+
+    def test_combined_filters_page_with_bounded_queries(self):
+        cache.clear()
+        today = timezone.localdate()
+        filters = HistoryFilter(face_shape='oval', min_rating=3, date_from=today, date_to=today)
+        expected = [
+            history.id for history in AnalysisHistoryModel.objects.filter(user=self.user, face_shape='oval')
+            if history.feedbacks.filter(rating__gte=3).exists()
+        ]
+
+        # Página + total filtrado; el total queda cacheado
+        with self.assertNumQueries(2):
+            page = self.repository.find_page_by_user_id(self.user.id, limit=2, filters=filters)
+        self.assertEqual(page.count_estimate, len(expected))
+
+        ids = [entry.id for entry in page]
+        while page.has_next():
+            with self.assertNumQueries(1):
+                page = self.repository.find_page_by_user_id(
+                    self.user.id, cursor=page.next_cursor, limit=2, filters=filters
+                )
+            ids += [entry.id for entry in page]
+        self.assertEqual(ids, expected)
+
+    def test_saving_analysis_invalidates_filtered_counts(self):
+        cache.clear()
+        shape_filter = HistoryFilter(face_shape='redondo')
+        rating_filter = HistoryFilter(face_shape='redondo', min_rating=5)
+
+        def count(filters):
+            return self.repository.find_page_by_user_id(self.user.id, filters=filters).count_estimate
+
+        before = count(shape_filter)
+        with self.captureOnCommitCallbacks(execute=True):
+            saved = self.repository.save(AnalysisHistory(
+                user_id=self.user.id, face_shape='redondo', confidence=90.0, recommendations_count=0
+            ))
+        self.assertEqual(count(shape_filter), before + 1)
+
+        # Guardar y eliminar feedback cambia los totales filtrados por rating
+        rated = count(rating_filter)
+        with self.captureOnCommitCallbacks(execute=True):
+            feedback = FeedbackModel.objects.create(user=self.user, analysis_history_id=saved.id, rating=5)
+        self.assertEqual(count(rating_filter), rated + 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            feedback.delete()
+        self.assertEqual(count(rating_filter), rated)
+
+
+class HistoryStatisticsServiceTest(TestCase):
+    """Resumen por usuario: una consulta para calcularlo, una fila para leerlo"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='resumen@example.com', password='x')
+        self.service = HistoryStatisticsService()
+
+    def _analysis(self, face_shape, rating=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            history = AnalysisHistoryModel.objects.create(user=self.user, face_shape=face_shape, confidence=70.0)
+        if rating is not None:
+            with self.captureOnCommitCallbacks(execute=True):
+                FeedbackModel.objects.create(user=self.user, analysis_history=history, rating=rating)
+        return history
+
+    def test_summary_is_updated_on_save(self):
+        self._analysis('oval', rating=4)
+        self._analysis('oval', rating=5)
+        self._analysis('redondo')
+
+        with self.assertNumQueries(1):
+            statistics = DjangoAnalysisHistoryRepository().get_statistics(self.user.id)
+
+        self.assertEqual(statistics['total_analyses'], 3)
+        self.assertEqual(statistics['total_feedbacks'], 2)
+        self.assertEqual(statistics['average_rating'], 4.5)
+        self.assertEqual(statistics['most_common_shape'], 'oval')
+        self.assertEqual(statistics['monthly_counts'], {timezone.now().strftime('%Y-%m'): 3})
+
+    def test_compute_uses_two_queries(self):
+        self._analysis('cuadrado', rating=3)
+        # Agregado por usuario + agrupación mensual (TruncMonth)
+        with self.assertNumQueries(2):
+            summary = self.service.compute(self.user.id)
+        self.assertEqual(summary['total_analyses'], 1)
+        self.assertEqual(summary['average_rating'], 3)
+
+    def test_empty_history(self):
+        statistics = DjangoAnalysisHistoryRepository().get_statistics(self.user.id)
+        self.assertEqual(statistics['total_analyses'], 0)
+        self.assertEqual(statistics['most_common_shape'], 'N/A')
+
+
+class AnalysisPersistenceWorkerTest(TestCase):
+    """Guardado fuera de la petición (modo eager para poder comprobarlo)"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='worker@example.com', password='x')
+        self.storage = InMemoryStorage()
+        self.repository = DjangoAnalysisHistoryRepository()
+        self.worker = AnalysisPersistenceWorker(self.repository, storage=self.storage, eager=True)
+
+    def _record(self, frame=None):
+        return AnalysisRecord.create(
+            user_id=self.user.id,
+            face_shape='oval',
+            confidence=88.5,
+            analysis_data={'primary_shape': 'oval', 'measurements': {}},
+            recommendations_data={'cortes': [{'nombre': 'Pompadour'}], 'barbas': []},
+            recommendations_count=1,
+            frame=frame
+        )
+
+    def test_record_is_isolated_from_request_data(self):
+        analysis_data = {'primary_shape': 'oval'}
+        frame = np.zeros((8, 8, 3), dtype=np.uint8)
+        record = AnalysisRecord.create(self.user.id, 'oval', 90, analysis_data, {}, 0, frame=frame)
+        analysis_data['primary_shape'] = 'redondo'
+        frame[:] = 255
+        self.assertEqual(record.analysis_data['primary_shape'], 'oval')
+        self.assertEqual(int(record.frame.max()), 0)
+        self.assertFalse(record.frame.flags.writeable)
+
+    def test_eager_worker_stores_image_and_history(self):
+        record = self._record(frame=np.full((16, 16, 3), 120, dtype=np.uint8))
+        history = self.worker.submit(record).result()
+
+        self.assertEqual(history.public_id, record.public_id)
+        self.assertTrue(self.storage.exists(history.image_path))
+        saved = self.repository.find_by_public_id(record.public_id)
+        self.assertEqual(saved.id, history.id)
+        self.assertEqual(saved.recommendations_data['cortes'][0]['nombre'], 'Pompadour')
+
+    def _submit_feedback(self, analysis_id):
+        return self.client.post(reverse('feedback:submit_feedback'), {'analysis_id': analysis_id, 'rating': 4})
+
+    def test_feedback_accepts_provisional_id(self):
+        cache.clear()
+        record = self._record()
+        self.client.force_login(self.user)
+        data = {'analysis_id': str(record.public_id), 'rating': 4}
+
+        # En cola, todavía sin guardar
+        self.worker.mark_pending(record)
+        response = self.client.post(reverse('feedback:submit_feedback'), data)
+        self.assertEqual(response.status_code, 409)
+
+        history = self.worker.submit(record).result()
+        response = self.client.post(reverse('feedback:submit_feedback'), data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(FeedbackModel.objects.filter(analysis_history_id=history.id, rating=4).exists())
+        self.assertFalse(self.worker.is_pending(record.public_id, self.user.id))
+
+    def test_results_page_renders_provisional_id(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        record = self._record()
+        html = render_to_string(
+            'analysis/results.html',
+            {'history_id': str(record.public_id), 'analysis': {}, 'recommendations': {}},
+            request=request
+        )
+        self.assertIn(f'data-history-id="{record.public_id}"', html)
+        self.assertIn('id="feedbackForm"', html)
+
+        # Sin historial (p. ej. anónimo) no hay botón ni formulario de feedback
+        html = render_to_string(
+            'analysis/results.html', {'history_id': None, 'analysis': {}, 'recommendations': {}}, request=request
+        )
+        self.assertNotIn('feedbackForm', html)
+
+    def test_feedback_rejects_malformed_and_unknown_ids(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        self.assertEqual(self._submit_feedback('no-es-un-uuid').status_code, 400)
+
+        # Bien formado pero nunca encolado
+        record = self._record()
+        self.assertEqual(self._submit_feedback(str(record.public_id)).status_code, 404)
+
+        # Guardado, pero de otro usuario
+        self.worker.submit(record).result()
+        other = get_user_model().objects.create_user(email='otro@example.com', password='x')
+        self.client.force_login(other)
+        self.assertEqual(self._submit_feedback(str(record.public_id)).status_code, 404)
+        self.assertFalse(FeedbackModel.objects.exists())
+
+
+class ReplicaRoutingTest(TransactionTestCase):
+    """
+    Lecturas de historial a la réplica salvo justo después de escribir
+    (sin la transacción de TestCase, dentro de la cual se lee de la principal)
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(email='replica@example.com', password='x')
+        self.router = ReplicaRouter(replica_alias='replica')
+
+    def test_only_marked_reads_use_replica(self):
+        self.assertEqual(self.router.db_for_read(AnalysisHistoryModel), 'default')
+        with replica_reads(self.user.id):
+            self.assertEqual(self.router.db_for_read(AnalysisHistoryModel), 'replica')
+            self.assertEqual(self.router.db_for_write(AnalysisHistoryModel), 'default')
+            # Tras escribir, el resto de la petición lee de la principal
+            self.assertEqual(self.router.db_for_read(AnalysisHistoryModel), 'default')
+        with replica_reads(self.user.id):
+            self.assertEqual(self.router.db_for_read(AnalysisHistoryModel), 'replica')
+
+    def test_user_is_pinned_after_saving_analysis(self):
+        AnalysisHistoryModel.objects.create(user=self.user, face_shape='oval', confidence=60.0)
+        with replica_reads(self.user.id):
+            self.assertEqual(self.router.db_for_read(AnalysisHistoryModel), 'default')
+        with replica_reads(None):
+            self.assertEqual(self.router.db_for_read(AnalysisHistoryModel), 'replica')
+
+
+class ReplicaReadsTest(TransactionTestCase):
+    """
+    Peticiones reales con dos conexiones ('replica' es un espejo de 'default'
+    en tests): el historial y el informe se leen de la réplica, salvo justo
+    después de que el usuario guarde un análisis
+    """
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='lector@example.com', password='x', is_staff=True)
+        self.history = AnalysisHistoryModel.objects.create(user=self.user, face_shape='oval', confidence=60.0)
+        # Sin la marca de lectura de lo propio escrito que deja el guardado
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def _get(self, url):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, primary, replica
+
+    @staticmethod
+    def _reads(queries, table):
+        return [query['sql'] for query in queries if f'"{table}"' in query['sql']]
+
+    def test_history_list_reads_from_replica(self):
+        response, primary, replica = self._get(reverse('feedback:history_list'))
+        self.assertTrue(self._reads(replica, AnalysisHistoryModel._meta.db_table))
+        self.assertFalse(self._reads(primary, AnalysisHistoryModel._meta.db_table))
+        self.assertEqual([entry.id for entry in response.context['history_entries']], [self.history.id])
+
+    def test_informe_reads_from_replica(self):
+        _, primary, replica = self._get(reverse('reports:informe'))
+        self.assertTrue(self._reads(replica, 'rollup_daily_face_shapes'))
+        self.assertFalse(self._reads(primary, 'rollup_daily_face_shapes'))
+
+    def test_read_your_writes_after_saving(self):
+        saved = AnalysisHistoryModel.objects.create(user=self.user, face_shape='redondo', confidence=75.0)
+
+        response, primary, replica = self._get(reverse('feedback:history_list'))
+        self.assertTrue(self._reads(primary, AnalysisHistoryModel._meta.db_table))
+        self.assertFalse(self._reads(replica, AnalysisHistoryModel._meta.db_table))
+        self.assertIn(saved.id, [entry.id for entry in response.context['history_entries']])
+
+        # Pasado el tiempo de fijación vuelve a leer de la réplica
+        cache.clear()
+        _, _, replica = self._get(reverse('feedback:history_list'))
+        self.assertTrue(self._reads(replica, AnalysisHistoryModel._meta.db_table))
+
+
+class HistoryArchiveTest(TestCase):
+    """Las filas antiguas quedan como resumen y sus payloads en el archivo mensual"""
+
+    def setUp(self):
+        self.archive_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.archive_root.cleanup)
+        self.user = get_user_model().objects.create_user(email='archivo@example.com', password='x')
+        self.repository = DjangoAnalysisHistoryRepository()
+        self.old = [
+            self.repository.save(AnalysisHistory(
+                user_id=self.user.id, face_shape='oval', confidence=75.0, recommendations_count=1,
+                analysis_data={'primary_shape': 'oval', 'index': index},
+                recommendations_data={'cortes': [{'nombre': f'Corte {index}'}]}
+            ))
+            for index in range(3)
+        ]
+        AnalysisHistoryModel.objects.filter(id__in=[entry.id for entry in self.old]).update(
+            created_at=timezone.now() - timedelta(days=400)
+        )
+        self.recent = self.repository.save(AnalysisHistory(
+            user_id=self.user.id, face_shape='redondo', confidence=80.0, recommendations_count=0,
+            analysis_data={'primary_shape': 'redondo'}
+        ))
+
+    def test_archive_keeps_stub_and_payload(self):
+        with override_settings(HISTORY_ARCHIVE_ROOT=self.archive_root.name):
+            call_command('archive_history', days=365, batch_size=2, stdout=StringIO())
+
+            stubs = AnalysisHistoryModel.objects.filter(archived_at__isnull=False)
+            self.assertEqual(set(stubs.values_list('id', flat=True)), {entry.id for entry in self.old})
+            self.assertFalse(stubs.exclude(analysis_data=None).exists())
+            self.assertEqual(AnalysisHistoryModel.objects.get(id=self.recent.id).archived_at, None)
+
+            # El listado sigue mostrando todas las filas
+            self.assertEqual(len(self.repository.find_by_user_id(self.user.id)), 4)
+
+            detail = self.repository.find_by_id(self.old[1].id)
+            self.assertEqual(detail.analysis_data, {'primary_shape': 'oval', 'index': 1})
+            self.assertEqual(detail.recommendations_data['cortes'][0]['nombre'], 'Corte 1')
+
+            # Una segunda ejecución no vuelve a archivar nada
+            call_command('archive_history', days=365, stdout=StringIO())
+            self.assertEqual(AnalysisHistoryModel.objects.filter(archived_at__isnull=False).count(), 3)
+
+    def test_refuses_archive_inside_media_root(self):
+        with override_settings(
+            MEDIA_ROOT=self.archive_root.name,
+            HISTORY_ARCHIVE_ROOT=os.path.join(self.archive_root.name, 'history_archive')
+        ):
+            with self.assertRaises(CommandError):
+                call_command('archive_history', days=365, stdout=StringIO())
+        self.assertFalse(AnalysisHistoryModel.objects.filter(archived_at__isnull=False).exists())
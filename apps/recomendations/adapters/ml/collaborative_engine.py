@@ -0,0 +1,368 @@
+"""
+Motor de recomendaciones por filtrado colaborativo.
+
+Factoriza con SciPy (svds) una matriz dispersa de valoraciones
+(forma de rostro / usuario × estilo) construida a partir del feedback: cada
+valoración de 1 a 5 se atribuye a los estilos mostrados en ese análisis.
+Los factores viven en memoria; el feedback nuevo se incorpora plegando
+(fold-in) solo las filas afectadas, sin reentrenar. Servir es un producto
+escalar más top-k, combinado con el score por reglas para los estilos sin
+valoraciones.
+"""
+
+import json
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.linalg import svds
+from django.conf import settings
+
+from apps.recomendations.core.entities import (
+    HaircutStyle,
+    BeardStyle,
+    FaceShape,
+    Gender,
+    HairLength
+)
+from apps.recomendations.adapters.ml.vectorized_engine import VectorizedRecommendationEngine
+from apps.recomendations.adapters.persistence.normalization import FACE_SHAPE_DB_TO_ENUM
+
+RowKey = str                 # 'shape:oval' o 'user:<id>'
+ColumnKey = Tuple[str, int]  # ('haircut', id) o ('beard', id)
+RatingEntry = Tuple[RowKey, ColumnKey, float]
+
+
+def shape_row(face_shape: FaceShape) -> RowKey:
+    return f'shape:{face_shape.value}'
+
+
+def user_row(user_id) -> RowKey:
+    return f'user:{user_id}'
+
+
+def feedback_entries(feedback, haircut_ids: Dict[str, int], beard_ids: Dict[str, int]) -> List[RatingEntry]:
+    """
+    Convierte un FeedbackModel en entradas (fila, columna, valoración)
+
+    Args:
+        feedback: FeedbackModel con su analysis_history cargado
+        haircut_ids / beard_ids: nombre de estilo -> ID (el historial guarda nombres)
+    """
+    history = feedback.analysis_history
+    data = history.recommendations_data or {}
+    if isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except ValueError:
+            return []
+
+    columns = []
+    for item in data.get('cortes') or []:
+        style_id = haircut_ids.get(item.get('nombre'))
+        if style_id is not None:
+            columns.append(('haircut', style_id))
+    # El historial guarda 'barbas' (las versiones antiguas usaban 'barba')
+    for item in data.get('barbas') or data.get('barba') or []:
+        style_id = beard_ids.get(item.get('nombre'))
+        if style_id is not None:
+            columns.append(('beard', style_id))
+
+    rows = [user_row(feedback.user_id)]
+    face_shape = FACE_SHAPE_DB_TO_ENUM.get((history.face_shape or '').lower().strip())
+    if face_shape is not None:
+        rows.append(shape_row(face_shape))
+
+    rating = float(feedback.rating)
+    return [(row, column, rating) for row in rows for column in columns]
+
+
+def style_name_maps() -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Mapas nombre -> ID desde la instantánea del catálogo"""
+    from apps.recomendations.adapters.persistence.catalog_cache import style_catalog_cache
+
+    snapshot = style_catalog_cache.get_snapshot()
+    return (
+        {style.name: style_id for style_id, style in snapshot.haircuts_by_id.items()},
+        {style.name: style_id for style_id, style in snapshot.beards_by_id.items()},
+    )
+
+
+def load_feedback_ratings() -> Dict[int, List[RatingEntry]]:
+    """Entradas de valoración de todo el feedback, agrupadas por ID de feedback"""
+    from apps.feedback.adapters.persistence.models import FeedbackModel
+
+    haircut_ids, beard_ids = style_name_maps()
+    queryset = FeedbackModel.objects.select_related('analysis_history').only(
+        'id', 'rating', 'user_id',
+        'analysis_history__face_shape', 'analysis_history__recommendations_data'
+    )
+    return {
+        feedback.id: feedback_entries(feedback, haircut_ids, beard_ids)
+        for feedback in queryset.iterator(chunk_size=1000)
+    }
+
+
+class CollaborativeRecommendationEngine(VectorizedRecommendationEngine):
+    """
+    Filtrado colaborativo (SVD truncada) combinado con el score por reglas:
+
+        score = (1 - cf_weight) * reglas + cf_weight * (predicción - 1) / 4
+
+    Las filas/estilos sin valoraciones reciben la media global como
+    predicción, de modo que el orden lo deciden las reglas.
+    """
+
+    # Los scores dependen de user_id: los casos de uso no los comparten entre usuarios
+    personalized = True
+
+    def __init__(self, n_factors: int = 8, cf_weight: float = 0.5,
+                 regularization: float = 0.1, rating_source=None):
+        super().__init__()
+        self.n_factors = n_factors
+        self.cf_weight = cf_weight
+        self.regularization = regularization
+        self.rating_source = rating_source or load_feedback_ratings
+        self._lock = threading.RLock()
+        self._feedback: Dict[int, List[RatingEntry]] = {}
+        # Suma y número de valoraciones por celda
+        self._cells: Dict[RowKey, Dict[ColumnKey, List[float]]] = {}
+        self._rows: Dict[RowKey, int] = {}
+        self._columns: Dict[ColumnKey, int] = {}
+        self._row_factors = np.zeros((0, 0))
+        self._column_factors = np.zeros((0, 0))
+        self._mean = 3.0
+        self._version = 0
+        self._positions = {}
+        self.trained = False
+
+    # ------------------------------------------------------------------
+    # Entrenamiento
+    # ------------------------------------------------------------------
+
+    def fit(self, feedback: Optional[Dict[int, List[RatingEntry]]] = None):
+        """Factoriza desde cero la matriz de valoraciones"""
+        feedback = self.rating_source() if feedback is None else feedback
+
+        with self._lock:
+            self._feedback = {key: list(entries) for key, entries in feedback.items()}
+            self._cells = {}
+            for entries in self._feedback.values():
+                self._accumulate(entries, sign=1)
+
+            self._rows = {row: idx for idx, row in enumerate(self._cells)}
+            columns = sorted({column for cells in self._cells.values() for column in cells})
+            self._columns = {column: idx for idx, column in enumerate(columns)}
+
+            row_idx, col_idx, values = [], [], []
+            for row, cells in self._cells.items():
+                for column, (total, count) in cells.items():
+                    row_idx.append(self._rows[row])
+                    col_idx.append(self._columns[column])
+                    values.append(total / count)
+
+            self._mean = float(np.mean(values)) if values else 3.0
+            k = min(self.n_factors, len(self._rows) - 1, len(self._columns) - 1)
+
+            if k >= 1:
+                matrix = coo_matrix(
+                    (np.asarray(values) - self._mean, (row_idx, col_idx)),
+                    shape=(len(self._rows), len(self._columns))
+                ).tocsr()
+                u, s, vt = svds(matrix, k=k)
+                sqrt_s = np.sqrt(s)
+                self._row_factors = u * sqrt_s
+                self._column_factors = vt.T * sqrt_s
+            else:
+                self._row_factors = np.zeros((len(self._rows), 0))
+                self._column_factors = np.zeros((len(self._columns), 0))
+
+            self._version += 1
+            self.trained = True
+
+        print(f"✓ Filtrado colaborativo entrenado: {len(values)} valoraciones, "
+              f"{len(self._rows)} filas × {len(self._columns)} estilos, k={max(k, 0)}")
+
+    def _accumulate(self, entries: Iterable[RatingEntry], sign: int):
+        for row, column, rating in entries:
+            cell = self._cells.setdefault(row, {}).setdefault(column, [0.0, 0])
+            cell[0] += sign * rating
+            cell[1] += sign
+            if cell[1] <= 0:
+                del self._cells[row][column]
+
+    # ------------------------------------------------------------------
+    # Actualización incremental (fold-in)
+    # ------------------------------------------------------------------
+
+    def _solve(self, factors: np.ndarray, ratings: np.ndarray) -> np.ndarray:
+        """Mínimos cuadrados regularizados con los factores del otro lado fijos"""
+        k = factors.shape[1]
+        gram = factors.T @ factors + self.regularization * np.eye(k)
+        return np.linalg.solve(gram, factors.T @ (ratings - self._mean))
+
+    def _observed(self, row: RowKey) -> Tuple[np.ndarray, np.ndarray]:
+        cells = self._cells.get(row, {})
+        idx = np.fromiter((self._columns[c] for c in cells), dtype=np.intp, count=len(cells))
+        values = np.fromiter((t / n for t, n in cells.values()), dtype=np.float64, count=len(cells))
+        return idx, values
+
+    def update_feedback(self, feedback_id: int, entries: List[RatingEntry]):
+        """
+        Incorpora (o reemplaza) las valoraciones de un feedback sin reentrenar:
+        los estilos nuevos y las filas afectadas se pliegan sobre los
+        factores existentes
+        """
+        with self._lock:
+            if not self.trained:
+                return
+
+            previous = self._feedback.get(feedback_id, [])
+            self._accumulate(previous, sign=-1)
+            self._accumulate(entries, sign=1)
+            self._feedback[feedback_id] = list(entries)
+
+            k = self._column_factors.shape[1]
+
+            # Estilos nuevos: plegar la columna con las filas que la valoraron
+            for column in {column for _, column, _ in entries} - set(self._columns):
+                raters = [
+                    (self._rows[row], cells[column][0] / cells[column][1])
+                    for row, cells in self._cells.items()
+                    if column in cells and row in self._rows
+                ]
+                factor = np.zeros(k)
+                if raters and k:
+                    idx, values = zip(*raters)
+                    factor = self._solve(self._row_factors[list(idx)], np.asarray(values))
+                self._columns[column] = len(self._columns)
+                self._column_factors = np.vstack([self._column_factors, factor[None, :]])
+
+            # Filas afectadas: plegar con los estilos fijos
+            for row in {row for row, _, _ in previous} | {row for row, _, _ in entries}:
+                if row not in self._rows:
+                    self._rows[row] = len(self._rows)
+                    self._row_factors = np.vstack([self._row_factors, np.zeros((1, k))])
+                idx, values = self._observed(row)
+                if k and len(idx):
+                    self._row_factors[self._rows[row]] = self._solve(self._column_factors[idx], values)
+
+            self._version += 1
+
+    # ------------------------------------------------------------------
+    # Predicción
+    # ------------------------------------------------------------------
+
+    def _column_positions(self, encoded, kind: str) -> np.ndarray:
+        """Posición en la matriz de cada estilo codificado (-1 si no tiene valoraciones)"""
+        key = (id(encoded), kind)
+        cached = self._positions.get(key)
+        if cached is not None and cached[0] is encoded and cached[1] == self._version:
+            return cached[2]
+
+        positions = np.fromiter(
+            (self._columns.get((kind, style.id), -1) for style in encoded.styles),
+            dtype=np.intp, count=len(encoded.styles)
+        )
+        if len(self._positions) > 4 * self.cache_size:
+            self._positions.clear()
+        self._positions[key] = (encoded, self._version, positions)
+        return positions
+
+    def cf_scores(self, encoded, kind: str, rows: List[RowKey]) -> np.ndarray:
+        """Predicciones normalizadas a [0, 1] (media de las filas conocidas)"""
+        with self._lock:
+            positions = self._column_positions(encoded, kind)
+            known_rows = [self._rows[row] for row in rows if row in self._rows]
+
+            predictions = np.full(len(positions), self._mean)
+            known = positions >= 0
+            if known_rows and known.any() and self._column_factors.shape[1]:
+                row_factors = self._row_factors[known_rows].mean(axis=0)
+                predictions[known] += self._column_factors[positions[known]] @ row_factors
+
+        return np.clip((predictions - 1.0) / 4.0, 0.0, 1.0)
+
+    def _blend(self, rule_scores: np.ndarray, cf: np.ndarray) -> np.ndarray:
+        return (1.0 - self.cf_weight) * rule_scores + self.cf_weight * cf
+
+    def score_haircut_styles(
+        self,
+        styles: List[HaircutStyle],
+        face_shape: FaceShape,
+        gender: Gender,
+        hair_length: HairLength,
+        top_k: Optional[int] = None,
+        user_id=None
+    ) -> List[Tuple[HaircutStyle, float]]:
+        if not styles:
+            return []
+        encoded = self.encode(styles)
+        rows = [user_row(user_id)] if user_id is not None else []
+        rows.append(shape_row(face_shape))
+        scores = self._blend(
+            self.haircut_scores(encoded, face_shape, gender, hair_length),
+            self.cf_scores(encoded, 'haircut', rows)
+        )
+        return [(encoded.styles[idx], float(scores[idx])) for idx in self.top_k(scores, top_k)]
+
+    def score_beard_styles(
+        self,
+        styles: List[BeardStyle],
+        face_shape: FaceShape,
+        top_k: Optional[int] = None,
+        user_id=None
+    ) -> List[Tuple[BeardStyle, float]]:
+        if not styles:
+            return []
+        encoded = self.encode(styles)
+        rows = [user_row(user_id)] if user_id is not None else []
+        rows.append(shape_row(face_shape))
+        scores = self._blend(
+            self.beard_scores(encoded, face_shape),
+            self.cf_scores(encoded, 'beard', rows)
+        )
+        return [(encoded.styles[idx], float(scores[idx])) for idx in self.top_k(scores, top_k)]
+
+    def calculate_style_score(self, style, face_shape, gender, hair_length) -> float:
+        return self.score_haircut_styles([style], face_shape, gender, hair_length)[0][1]
+
+    def calculate_beard_score(self, style, face_shape) -> float:
+        return self.score_beard_styles([style], face_shape)[0][1]
+
+
+def collaborative_enabled() -> bool:
+    """settings.COLLABORATIVE_RECOMMENDATIONS activa el motor en las vistas"""
+    return getattr(settings, 'COLLABORATIVE_RECOMMENDATIONS', False)
+
+
+def serving_dependencies(default_engine):
+    """
+    (motor, tabla de rankings) para los casos de uso. El motor colaborativo
+    se sirve sin tabla precalculada porque sus scores cambian con el feedback.
+    """
+    if collaborative_enabled():
+        return get_collaborative_engine(), None
+
+    from apps.recomendations.adapters.ml.ranking_table import get_ranking_table
+    return default_engine, get_ranking_table()
+
+
+_collaborative_engine = None
+_collaborative_engine_lock = threading.Lock()
+
+
+def get_collaborative_engine(create: bool = True) -> Optional[CollaborativeRecommendationEngine]:
+    """Motor compartido por proceso, entrenado en el primer uso"""
+    global _collaborative_engine
+    if _collaborative_engine is None and create:
+        with _collaborative_engine_lock:
+            if _collaborative_engine is None:
+                engine = CollaborativeRecommendationEngine(
+                    n_factors=getattr(settings, 'COLLABORATIVE_FACTORS', 8),
+                    cf_weight=getattr(settings, 'COLLABORATIVE_WEIGHT', 0.5)
+                )
+                engine.fit()
+                _collaborative_engine = engine
+    return _collaborative_engine
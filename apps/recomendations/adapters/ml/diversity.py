@@ -0,0 +1,105 @@
+"""
+Re-ranking por diversidad (Maximal Marginal Relevance).
+
+Muchos estilos alcanzan el mismo score máximo, así que el top-k puede quedar
+lleno de variantes casi idénticas. MMR elige en cada paso el candidato que
+maximiza
+
+    (1 - diversity) * relevancia - diversity * max(similitud con los elegidos)
+
+usando los vectores TF-IDF del índice de estilos similares. Cada paso es una
+sola operación vectorizada sobre los n candidatos: O(k·n) en total.
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+from scipy.sparse import diags
+from django.conf import settings
+
+from apps.recomendations.adapters.ml.similarity_index import SimilarityTable, get_similarity_index
+
+
+class MMRReranker:
+    """
+    Reordena una lista (estilo, score) ya ordenada por relevancia.
+
+    Args:
+        similarity_index: StyleSimilarityIndex con los vectores de estilo
+        diversity: Peso de la diversidad (0 = orden original, 1 = solo diversidad)
+        pool_factor: Candidatos considerados por cada resultado pedido
+    """
+
+    def __init__(self, similarity_index, diversity: float = 0.3, pool_factor: int = 4):
+        self.similarity_index = similarity_index
+        self.diversity = diversity
+        self.pool_factor = pool_factor
+
+    def pool_size(self, max_results: int) -> int:
+        """Número de candidatos a recuperar antes de re-rankear"""
+        return max_results * self.pool_factor
+
+    @staticmethod
+    def _candidate_vectors(table: SimilarityTable, scored):
+        """Vectores de los candidatos (fila vacía si el estilo no está indexado)"""
+        rows = np.fromiter(
+            (table.rows.get(style.id, -1) for style, _ in scored),
+            dtype=np.intp, count=len(scored)
+        )
+        vectors = table.vectors[np.maximum(rows, 0)]
+        if (rows < 0).any():
+            # Los estilos sin vector no penalizan a nadie
+            vectors = (diags((rows >= 0).astype(np.float32)) @ vectors).tocsr()
+        return vectors
+
+    def rerank(self, table: SimilarityTable, scored: List[Tuple[object, float]],
+               k: int) -> List[Tuple[object, float]]:
+        """
+        Selecciona k elementos de `scored` con MMR (conserva el score original)
+        """
+        if self.diversity <= 0 or table.vectors is None or len(scored) <= 1:
+            return scored[:k]
+
+        n = len(scored)
+        k = min(k, n)
+        relevance = np.fromiter((score for _, score in scored), dtype=np.float64, count=n)
+        vectors = self._candidate_vectors(table, scored)
+
+        max_similarity = np.zeros(n)
+        available = np.ones(n, dtype=bool)
+        selected = []
+
+        for _ in range(k):
+            mmr = (1.0 - self.diversity) * relevance - self.diversity * max_similarity
+            mmr[~available] = -np.inf
+            # argmax devuelve el primero ante empates: se respeta el orden original
+            chosen = int(np.argmax(mmr))
+            selected.append(chosen)
+            available[chosen] = False
+
+            similarity = (vectors @ vectors[chosen].T).toarray().ravel()
+            np.maximum(max_similarity, similarity, out=max_similarity)
+
+        return [scored[idx] for idx in selected]
+
+    def rerank_haircuts(self, scored: List[Tuple[object, float]], k: int) -> List[Tuple[object, float]]:
+        return self.rerank(self.similarity_index.haircut_table(), scored, k)
+
+    def rerank_beards(self, scored: List[Tuple[object, float]], k: int) -> List[Tuple[object, float]]:
+        return self.rerank(self.similarity_index.beard_table(), scored, k)
+
+
+def get_diversity_reranker():
+    """
+    Re-ranker configurado con settings.RECOMMENDATION_DIVERSITY
+    (None si es 0: se mantiene el orden por relevancia)
+    """
+    diversity = getattr(settings, 'RECOMMENDATION_DIVERSITY', 0.3)
+    if not diversity:
+        return None
+
+    return MMRReranker(
+        get_similarity_index(),
+        diversity=diversity,
+        pool_factor=getattr(settings, 'RECOMMENDATION_DIVERSITY_POOL', 4)
+    )
@@ -0,0 +1,304 @@
+"""
+Tabla materializada de rankings de recomendación.
+
+Solo existen 6 formas de rostro × 3 géneros × 3 longitudes de cabello, así que
+el ranking de cada combinación se precalcula (IDs de estilo con su score) y
+una recomendación se resuelve con una búsqueda en diccionario. Cuando un
+estilo cambia solo se recoloca ese estilo en cada combinación.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from apps.recomendations.core.entities import (
+    HaircutStyle,
+    BeardStyle,
+    FaceShape,
+    Gender,
+    HairLength
+)
+
+HaircutKey = Tuple[FaceShape, Gender, HairLength]
+# Entradas ordenadas por (-score, id): el desempate por ID es determinista
+Ranking = List[Tuple[float, int]]
+
+
+class RecommendationRankingTable:
+    """
+    Rankings precalculados para todas las combinaciones de
+    (forma de rostro, género, longitud de cabello) y de forma para barbas.
+    """
+
+    def __init__(self, recommendation_engine, style_catalog, path: Optional[str] = None,
+                 snapshot_provider=None):
+        self.recommendation_engine = recommendation_engine
+        self.style_catalog = style_catalog
+        self.path = path
+        # Si se indica, la tabla se reconstruye cuando cambia el contenido de
+        # la instantánea del catálogo por una vía distinta de update_* (p. ej.
+        # otro worker); se compara su huella, no la identidad del objeto
+        self.snapshot_provider = snapshot_provider
+        self._snapshot = None
+        self._lock = threading.RLock()
+        self._haircuts: Dict[HaircutKey, Ranking] = {}
+        self._beards: Dict[FaceShape, Ranking] = {}
+        self._ready = False
+
+    @staticmethod
+    def haircut_keys() -> List[HaircutKey]:
+        return [
+            (face_shape, gender, hair_length)
+            for face_shape in FaceShape
+            for gender in Gender
+            for hair_length in HairLength
+        ]
+
+    @staticmethod
+    def _entry(score: float, style_id: int) -> Tuple[float, int]:
+        return (-score, style_id)
+
+    # ------------------------------------------------------------------
+    # Construcción
+    # ------------------------------------------------------------------
+
+    def _current_snapshot(self):
+        return self.snapshot_provider() if self.snapshot_provider else None
+
+    @staticmethod
+    def _fingerprint(snapshot) -> Optional[str]:
+        return snapshot.fingerprint if snapshot is not None else None
+
+    def rebuild(self):
+        """Recalcula la tabla completa desde el catálogo"""
+        with self._lock:
+            self._snapshot = self._current_snapshot()
+            haircuts = {}
+            for face_shape, gender, hair_length in self.haircut_keys():
+                styles = self.style_catalog.get_haircut_styles(gender=gender, hair_length=hair_length)
+                scored = self.recommendation_engine.score_haircut_styles(
+                    styles, face_shape, gender, hair_length
+                )
+                haircuts[(face_shape, gender, hair_length)] = sorted(
+                    self._entry(score, style.id) for style, score in scored
+                )
+
+            beards = {}
+            all_beards = self.style_catalog.get_beard_styles()
+            for face_shape in FaceShape:
+                scored = self.recommendation_engine.score_beard_styles(all_beards, face_shape)
+                beards[face_shape] = sorted(self._entry(score, style.id) for style, score in scored)
+
+            self._haircuts = haircuts
+            self._beards = beards
+            self._ready = True
+
+        print(f"✓ Tabla de rankings construida: {len(self._haircuts)} combinaciones de corte, "
+              f"{len(self._beards)} de barba")
+
+        if self.path:
+            self.save(self.path)
+
+    def _is_current(self) -> bool:
+        return self._ready and (
+            self._fingerprint(self._current_snapshot()) == self._fingerprint(self._snapshot)
+        )
+
+    def _ensure_ready(self):
+        if self._is_current():
+            return
+        with self._lock:
+            if self._is_current():
+                return
+            if not self._ready and self.path and os.path.exists(self.path) and self.load(self.path):
+                return
+            self.rebuild()
+
+    def invalidate(self):
+        """Descarta la tabla; se reconstruye en la siguiente consulta"""
+        with self._lock:
+            self._ready = False
+            self._haircuts = {}
+            self._beards = {}
+
+    # ------------------------------------------------------------------
+    # Actualización incremental
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _remove(ranking: Ranking, style_id: int):
+        for idx, (_, entry_id) in enumerate(ranking):
+            if entry_id == style_id:
+                del ranking[idx]
+                return
+
+    def update_haircut(self, style_id: int):
+        """Recoloca un estilo de corte (creado, editado o eliminado)"""
+        with self._lock:
+            if not self._ready:
+                return
+
+            style = self.style_catalog.get_haircut_by_id(style_id)
+            self._snapshot = self._current_snapshot()
+            for key, ranking in self._haircuts.items():
+                self._remove(ranking, style_id)
+                face_shape, gender, hair_length = key
+                if style is None or not self.style_catalog.haircut_matches(style, gender, hair_length):
+                    continue
+                score = self.recommendation_engine.calculate_style_score(
+                    style, face_shape, gender, hair_length
+                )
+                bisect.insort(ranking, self._entry(score, style_id))
+
+        if self.path:
+            self.save(self.path)
+
+    def update_beard(self, style_id: int):
+        """Recoloca un estilo de barba (creado, editado o eliminado)"""
+        with self._lock:
+            if not self._ready:
+                return
+
+            style = self.style_catalog.get_beard_by_id(style_id)
+            self._snapshot = self._current_snapshot()
+            for face_shape, ranking in self._beards.items():
+                self._remove(ranking, style_id)
+                if style is None:
+                    continue
+                score = self.recommendation_engine.calculate_beard_score(style, face_shape)
+                bisect.insort(ranking, self._entry(score, style_id))
+
+        if self.path:
+            self.save(self.path)
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def lookup_haircuts(
+        self,
+        face_shape: FaceShape,
+        gender: Gender,
+        hair_length: HairLength,
+        max_results: int = 5
+    ) -> List[Tuple[HaircutStyle, float]]:
+        """Top de cortes con su score para una combinación"""
+        self._ensure_ready()
+        ranking = self._haircuts.get((face_shape, gender, hair_length), [])[:max_results]
+        return self._resolve(ranking, self.style_catalog.get_haircut_by_id)
+
+    def lookup_beards(
+        self,
+        face_shape: FaceShape,
+        max_results: int = 5
+    ) -> List[Tuple[BeardStyle, float]]:
+        """Top de barbas con su score para una forma de rostro"""
+        self._ensure_ready()
+        ranking = self._beards.get(face_shape, [])[:max_results]
+        return self._resolve(ranking, self.style_catalog.get_beard_by_id)
+
+    @staticmethod
+    def _resolve(ranking: Ranking, getter) -> List[Tuple[object, float]]:
+        resolved = []
+        for neg_score, style_id in ranking:
+            style = getter(style_id)
+            if style is not None:
+                resolved.append((style, -neg_score))
+        return resolved
+
+    # ------------------------------------------------------------------
+    # Persistencia opcional
+    # ------------------------------------------------------------------
+
+    def catalog_fingerprint(self) -> str:
+        """Huella del catálogo para validar una tabla guardada"""
+        haircuts = sorted(
+            (style.id, repr(style), tuple(
+                gender.value for gender in Gender
+                if self.style_catalog.haircut_matches(style, gender=gender)
+            ))
+            for style in self.style_catalog.get_haircut_styles()
+        )
+        beards = sorted((style.id, repr(style)) for style in self.style_catalog.get_beard_styles())
+        return hashlib.sha1(repr((haircuts, beards)).encode('utf-8')).hexdigest()
+
+    def save(self, path: str):
+        """Guarda la tabla en JSON junto con la huella del catálogo"""
+        with self._lock:
+            data = {
+                'fingerprint': self.catalog_fingerprint(),
+                'haircuts': {
+                    '|'.join(part.value for part in key): ranking
+                    for key, ranking in self._haircuts.items()
+                },
+                'beards': {
+                    face_shape.value: ranking
+                    for face_shape, ranking in self._beards.items()
+                },
+            }
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+    def load(self, path: str) -> bool:
+        """Carga una tabla guardada si corresponde al catálogo actual"""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+
+            if data.get('fingerprint') != self.catalog_fingerprint():
+                print(f"⚠ Tabla de rankings desactualizada, se reconstruye: {path}")
+                return False
+
+            haircuts = {}
+            for key, ranking in data['haircuts'].items():
+                face_shape, gender, hair_length = key.split('|')
+                haircuts[(FaceShape(face_shape), Gender(gender), HairLength(hair_length))] = [
+                    (score, style_id) for score, style_id in ranking
+                ]
+            beards = {
+                FaceShape(face_shape): [(score, style_id) for score, style_id in ranking]
+                for face_shape, ranking in data['beards'].items()
+            }
+
+            with self._lock:
+                self._haircuts = haircuts
+                self._beards = beards
+                self._snapshot = self._current_snapshot()
+                self._ready = True
+
+            print(f"✓ Tabla de rankings cargada: {path}")
+            return True
+        except Exception as e:
+            print(f"✗ Error al cargar tabla de rankings: {e}")
+            return False
+
+
+_ranking_table = None
+_ranking_table_lock = threading.Lock()
+
+
+def get_ranking_table() -> RecommendationRankingTable:
+    """Tabla compartida por proceso (settings.RECOMMENDATION_TABLE_PATH la persiste)"""
+    global _ranking_table
+    if _ranking_table is None:
+        with _ranking_table_lock:
+            if _ranking_table is None:
+                from apps.recomendations.adapters.ml.recommendation_engine import StyleCatalogServiceImpl
+                from apps.recomendations.adapters.ml.vectorized_engine import VectorizedRecommendationEngine
+                from apps.recomendations.adapters.persistence.repositories import DjangoStyleRepository
+                from apps.recomendations.adapters.persistence.catalog_cache import style_catalog_cache
+
+                _ranking_table = RecommendationRankingTable(
+                    VectorizedRecommendationEngine(),
+                    StyleCatalogServiceImpl(DjangoStyleRepository()),
+                    path=getattr(settings, 'RECOMMENDATION_TABLE_PATH', None),
+                    snapshot_provider=style_catalog_cache.get_snapshot
+                )
+    return _ranking_table
@@ -2,7 +2,7 @@
 Motor de recomendaciones basado en reglas y catálogo de estilos.
 """
 
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from apps.recomendations.core.entities import (
     HaircutStyle,
     BeardStyle,
@@ -82,6 +82,35 @@ class RuleBasedRecommendationEngine:
         }
     }
     
+    def score_haircut_styles(
+        self,
+        styles: List[HaircutStyle],
+        face_shape: FaceShape,
+        gender: Gender,
+        hair_length: HairLength,
+        top_k: Optional[int] = None,
+        user_id=None
+    ) -> List[Tuple[HaircutStyle, float]]:
+        """
+        Ordena los estilos de corte por compatibilidad conservando el score
+        
+        Args:
+            top_k: Si se indica, solo se devuelven los top_k mejores
+            user_id: Ignorado (las reglas no dependen del usuario)
+            
+        Returns:
+            Lista de (estilo, score) ordenada por score descendente
+        """
+        scored_styles = [
+            (style, self.calculate_style_score(style, face_shape, gender, hair_length))
+            for style in styles
+        ]
+        
+        # Ordenar por score descendente (estable ante empates)
+        scored_styles.sort(key=lambda x: x[1], reverse=True)
+        
+        return scored_styles if top_k is None else scored_styles[:top_k]
+    
     def rank_haircut_styles(
         self,
         styles: List[HaircutStyle],
@@ -101,18 +130,33 @@ class RuleBasedRecommendationEngine:
         Returns:
             Lista ordenada de estilos más compatibles
         """
-        scored_styles = []
-        
-        for style in styles:
-            score = self.calculate_style_score(
-                style, face_shape, gender, hair_length
-            )
-            scored_styles.append((score, style))
+        scored_styles = self.score_haircut_styles(styles, face_shape, gender, hair_length)
+        return [style for style, _ in scored_styles]
+    
+    def score_beard_styles(
+        self,
+        styles: List[BeardStyle],
+        face_shape: FaceShape,
+        top_k: Optional[int] = None,
+        user_id=None
+    ) -> List[Tuple[BeardStyle, float]]:
+        """
+        Ordena los estilos de barba por compatibilidad conservando el score
         
-        # Ordenar por score descendente
-        scored_styles.sort(key=lambda x: x[0], reverse=True)
+        Args:
+            top_k: Si se indica, solo se devuelven los top_k mejores
+            user_id: Ignorado (las reglas no dependen del usuario)
+            
+        Returns:
+            Lista de (estilo, score) ordenada por score descendente
+        """
+        scored_styles = [
+            (style, self.calculate_beard_score(style, face_shape))
+            for style in styles
+        ]
+        scored_styles.sort(key=lambda x: x[1], reverse=True)
         
-        return [style for _, style in scored_styles]
+        return scored_styles if top_k is None else scored_styles[:top_k]
     
     def rank_beard_styles(
         self,
@@ -131,16 +175,8 @@ class RuleBasedRecommendationEngine:
         Returns:
             Lista ordenada de estilos más compatibles
         """
-        scored_styles = []
-        
-        for style in styles:
-            score = self.calculate_beard_score(style, face_shape)
-            scored_styles.append((score, style))
-        
-        # Ordenar por score descendente
-        scored_styles.sort(key=lambda x: x[0], reverse=True)
-        
-        return [style for _, style in scored_styles]
+        scored_styles = self.score_beard_styles(styles, face_shape)
+        return [style for style, _ in scored_styles]
     
     def calculate_style_score(
         self,
@@ -263,6 +299,19 @@ class StyleCatalogServiceImpl:
             face_shape=face_shape
         )
     
+    def haircut_matches(
+        self,
+        style: HaircutStyle,
+        gender: Gender = None,
+        hair_length: HairLength = None
+    ) -> bool:
+        """Indica si un estilo de corte pasa los filtros de get_haircut_styles"""
+        return self.style_repository.haircut_matches(
+            style,
+            gender=gender,
+            hair_length=hair_length
+        )
+    
     def get_haircut_by_id(self, style_id: int) -> HaircutStyle:
         """Obtiene un estilo de corte por ID"""
         return self.style_repository.get_haircut_by_id(style_id)
@@ -0,0 +1,169 @@
+"""
+Índice de estilos similares por contenido.
+
+Cada estilo se representa con un vector TF-IDF de sus tags, beneficios y
+descripción. Los k vecinos más cercanos (coseno) se precalculan al construir
+el índice y se guardan como matrices compactas (IDs int32 y scores float32),
+así que consultar "estilos similares" es O(1). El índice se reconstruye
+cuando cambia la instantánea del catálogo (al guardar un estilo).
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Palabras vacías en español (TfidfVectorizer solo trae la lista en inglés)
+SPANISH_STOP_WORDS = [
+    'a', 'al', 'algo', 'con', 'como', 'de', 'del', 'el', 'ella', 'en', 'es',
+    'esta', 'este', 'estilo', 'la', 'las', 'le', 'lo', 'los', 'mas', 'más',
+    'muy', 'o', 'para', 'pero', 'por', 'que', 'se', 'sin', 'su', 'sus', 'tu',
+    'tus', 'un', 'una', 'y',
+]
+
+
+def style_document(style) -> str:
+    """Texto indexado de un estilo: tags, beneficios y descripción"""
+    parts = list(style.tags or []) + list(style.benefits or []) + [style.description or '']
+    return ' '.join(str(part) for part in parts)
+
+
+@dataclass(frozen=True)
+class SimilarityTable:
+    """Vecinos precalculados de un tipo de estilo"""
+    ids: np.ndarray                          # (n,) IDs de estilo
+    rows: Dict[int, int]                     # ID -> fila
+    neighbors: np.ndarray                    # (n, k) filas vecinas, -1 = vacío
+    scores: np.ndarray                       # (n, k) similitud coseno
+    vectors: object = None                   # (n, términos) TF-IDF normalizado (CSR)
+    styles: Tuple[object, ...] = field(default_factory=tuple)
+
+    @classmethod
+    def build(cls, styles, k: int, chunk_size: int = 512) -> 'SimilarityTable':
+        styles = tuple(styles)
+        n = len(styles)
+        ids = np.fromiter((style.id for style in styles), dtype=np.int64, count=n)
+        rows = {int(style_id): row for row, style_id in enumerate(ids)}
+        k = max(min(k, n - 1), 0)
+        neighbors = np.full((n, k), -1, dtype=np.int32)
+        scores = np.zeros((n, k), dtype=np.float32)
+
+        documents = [style_document(style) for style in styles]
+        if n == 0 or not any(doc.strip() for doc in documents):
+            return cls(ids, rows, neighbors, scores, None, styles)
+
+        vectorizer = TfidfVectorizer(
+            strip_accents='unicode',
+            stop_words=SPANISH_STOP_WORDS,
+            sublinear_tf=True,
+            dtype=np.float32
+        )
+        try:
+            vectors = vectorizer.fit_transform(documents).tocsr()
+        except ValueError:
+            # Vocabulario vacío (solo palabras vacías)
+            return cls(ids, rows, neighbors, scores, None, styles)
+
+        if k:
+            # Similitud por bloques para no materializar la matriz n × n
+            for start in range(0, n, chunk_size):
+                stop = min(start + chunk_size, n)
+                block = (vectors[start:stop] @ vectors.T).toarray()
+                block[np.arange(stop - start), np.arange(start, stop)] = -1.0
+                top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+                top_scores = np.take_along_axis(block, top, axis=1)
+                order = np.argsort(-top_scores, axis=1, kind='stable')
+                neighbors[start:stop] = np.take_along_axis(top, order, axis=1)
+                scores[start:stop] = np.take_along_axis(top_scores, order, axis=1)
+
+        return cls(ids, rows, neighbors, scores, vectors, styles)
+
+    def similar(self, style_id: int, k: Optional[int] = None) -> List[Tuple[object, float]]:
+        row = self.rows.get(style_id)
+        if row is None:
+            return []
+        result = []
+        for neighbor, score in zip(self.neighbors[row][:k], self.scores[row][:k]):
+            if neighbor < 0 or score <= 0:
+                break
+            result.append((self.styles[neighbor], float(score)))
+        return result
+
+
+class StyleSimilarityIndex:
+    """Índices de cortes y barbas, ligados a la instantánea del catálogo"""
+
+    def __init__(self, snapshot_provider, k: int = 5):
+        self.snapshot_provider = snapshot_provider
+        self.k = k
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._haircuts: Optional[SimilarityTable] = None
+        self._beards: Optional[SimilarityTable] = None
+
+    def rebuild(self):
+        """Recalcula ambos índices desde la instantánea actual"""
+        with self._lock:
+            self._build(self.snapshot_provider())
+
+    def refresh(self):
+        """Reconstruye solo si el índice ya se había construido y el catálogo cambió"""
+        if self._snapshot is not None:
+            self._ensure_current()
+
+    def _build(self, snapshot):
+        self._haircuts = SimilarityTable.build(snapshot.haircuts, self.k)
+        self._beards = SimilarityTable.build(snapshot.beards, self.k)
+        self._snapshot = snapshot
+        print(f"✓ Índice de estilos similares construido: "
+              f"{len(self._haircuts.ids)} cortes, {len(self._beards.ids)} barbas (k={self.k})")
+
+    def _is_current(self, snapshot) -> bool:
+        """Misma huella de catálogo que la del índice construido"""
+        return self._snapshot is not None and snapshot.fingerprint == self._snapshot.fingerprint
+
+    def _ensure_current(self):
+        snapshot = self.snapshot_provider()
+        if self._is_current(snapshot):
+            return
+        with self._lock:
+            if not self._is_current(snapshot):
+                self._build(snapshot)
+
+    def haircut_table(self) -> SimilarityTable:
+        self._ensure_current()
+        return self._haircuts
+
+    def beard_table(self) -> SimilarityTable:
+        self._ensure_current()
+        return self._beards
+
+    def similar_haircuts(self, style_id: int, k: Optional[int] = None) -> List[Tuple[object, float]]:
+        """Cortes más parecidos a uno dado, con su similitud"""
+        return self.haircut_table().similar(style_id, k)
+
+    def similar_beards(self, style_id: int, k: Optional[int] = None) -> List[Tuple[object, float]]:
+        """Barbas más parecidas a una dada, con su similitud"""
+        return self.beard_table().similar(style_id, k)
+
+
+_similarity_index = None
+_similarity_index_lock = threading.Lock()
+
+
+def get_similarity_index() -> StyleSimilarityIndex:
+    """Índice compartido por proceso (settings.SIMILAR_STYLES_K vecinos por estilo)"""
+    global _similarity_index
+    if _similarity_index is None:
+        with _similarity_index_lock:
+            if _similarity_index is None:
+                from apps.recomendations.adapters.persistence.catalog_cache import style_catalog_cache
+
+                _similarity_index = StyleSimilarityIndex(
+                    style_catalog_cache.get_snapshot,
+                    k=getattr(settings, 'SIMILAR_STYLES_K', 5)
+                )
+    return _similarity_index
@@ -0,0 +1,184 @@
+"""
+Motor de recomendaciones vectorizado.
+
+Codifica el catálogo como columnas NumPy de bits (forma de rostro, género,
+longitud de cabello) más un vector de popularidad, calcula todos los scores
+en una sola expresión y selecciona el top-k con argpartition. Produce los
+mismos scores y el mismo orden que RuleBasedRecommendationEngine.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from apps.recomendations.core.entities import (
+    HaircutStyle,
+    BeardStyle,
+    FaceShape,
+    Gender,
+    HairLength
+)
+from apps.recomendations.adapters.ml.recommendation_engine import RuleBasedRecommendationEngine
+
+# Posición de cada valor dentro de su máscara de bits
+SHAPE_BITS = {shape: 1 << idx for idx, shape in enumerate(FaceShape)}
+GENDER_BITS = {gender: 1 << idx for idx, gender in enumerate(Gender)}
+LENGTH_BITS = {length: 1 << idx for idx, length in enumerate(HairLength)}
+
+
+def _mask(values, bits) -> int:
+    mask = 0
+    for value in values:
+        mask |= bits.get(value, 0)
+    return mask
+
+
+@dataclass(frozen=True)
+class EncodedCatalog:
+    """Catálogo codificado: una fila por estilo"""
+    styles: Tuple[object, ...]
+    shapes: np.ndarray
+    genders: np.ndarray
+    lengths: np.ndarray
+    popularity: np.ndarray
+
+
+class VectorizedRecommendationEngine(RuleBasedRecommendationEngine):
+    """
+    Motor basado en las mismas reglas, evaluado de forma vectorizada.
+
+    Las codificaciones se reutilizan mientras la lista de estilos recibida
+    contenga los mismos objetos (las entidades del catálogo en memoria son
+    compartidas entre peticiones).
+    """
+
+    def __init__(self, cache_size: int = 32):
+        self.cache_size = cache_size
+        # El motor es compartido entre hilos: la caché LRU se consulta y
+        # actualiza bajo el lock; la codificación se calcula fuera de él
+        self._encodings = OrderedDict()
+        self._encodings_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Codificación
+    # ------------------------------------------------------------------
+
+    def encode(self, styles: List[object]) -> EncodedCatalog:
+        """Codifica (o recupera de la caché) una lista de estilos"""
+        key = tuple(id(style) for style in styles)
+        with self._encodings_lock:
+            encoded = self._encodings.get(key)
+            if encoded is not None:
+                self._encodings.move_to_end(key)
+                return encoded
+
+        encoded = EncodedCatalog(
+            styles=tuple(styles),
+            shapes=np.fromiter(
+                (_mask(style.suitable_for_shapes, SHAPE_BITS) for style in styles),
+                dtype=np.uint8, count=len(styles)
+            ),
+            genders=np.fromiter(
+                (_mask(getattr(style, 'suitable_for_gender', ()), GENDER_BITS) for style in styles),
+                dtype=np.uint8, count=len(styles)
+            ),
+            lengths=np.fromiter(
+                (_mask(getattr(style, 'hair_length_required', ()), LENGTH_BITS) for style in styles),
+                dtype=np.uint8, count=len(styles)
+            ),
+            popularity=np.fromiter(
+                (style.popularity_score or 0.0 for style in styles),
+                dtype=np.float64, count=len(styles)
+            ),
+        )
+
+        with self._encodings_lock:
+            self._encodings[key] = encoded
+            self._encodings.move_to_end(key)
+            if len(self._encodings) > self.cache_size:
+                self._encodings.popitem(last=False)
+
+        return encoded
+
+    # ------------------------------------------------------------------
+    # Scores
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _has(mask: np.ndarray, bit: int) -> np.ndarray:
+        return ((mask & bit) != 0).astype(np.float64)
+
+    def haircut_scores(
+        self,
+        encoded: EncodedCatalog,
+        face_shape: FaceShape,
+        gender: Gender,
+        hair_length: HairLength
+    ) -> np.ndarray:
+        """Scores de todos los cortes (mismas sumas que calculate_style_score)"""
+        multiplier = self.FACE_SHAPE_RULES.get(face_shape, {}).get('haircut_multiplier', 1.0)
+        scores = 0.0 + self._has(encoded.shapes, SHAPE_BITS[face_shape]) * (0.5 * multiplier)
+        scores += self._has(encoded.genders, GENDER_BITS[gender]) * 0.2
+        scores += self._has(encoded.lengths, LENGTH_BITS[hair_length]) * 0.2
+        scores += 0.1 * (encoded.popularity / 100.0)
+        return np.minimum(scores, 1.0)
+
+    def beard_scores(self, encoded: EncodedCatalog, face_shape: FaceShape) -> np.ndarray:
+        """Scores de todas las barbas (mismas sumas que calculate_beard_score)"""
+        scores = 0.0 + self._has(encoded.shapes, SHAPE_BITS[face_shape]) * 0.7
+        scores += 0.3 * (encoded.popularity / 100.0)
+        return np.minimum(scores, 1.0)
+
+    @staticmethod
+    def top_k(scores: np.ndarray, k: Optional[int] = None) -> np.ndarray:
+        """
+        Índices de los k mejores scores, en orden descendente y con empates
+        resueltos por posición (igual que un sort estable)
+        """
+        n = len(scores)
+        if k is None or k >= n:
+            return np.lexsort((np.arange(n), -scores))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+
+        # Umbral del k-ésimo score; los empates en el umbral se toman por posición
+        threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        above = np.flatnonzero(scores > threshold)
+        tied = np.flatnonzero(scores == threshold)[:k - len(above)]
+        selected = np.concatenate((above, tied))
+        return selected[np.lexsort((selected, -scores[selected]))]
+
+    # ------------------------------------------------------------------
+    # API del motor (devuelve estilos junto con su score)
+    # ------------------------------------------------------------------
+
+    def score_haircut_styles(
+        self,
+        styles: List[HaircutStyle],
+        face_shape: FaceShape,
+        gender: Gender,
+        hair_length: HairLength,
+        top_k: Optional[int] = None,
+        user_id=None
+    ) -> List[Tuple[HaircutStyle, float]]:
+        if not styles:
+            return []
+        encoded = self.encode(styles)
+        scores = self.haircut_scores(encoded, face_shape, gender, hair_length)
+        return [(encoded.styles[idx], float(scores[idx])) for idx in self.top_k(scores, top_k)]
+
+    def score_beard_styles(
+        self,
+        styles: List[BeardStyle],
+        face_shape: FaceShape,
+        top_k: Optional[int] = None,
+        user_id=None
+    ) -> List[Tuple[BeardStyle, float]]:
+        if not styles:
+            return []
+        encoded = self.encode(styles)
+        scores = self.beard_scores(encoded, face_shape)
+        return [(encoded.styles[idx], float(scores[idx])) for idx in self.top_k(scores, top_k)]
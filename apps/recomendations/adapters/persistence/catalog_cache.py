@@ -0,0 +1,161 @@
+"""
+Caché en memoria del catálogo de estilos.
+
+El catálogo solo cambia cuando un administrador edita un estilo, así que se
+convierte a entidades una sola vez y se comparte entre peticiones. Las señales
+post_save/post_delete de los modelos de estilo invalidan la instantánea.
+
+Cada instantánea lleva una huella de su contenido: si al reconstruirla (por
+caducidad o invalidación) el catálogo no cambió se conserva la anterior, y la
+tabla de rankings y el índice de similares no se recalculan.
+"""
+
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.recomendations.core.entities import HaircutStyle, BeardStyle
+from apps.shared.utils.caching import invalidation_timeout
+
+DEFAULT_SHARED_KEY = 'style_catalog_version'
+DEFAULT_LOCAL_TTL = 60
+
+
+@dataclass(frozen=True)
+class StyleCatalogSnapshot:
+    """
+    Instantánea inmutable del catálogo. Las entidades son compartidas:
+    no deben modificarse.
+    """
+    version: int
+    fingerprint: str = ''
+    haircuts: Tuple[HaircutStyle, ...] = ()
+    active_haircut_ids: FrozenSet[int] = frozenset()
+    haircut_genders: Dict[int, str] = field(default_factory=dict)
+    haircuts_by_id: Dict[int, HaircutStyle] = field(default_factory=dict)
+    beards: Tuple[BeardStyle, ...] = ()
+    beards_by_id: Dict[int, BeardStyle] = field(default_factory=dict)
+
+
+class StyleCatalogCache:
+    """
+    Instantánea versionada del catálogo, reconstruida bajo demanda.
+
+    La versión también se guarda en el backend de caché (clave
+    settings.STYLE_CATALOG_CACHE_KEY) para propagar la invalidación entre
+    workers. Con una caché por proceso (LocMemCache) esa propagación no llega
+    a otros workers, así que la instantánea caduca además a los
+    STYLE_CATALOG_LOCAL_TTL segundos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: Optional[StyleCatalogSnapshot] = None
+        self._version = 0
+        self._built_version = None
+        self._shared_version = None
+        self._built_at = 0.0
+
+    @property
+    def shared_key(self) -> Optional[str]:
+        return getattr(settings, 'STYLE_CATALOG_CACHE_KEY', DEFAULT_SHARED_KEY)
+
+    @staticmethod
+    def _ttl() -> Optional[float]:
+        """Sin caducidad con caché compartida; STYLE_CATALOG_LOCAL_TTL con caché local"""
+        return invalidation_timeout(None, getattr(settings, 'STYLE_CATALOG_LOCAL_TTL', DEFAULT_LOCAL_TTL))
+
+    def _is_fresh(self, snapshot, shared_version) -> bool:
+        if snapshot is None or shared_version != self._shared_version:
+            return False
+        if self._built_version != self._version:
+            return False
+        ttl = self._ttl()
+        return ttl is None or time.monotonic() - self._built_at < ttl
+
+    def _read_shared_version(self):
+        if not self.shared_key:
+            return None
+        return cache.get(self.shared_key, 0)
+
+    def invalidate(self, **kwargs):
+        """Descarta la instantánea (acepta los argumentos de las señales)"""
+        with self._lock:
+            # Se conserva la instantánea para compararla con la reconstruida
+            self._version += 1
+
+        if self.shared_key:
+            try:
+                cache.incr(self.shared_key)
+            except ValueError:
+                cache.set(self.shared_key, 1, timeout=None)
+
+    def get_snapshot(self) -> StyleCatalogSnapshot:
+        """Instantánea actual; se reconstruye si fue invalidada"""
+        shared_version = self._read_shared_version()
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot, shared_version):
+            return snapshot
+
+        with self._lock:
+            if not self._is_fresh(self._snapshot, shared_version):
+                snapshot = self._build(self._version)
+                if self._snapshot is None or snapshot.fingerprint != self._snapshot.fingerprint:
+                    self._snapshot = snapshot
+                self._built_version = self._version
+                self._shared_version = shared_version
+                self._built_at = time.monotonic()
+            return self._snapshot
+
+    def _build(self, version: int) -> StyleCatalogSnapshot:
+        """Convierte todos los estilos a entidades (una sola consulta por modelo)"""
+        from apps.recomendations.models import HaircutStyleModel, BeardStyleModel
+        from apps.recomendations.adapters.persistence.repositories import DjangoStyleRepository
+
+        repository = DjangoStyleRepository()
+        haircuts = []
+        haircut_genders = {}
+        haircuts_by_id = {}
+        for model in HaircutStyleModel.objects.all():
+            entity = repository._haircut_model_to_entity(model)
+            haircuts_by_id[model.id] = entity
+            haircut_genders[model.id] = model.gender
+            if model.is_active:
+                haircuts.append(entity)
+
+        beards = []
+        beards_by_id = {}
+        for model in BeardStyleModel.objects.all():
+            entity = repository._beard_model_to_entity(model)
+            beards_by_id[model.id] = entity
+            beards.append(entity)
+
+        fingerprint = hashlib.sha1(repr((
+            sorted((style_id, repr(entity)) for style_id, entity in haircuts_by_id.items()),
+            sorted(haircut_genders.items()),
+            [(style.id, repr(style)) for style in beards],
+        )).encode('utf-8')).hexdigest()
+
+        if self._snapshot is None or self._snapshot.fingerprint != fingerprint:
+            print(f"✓ Catálogo de estilos cargado (v{version}): "
+                  f"{len(haircuts)} cortes activos, {len(beards)} barbas")
+
+        return StyleCatalogSnapshot(
+            version=version,
+            fingerprint=fingerprint,
+            haircuts=tuple(haircuts),
+            active_haircut_ids=frozenset(style.id for style in haircuts),
+            haircut_genders=haircut_genders,
+            haircuts_by_id=haircuts_by_id,
+            beards=tuple(beards),
+            beards_by_id=beards_by_id,
+        )
+
+
+# Instancia compartida por proceso
+style_catalog_cache = StyleCatalogCache()
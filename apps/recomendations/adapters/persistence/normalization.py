@@ -0,0 +1,76 @@
+"""
+Normalización de los valores de estilo guardados en BD.
+
+Los campos JSON de formas de rostro, géneros y longitudes se guardan siempre
+con los valores canónicos de los enums (p. ej. 'ovalada' -> 'oval'), de modo
+que las consultas pueden filtrar por contención exacta en la base de datos.
+"""
+
+from typing import Dict, Iterable, List
+
+from apps.recomendations.core.entities import FaceShape, Gender, HairLength
+
+FACE_SHAPE_DB_TO_ENUM = {
+    'oval': FaceShape.OVAL,
+    'ovalada': FaceShape.OVAL,  # <-- Mapeo para compatibilidad
+    'ovalado': FaceShape.OVAL,
+    'redonda': FaceShape.REDONDO,
+    'redondo': FaceShape.REDONDO,
+    'cuadrada': FaceShape.CUADRADO,
+    'cuadrado': FaceShape.CUADRADO,
+    'corazón': FaceShape.CORAZON,
+    'corazon': FaceShape.CORAZON,
+    'diamante': FaceShape.DIAMANTE,
+    'triangular': FaceShape.TRIANGULAR,
+}
+GENDER_DB_TO_ENUM = {
+    'men': Gender.HOMBRE,
+    'male': Gender.HOMBRE,
+    'hombre': Gender.HOMBRE,
+    'masculino': Gender.HOMBRE,
+    'women': Gender.MUJER,
+    'female': Gender.MUJER,
+    'mujer': Gender.MUJER,
+    'femenino': Gender.MUJER,
+}
+
+HAIR_LENGTH_DB_TO_ENUM = {
+    'corto': HairLength.CORTO,
+    'short': HairLength.CORTO,
+    'medio': HairLength.MEDIO,
+    'medium': HairLength.MEDIO,
+    'largo': HairLength.LARGO,
+    'long': HairLength.LARGO,
+}
+
+
+def normalize_values(values: Iterable, mapping: Dict) -> List[str]:
+    """
+    Convierte una lista de valores de BD a los valores canónicos del enum.
+
+    Conserva el orden y elimina duplicados. Los valores no reconocidos se
+    guardan en minúsculas (no coinciden con ningún filtro) y se avisa.
+    """
+    normalized = []
+    for value in values or []:
+        key = str(value).lower().strip()
+        enum_value = mapping.get(key)
+        if enum_value is not None:
+            key = enum_value.value
+        else:
+            print(f"⚠️ WARNING: Valor '{value}' no reconocido al normalizar estilo")
+        if key not in normalized:
+            normalized.append(key)
+    return normalized
+
+
+def normalize_haircut_fields(model):
+    """Normaliza in situ los campos JSON de un HaircutStyleModel"""
+    model.suitable_for_shapes = normalize_values(model.suitable_for_shapes, FACE_SHAPE_DB_TO_ENUM)
+    model.suitable_for_gender = normalize_values(model.suitable_for_gender, GENDER_DB_TO_ENUM)
+    model.hair_length_required = normalize_values(model.hair_length_required, HAIR_LENGTH_DB_TO_ENUM)
+
+
+def normalize_beard_fields(model):
+    """Normaliza in situ los campos JSON de un BeardStyleModel"""
+    model.suitable_for_shapes = normalize_values(model.suitable_for_shapes, FACE_SHAPE_DB_TO_ENUM)
@@ -2,7 +2,15 @@
 Implementación de los repositorios usando Django ORM.
 """
 
+import json
 from typing import List, Optional
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Max, TextField
+from django.db.models.functions import Cast
+from django.utils import timezone
+
 from apps.recomendations.core.entities import (
     Recommendation, 
     HaircutStyle, 
@@ -13,40 +21,12 @@ from apps.recomendations.core.entities import (
     DifficultyLevel,
     MaintenanceLevel
 )
-from ...models import RecommendationModel, HaircutStyleModel, BeardStyleModel
-
-FACE_SHAPE_DB_TO_ENUM = {
-    'oval': FaceShape.OVAL,
-    'ovalada': FaceShape.OVAL,  # <-- Mapeo para compatibilidad
-    'ovalado': FaceShape.OVAL,
-    'redonda': FaceShape.REDONDO,
-    'redondo': FaceShape.REDONDO,
-    'cuadrada': FaceShape.CUADRADO,
-    'cuadrado': FaceShape.CUADRADO,
-    'corazón': FaceShape.CORAZON,
-    'corazon': FaceShape.CORAZON,
-    'diamante': FaceShape.DIAMANTE,
-    'triangular': FaceShape.TRIANGULAR,
-}
-GENDER_DB_TO_ENUM = {
-    'men': Gender.HOMBRE,
-    'male': Gender.HOMBRE,
-    'hombre': Gender.HOMBRE,
-    'masculino': Gender.HOMBRE,
-    'women': Gender.MUJER,
-    'female': Gender.MUJER,
-    'mujer': Gender.MUJER,
-    'femenino': Gender.MUJER,
-}
-
-HAIR_LENGTH_DB_TO_ENUM = {
-    'corto': HairLength.CORTO,
-    'short': HairLength.CORTO,
-    'medio': HairLength.MEDIO,
-    'medium': HairLength.MEDIO,
-    'largo': HairLength.LARGO,
-    'long': HairLength.LARGO,
-}
+from apps.auth_app.adapters.persistence.models import ProfileModel
+from apps.reports.adapters.persistence.rollups import DjangoRollupRepository
+from ...models import RecommendationModel, RecommendationStyleModel, HaircutStyleModel, BeardStyleModel
+from .catalog_cache import style_catalog_cache
+from .normalization import FACE_SHAPE_DB_TO_ENUM, GENDER_DB_TO_ENUM, HAIR_LENGTH_DB_TO_ENUM
+
 
 class DjangoRecommendationRepository:
     """Repositorio de recomendaciones usando Django ORM"""
@@ -61,6 +41,9 @@ class DjangoRecommendationRepository:
         Returns:
             Recomendación guardada con ID asignado
         """
+        haircut_ids = [style.id for style in recommendation.haircut_styles if style.id]
+        beard_ids = [style.id for style in recommendation.beard_styles if style.id]
+
         # Convertir enums a strings para guardar
         model = RecommendationModel(
             user_id=recommendation.user_id,
@@ -68,10 +51,17 @@ class DjangoRecommendationRepository:
             gender=recommendation.gender.value,
             hair_length=recommendation.hair_length.value,
             confidence_score=recommendation.confidence_score,
-            haircut_styles_ids=[style.id for style in recommendation.haircut_styles if style.id],
-            beard_styles_ids=[style.id for style in recommendation.beard_styles if style.id],
+            haircut_styles_ids=json.dumps(haircut_ids),
+            beard_styles_ids=json.dumps(beard_ids),
         )
-        model.save()
+        with transaction.atomic():
+            model.save()
+            RecommendationStyleModel.objects.bulk_create(
+                RecommendationStyleModel.links_for(model, haircut_ids, beard_ids)
+            )
+            DjangoRollupRepository().record_recommendations(
+                [(model.created_at, model.face_shape, haircut_ids, beard_ids)]
+            )
         
         # Actualizar el ID en la entidad
         recommendation.id = model.id
@@ -79,6 +69,101 @@ class DjangoRecommendationRepository:
         
         return recommendation
 
+    def save_many(self, recommendations: List[Recommendation]) -> List[Recommendation]:
+        """
+        Guarda muchas recomendaciones y actualiza los perfiles en una sola
+        transacción (bulk_create + bulk_update)
+        
+        El face_shape del perfil se actualiza solo si la nueva recomendación
+        iguala o supera el mejor confidence_score previo del usuario.
+        
+        Args:
+            recommendations: Entidades de recomendación
+            
+        Returns:
+            Las mismas recomendaciones con ID y fecha asignados
+        """
+        if not recommendations:
+            return []
+
+        style_ids = [
+            (
+                [style.id for style in recommendation.haircut_styles if style.id],
+                [style.id for style in recommendation.beard_styles if style.id],
+            )
+            for recommendation in recommendations
+        ]
+        models = [
+            RecommendationModel(
+                user_id=recommendation.user_id,
+                face_shape=recommendation.face_shape.value,
+                gender=recommendation.gender.value,
+                hair_length=recommendation.hair_length.value,
+                confidence_score=recommendation.confidence_score,
+                haircut_styles_ids=json.dumps(haircut_ids),
+                beard_styles_ids=json.dumps(beard_ids),
+            )
+            for recommendation, (haircut_ids, beard_ids) in zip(recommendations, style_ids)
+        ]
+
+        # Mejor recomendación del lote por usuario (a igualdad gana la última).
+        # Las claves son str para casar UUID y texto
+        best_by_user = {}
+        for recommendation in recommendations:
+            user_key = str(recommendation.user_id)
+            best = best_by_user.get(user_key)
+            if best is None or recommendation.confidence_score >= best.confidence_score:
+                best_by_user[user_key] = recommendation
+
+        with transaction.atomic():
+            previous_best = {
+                str(user_id): best
+                for user_id, best in RecommendationModel.objects
+                .filter(user_id__in=best_by_user)
+                .values('user_id')
+                .annotate(best=Max('confidence_score'))
+                .values_list('user_id', 'best')
+            }
+
+            RecommendationModel.objects.bulk_create(models, batch_size=500)
+            RecommendationStyleModel.objects.bulk_create(
+                [
+                    link
+                    for model, (haircut_ids, beard_ids) in zip(models, style_ids)
+                    for link in RecommendationStyleModel.links_for(model, haircut_ids, beard_ids)
+                ],
+                batch_size=1000
+            )
+            DjangoRollupRepository().record_recommendations(
+                (model.created_at, model.face_shape, haircut_ids, beard_ids)
+                for model, (haircut_ids, beard_ids) in zip(models, style_ids)
+            )
+
+            profiles = {
+                str(profile.user_id): profile
+                for profile in ProfileModel.objects.filter(user_id__in=best_by_user)
+            }
+            now = timezone.now()
+            to_update = []
+            to_create = []
+            for user_id, best in best_by_user.items():
+                profile = profiles.get(user_id)
+                if profile is None:
+                    to_create.append(ProfileModel(user_id=best.user_id, face_shape=best.face_shape.value))
+                elif best.confidence_score >= previous_best.get(user_id, 0.0):
+                    profile.face_shape = best.face_shape.value
+                    profile.updated_at = now
+                    to_update.append(profile)
+
+            ProfileModel.objects.bulk_update(to_update, ['face_shape', 'updated_at'], batch_size=500)
+            ProfileModel.objects.bulk_create(to_create, batch_size=500)
+
+        for recommendation, model in zip(recommendations, models):
+            recommendation.id = model.id
+            recommendation.created_at = model.created_at
+
+        return recommendations
+
     def get_by_user(self, user_id: int, limit: int = 100) -> List[Recommendation]:
         """
         Obtiene las recomendaciones de un usuario
@@ -143,53 +228,120 @@ class DjangoStyleRepository:
     """Repositorio de estilos usando Django ORM"""
     
     
-    def get_haircuts(
+    # Valores de BD del campo gender aceptados para cada género
+    GENDER_DB_VALUES = {
+        Gender.HOMBRE: ['men', 'male', 'hombre'],
+        Gender.MUJER: ['women', 'female', 'mujer']
+    }
+
+    def haircut_matches(
+        self,
+        style: HaircutStyle,
+        gender: Gender = None,
+        hair_length: HairLength = None,
+        face_shape: FaceShape = None,
+        snapshot=None
+    ) -> bool:
+        """
+        Indica si un estilo de corte activo pasa los filtros de get_haircuts
+        """
+        snapshot = snapshot or style_catalog_cache.get_snapshot()
+
+        if style.id not in snapshot.active_haircut_ids:
+            return False
+
+        # 🔧 Filtro de género sobre el valor de BD del estilo
+        db_values = self.GENDER_DB_VALUES.get(gender, []) if gender else []
+        if db_values and snapshot.haircut_genders.get(style.id) not in db_values:
+            return False
+
+        if face_shape and face_shape not in style.suitable_for_shapes:
+            return False
+
+        if hair_length and hair_length not in style.hair_length_required:
+            return False
+
+        return True
+
+    @staticmethod
+    def _uses_catalog_cache() -> bool:
+        return getattr(settings, 'STYLE_CATALOG_CACHE', True)
+
+    @staticmethod
+    def _filter_contains(queryset, field: str, value: str):
+        """
+        Filtra las filas cuya lista JSON `field` contiene el valor canónico.
+
+        En PostgreSQL es una contención JSONB (@>) respaldada por los índices
+        GIN de la migración 0007. SQLite no soporta `contains` sobre JSONField:
+        como los valores están normalizados, se busca el token '"valor"' en el
+        JSON serializado (sin índice; pensado para tests y desarrollo).
+        """
+        if connections[queryset.db].features.supports_json_field_contains:
+            return queryset.filter(**{f'{field}__contains': [value]})
+
+        alias = f'{field}_text'
+        return queryset.alias(**{alias: Cast(field, TextField())}).filter(
+            **{f'{alias}__contains': f'"{value}"'}
+        )
+
+    def query_haircuts(
         self,
         gender: Gender = None,
         hair_length: HairLength = None,
         face_shape: FaceShape = None
     ) -> List[HaircutStyle]:
         """
-        Obtiene estilos de corte con filtros opcionales
+        Obtiene de la BD solo los cortes activos que pasan los filtros
         """
-        from apps.recomendations.models import HaircutStyleModel
-
         queryset = HaircutStyleModel.objects.filter(is_active=True)
 
-        # 🔧 Filtro de género corregido
-        if gender:
-            # Mapear enum a valor de BD
-            gender_db_values = {
-                Gender.HOMBRE: ['men', 'male', 'hombre'],
-                Gender.MUJER: ['women', 'female', 'mujer']
-            }
-            db_values = gender_db_values.get(gender, [])
-            if db_values:
-                queryset = queryset.filter(gender__in=db_values)
+        db_values = self.GENDER_DB_VALUES.get(gender, []) if gender else []
+        if db_values:
+            queryset = queryset.filter(gender__in=db_values)
 
-        # 🔧 NO filtrar por face_shape o hair_length aquí
-        # Esos filtros se aplican después de convertir a entidades
-        # porque la BD usa strings y las entidades usan enums
+        if face_shape:
+            queryset = self._filter_contains(queryset, 'suitable_for_shapes', face_shape.value)
 
-        # Convertir a entidades
-        all_styles = [self._haircut_model_to_entity(model) for model in queryset]
+        if hair_length:
+            queryset = self._filter_contains(queryset, 'hair_length_required', hair_length.value)
 
-        # 🔧 Aplicar filtros de face_shape y hair_length DESPUÉS de conversión
-        filtered_styles = all_styles
+        return [self._haircut_model_to_entity(model) for model in queryset]
+
+    def query_beards(self, face_shape: Optional[FaceShape] = None) -> List[BeardStyle]:
+        """
+        Obtiene de la BD solo las barbas que pasan el filtro de forma
+        """
+        queryset = BeardStyleModel.objects.all()
 
         if face_shape:
-            filtered_styles = [
-                style for style in filtered_styles 
-                if face_shape in style.suitable_for_shapes
-            ]
+            queryset = self._filter_contains(queryset, 'suitable_for_shapes', face_shape.value)
 
-        if hair_length:
-            filtered_styles = [
-                style for style in filtered_styles 
-                if hair_length in style.hair_length_required
-            ]
+        return [self._beard_model_to_entity(model) for model in queryset]
 
-        return filtered_styles
+    def get_haircuts(
+        self,
+        gender: Gender = None,
+        hair_length: HairLength = None,
+        face_shape: FaceShape = None
+    ) -> List[HaircutStyle]:
+        """
+        Obtiene estilos de corte con filtros opcionales (desde la caché del
+        catálogo, o desde la BD si settings.STYLE_CATALOG_CACHE es False)
+
+        Con la caché activa (por defecto) no se consulta la BD por petición:
+        los filtros se aplican en memoria sobre la instantánea. query_haircuts
+        (solo filas candidatas, con índices GIN) es la vía sin caché.
+        """
+        if not self._uses_catalog_cache():
+            return self.query_haircuts(gender, hair_length, face_shape)
+
+        snapshot = style_catalog_cache.get_snapshot()
+
+        return [
+            style for style in snapshot.haircuts
+            if self.haircut_matches(style, gender, hair_length, face_shape, snapshot)
+        ]
 
     def get_beards(
         self,
@@ -206,30 +358,24 @@ class DjangoStyleRepository:
         Returns:
             Lista de estilos de barba
         """
-        queryset = BeardStyleModel.objects.all()
+        if not self._uses_catalog_cache():
+            return self.query_beards(face_shape)
+
+        styles = list(style_catalog_cache.get_snapshot().beards)
         
         # Aplicar filtros
         if face_shape:
-            queryset = queryset.filter(suitable_for_shapes__contains=face_shape.value)
+            styles = [style for style in styles if face_shape in style.suitable_for_shapes]
         
-        # Convertir modelos Django a entidades de dominio
-        return [self._beard_model_to_entity(model) for model in queryset]
+        return styles
 
     def get_haircut_by_id(self, style_id: int) -> Optional[HaircutStyle]:
         """Obtiene un estilo de corte por ID"""
-        try:
-            model = HaircutStyleModel.objects.get(id=style_id)
-            return self._haircut_model_to_entity(model)
-        except HaircutStyleModel.DoesNotExist:
-            return None
+        return style_catalog_cache.get_snapshot().haircuts_by_id.get(style_id)
 
     def get_beard_by_id(self, style_id: int) -> Optional[BeardStyle]:
         """Obtiene un estilo de barba por ID"""
-        try:
-            model = BeardStyleModel.objects.get(id=style_id)
-            return self._beard_model_to_entity(model)
-        except BeardStyleModel.DoesNotExist:
-            return None
+        return style_catalog_cache.get_snapshot().beards_by_id.get(style_id)
 
     def _haircut_model_to_entity(self, model):
         """
@@ -9,6 +9,8 @@ app_name = 'recomendations'
 
 urlpatterns = [
     
+    path('generate/bulk/', views.generate_bulk, name='generate_bulk'),
+
     path('haircut-styles/', views.haircuts_list, name='haircuts_list'),
     path('haircut-styles/create/', views.haircut_create, name='haircut_create'),
     path('haircut-styles/<int:pk>/', views.haircut_detail, name='haircut_detail'),
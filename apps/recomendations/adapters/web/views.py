@@ -6,18 +6,23 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 import json
+import uuid
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.core.paginator import Paginator
+from django.conf import settings
 from django.db.models import Q
-from apps.auth_app.adapters.persistence.models import ProfileModel
+from apps.shared.utils.pagination import cached_count, keyset_paginate
+from apps.shared.utils.validators import is_admin
+from apps.auth_app.adapters.persistence.models import ProfileModel, UserModel
 from apps.recomendations.models import HaircutStyleModel, BeardStyleModel, RecommendationModel,FACE_SHAPE_CHOICES, DIFFICULTY_CHOICES
 from apps.recomendations.adapters.web.forms import HaircutStyleForm, BeardStyleForm
 from apps.recomendations.core.use_cases import (
     GenerateHaircutRecommendationsUseCase,
     GenerateBeardRecommendationsUseCase,
+    GenerateBulkRecommendationsUseCase,
     SaveRecommendationUseCase,
     GetRecommendationHistoryUseCase
 )
@@ -31,16 +36,17 @@ from apps.recomendations.adapters.persistence.repositories import (
     DjangoRecommendationRepository,
     DjangoStyleRepository
 )
-from apps.recomendations.adapters.ml.recommendation_engine import (
-    RuleBasedRecommendationEngine,
-    StyleCatalogServiceImpl
-)
+from apps.recomendations.adapters.ml.recommendation_engine import StyleCatalogServiceImpl
+from apps.recomendations.adapters.ml.vectorized_engine import VectorizedRecommendationEngine
+from apps.recomendations.adapters.ml.collaborative_engine import serving_dependencies
+from apps.recomendations.adapters.ml.diversity import get_diversity_reranker
+from apps.recomendations.adapters.ml.similarity_index import get_similarity_index
 
 
 # Inicializar dependencias (singleton)
 style_repository = DjangoStyleRepository()
 recommendation_repository = DjangoRecommendationRepository()
-recommendation_engine = RuleBasedRecommendationEngine()
+recommendation_engine = VectorizedRecommendationEngine()
 style_catalog = StyleCatalogServiceImpl(style_repository)
 
 
@@ -82,38 +88,39 @@ def generate_admin(request):
                 'error': f'Valor inválido: {str(e)}'
             }, status=400)
         
-        # Generar recomendaciones de corte
+        # Generar recomendaciones de corte (personalizadas con el historial del usuario)
+        viewer_id = request.user.id if request.user.is_authenticated else None
+        engine, ranking_table = serving_dependencies(recommendation_engine)
+        reranker = get_diversity_reranker()
         haircut_use_case = GenerateHaircutRecommendationsUseCase(
-            recommendation_engine, style_catalog
+            engine, style_catalog, ranking_table=ranking_table, reranker=reranker
             )
-        haircut_styles = haircut_use_case.execute(
+        scored_haircuts = haircut_use_case.execute_scored(
             face_shape=face_shape,
             gender=gender,
             hair_length=hair_length,
-            max_results=6
+            max_results=6,
+            user_id=viewer_id
         )
+        haircut_styles = [style for style, _ in scored_haircuts]
         
         # Generar recomendaciones de barba (solo hombres)
         beard_styles = []
         if gender == Gender.HOMBRE:
             beard_use_case = GenerateBeardRecommendationsUseCase(
-                recommendation_engine, style_catalog
+                engine, style_catalog, ranking_table=ranking_table, reranker=reranker
                 )
             beard_styles = beard_use_case.execute(
                 face_shape=face_shape,
                 gender=gender,
-                max_results=4
+                max_results=4,
+                user_id=viewer_id
             )
         
         # Calcular confidence score
         confidence = 0.0
         if haircut_styles:
-            confidence = sum(
-                recommendation_engine.calculate_style_score(
-                    style, face_shape, gender, hair_length
-                )
-                for style in haircut_styles
-            ) / len(haircut_styles)
+            confidence = sum(score for _, score in scored_haircuts) / len(scored_haircuts)
         
         # Crear y guardar recomendación
         recommendation = Recommendation(
@@ -142,6 +149,8 @@ def generate_admin(request):
         # Obtener tips
         tips = recommendation_engine.get_face_shape_tips(face_shape)
         
+        similarity_index = get_similarity_index()
+        
         # Formatear respuesta
         return JsonResponse({
             'success': True,
@@ -156,7 +165,11 @@ def generate_admin(request):
                     'image_url': style.image_url,
                     'benefits': style.benefits,
                     'difficulty_level': style.difficulty_level.value,
-                    'popularity_score': style.popularity_score
+                    'popularity_score': style.popularity_score,
+                    'similar_styles': [
+                        {'id': similar.id, 'name': similar.name, 'similarity': score}
+                        for similar, score in similarity_index.similar_haircuts(style.id, k=3)
+                    ]
                 }
                 for style in haircut_styles
             ],
@@ -180,8 +193,96 @@ def generate_admin(request):
         }, status=500)
 
 
-def is_admin(user):
-    return user.is_authenticated and user.groups.filter(name='Administrador').exists()
+@login_required
+@user_passes_test(is_admin)
+@require_http_methods(["POST"])
+def generate_bulk(request):
+    """
+    Genera recomendaciones para muchos perfiles en una sola llamada
+    (solo administradores: crea recomendaciones y actualiza perfiles de
+    cualquier usuario)
+    
+    POST /recomendations/generate/bulk/
+    Body: {
+        "profiles": [
+            {"user_id": "<uuid>", "face_shape": "oval", "gender": "hombre", "hair_length": "medio"},
+            ...
+        ]
+    }
+    """
+    try:
+        data = json.loads(request.body)
+        entries = data.get('profiles')
+        
+        if not isinstance(entries, list) or not entries:
+            return JsonResponse({
+                'error': 'profiles debe ser una lista no vacía'
+            }, status=400)
+        
+        max_profiles = getattr(settings, 'BULK_RECOMMENDATION_MAX_PROFILES', 1000)
+        if len(entries) > max_profiles:
+            return JsonResponse({
+                'error': f'Máximo {max_profiles} perfiles por llamada'
+            }, status=400)
+        
+        # Validar todas las entradas antes de calcular nada
+        profiles = []
+        for index, entry in enumerate(entries):
+            try:
+                profiles.append((
+                    str(uuid.UUID(str(entry['user_id']))),
+                    FaceShape(str(entry['face_shape']).lower()),
+                    Gender(str(entry.get('gender', 'hombre')).lower()),
+                    HairLength(str(entry.get('hair_length', 'medio')).lower())
+                ))
+            except (KeyError, TypeError, ValueError) as e:
+                return JsonResponse({
+                    'error': f'Perfil {index} inválido: {str(e)}'
+                }, status=400)
+        
+        user_ids = {user_id for user_id, _, _, _ in profiles}
+        existing_ids = {
+            str(user_id)
+            for user_id in UserModel.objects.filter(id__in=user_ids).values_list('id', flat=True)
+        }
+        unknown_ids = sorted(user_ids - existing_ids)
+        if unknown_ids:
+            return JsonResponse({
+                'error': 'Usuarios inexistentes',
+                'user_ids': unknown_ids
+            }, status=400)
+        
+        engine, ranking_table = serving_dependencies(recommendation_engine)
+        bulk_use_case = GenerateBulkRecommendationsUseCase(
+            engine,
+            style_catalog,
+            recommendation_repository,
+            ranking_table=ranking_table,
+            reranker=get_diversity_reranker()
+        )
+        recommendations = bulk_use_case.execute(profiles, max_haircuts=6, max_beards=4)
+        
+        return JsonResponse({
+            'success': True,
+            'count': len(recommendations),
+            'recommendations': [
+                {
+                    'recommendation_id': recommendation.id,
+                    'user_id': recommendation.user_id,
+                    'face_shape': recommendation.face_shape.value,
+                    'confidence_score': recommendation.confidence_score,
+                    'haircut_style_ids': [style.id for style in recommendation.haircut_styles],
+                    'beard_style_ids': [style.id for style in recommendation.beard_styles],
+                }
+                for recommendation in recommendations
+            ]
+        })
+        
+    except Exception as e:
+        return JsonResponse({
+            'error': f'Error generando recomendaciones: {str(e)}'
+        }, status=500)
+
 
 # ==================== HAIRCUTS VIEWS ====================
 
@@ -211,11 +312,8 @@ def haircuts_list(request):
     # Para las longitudes, obtén valores únicos del campo JSON
     all_lengths = ["corto", "medio", "largo"]
 
-    # Paginación opcional
-    from django.core.paginator import Paginator
-    paginator = Paginator(haircuts.order_by('name'), 8)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginación por cursor sobre (name, id)
+    page_obj = keyset_paginate(haircuts, ('name', 'id'), request.GET.get('cursor'), page_size=8)
 
     context = {
         "page_obj": page_obj,
@@ -224,7 +322,7 @@ def haircuts_list(request):
         "length_filter": length_filter,
         "gender_choices": gender_choices,
         "lengths": all_lengths,
-        "total_count": haircuts.count(),
+        "total_count": cached_count(haircuts),
     }
     return render(request, "admin/haircuts_list.html", context)
 @login_required
@@ -249,7 +347,11 @@ def haircut_create(request):
 @user_passes_test(is_admin)
 def haircut_detail(request, pk):
     haircut = get_object_or_404(HaircutStyleModel, pk=pk)
-    return render(request, 'admin/haircut_detail.html', {'haircut': haircut})
+    similar_styles = get_similarity_index().similar_haircuts(haircut.pk)
+    return render(request, 'admin/haircut_detail.html', {
+        'haircut': haircut,
+        'similar_styles': similar_styles
+    })
 
 @login_required
 @user_passes_test(is_admin)
@@ -338,7 +440,11 @@ def beard_style_create(request):
 @user_passes_test(is_admin)
 def beard_style_detail(request, pk):
     beard_style = get_object_or_404(BeardStyleModel, pk=pk)
-    return render(request, 'admin/beard_style_detail.html', {'beard_style': beard_style})
+    similar_styles = get_similarity_index().similar_beards(beard_style.pk)
+    return render(request, 'admin/beard_style_detail.html', {
+        'beard_style': beard_style,
+        'similar_styles': similar_styles
+    })
 
 @login_required
 @user_passes_test(is_admin)
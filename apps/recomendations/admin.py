@@ -6,6 +6,8 @@ from apps.recomendations.models import (
     RecommendationModel
 )
 from django.db import models
+from apps.recomendations.adapters.persistence.catalog_cache import style_catalog_cache
+from apps.recomendations.adapters.ml.ranking_table import get_ranking_table
 
 # --- Función Auxiliar ---
 # Función para mostrar los datos JSONField en el admin de forma más legible
@@ -97,11 +99,17 @@ class HaircutStyleAdmin(admin.ModelAdmin):
     # ... (Mantener las funciones activate_styles y deactivate_styles)
     def activate_styles(self, request, queryset):
         count = queryset.update(is_active=True)
+        # update() no emite señales: invalidar la caché del catálogo
+        style_catalog_cache.invalidate()
+        get_ranking_table().invalidate()
         self.message_user(request, f'{count} estilos activados')
     activate_styles.short_description = "Activar estilos seleccionados"
     
     def deactivate_styles(self, request, queryset):
         count = queryset.update(is_active=False)
+        # update() no emite señales: invalidar la caché del catálogo
+        style_catalog_cache.invalidate()
+        get_ranking_table().invalidate()
         self.message_user(request, f'{count} estilos desactivados')
     deactivate_styles.short_description = "Desactivar estilos seleccionados"
 
@@ -170,11 +178,17 @@ class BeardStyleAdmin(admin.ModelAdmin):
     # ... (Mantener las funciones activate_styles y deactivate_styles)
     def activate_styles(self, request, queryset):
         count = queryset.update(is_active=True)
+        # update() no emite señales: invalidar la caché del catálogo
+        style_catalog_cache.invalidate()
+        get_ranking_table().invalidate()
         self.message_user(request, f'{count} estilos activados')
     activate_styles.short_description = "Activar estilos seleccionados"
     
     def deactivate_styles(self, request, queryset):
         count = queryset.update(is_active=False)
+        # update() no emite señales: invalidar la caché del catálogo
+        style_catalog_cache.invalidate()
+        get_ranking_table().invalidate()
         self.message_user(request, f'{count} estilos desactivados')
     deactivate_styles.short_description = "Desactivar estilos seleccionados"
 
@@ -3,3 +3,9 @@ from django.apps import AppConfig
 class RecomendationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.recomendations'
+
+    def ready(self):
+        """
+        Registrar las señales que invalidan la caché del catálogo de estilos.
+        """
+        from apps.recomendations import signals  # noqa: F401
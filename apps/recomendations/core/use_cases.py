@@ -2,7 +2,7 @@
 Casos de uso del dominio de recomendaciones.
 """
 
-from typing import List
+from typing import List, Tuple
 from .entities import (
     Recommendation, 
     HaircutStyle, 
@@ -21,16 +21,19 @@ class SaveRecommendationUseCase:
 class GenerateHaircutRecommendationsUseCase:
     """Genera recomendaciones de cortes de cabello"""
     
-    def __init__(self, recommendation_engine, style_catalog):
+    def __init__(self, recommendation_engine, style_catalog, ranking_table=None, reranker=None):
         self.recommendation_engine = recommendation_engine
         self.style_catalog = style_catalog
+        self.ranking_table = ranking_table
+        self.reranker = reranker
 
     def execute(
         self, 
         face_shape: FaceShape,
         gender: Gender,
         hair_length: HairLength,
-        max_results: int = 5
+        max_results: int = 5,
+        user_id=None
     ) -> List[HaircutStyle]:
         """
         Ejecuta el caso de uso para generar recomendaciones de cortes
@@ -40,39 +43,77 @@ class GenerateHaircutRecommendationsUseCase:
             gender: Género del usuario
             hair_length: Longitud actual del cabello
             max_results: Número máximo de resultados
+            user_id: Usuario para el que se recomienda (motores personalizados)
             
         Returns:
             Lista de estilos de corte recomendados
         """
-        # Obtener todos los estilos disponibles
-        all_styles = self.style_catalog.get_haircut_styles(
-            gender=gender,
-            hair_length=hair_length
-        )
+        return [
+            style for style, _ in self.execute_scored(
+                face_shape, gender, hair_length, max_results, user_id=user_id
+            )
+        ]
+
+    def execute_scored(
+        self,
+        face_shape: FaceShape,
+        gender: Gender,
+        hair_length: HairLength,
+        max_results: int = 5,
+        user_id=None
+    ) -> List[Tuple[HaircutStyle, float]]:
+        """
+        Igual que execute, pero conserva el score de cada estilo
         
-        # Filtrar y ordenar por compatibilidad
-        recommendations = self.recommendation_engine.rank_haircut_styles(
-            styles=all_styles,
-            face_shape=face_shape,
-            gender=gender,
-            hair_length=hair_length
-        )
+        Returns:
+            Lista de (estilo, score) ordenada por score descendente
+        """
+        # Con re-ranking por diversidad se recupera un conjunto mayor de candidatos
+        pool_size = self.reranker.pool_size(max_results) if self.reranker else max_results
+
+        # Tabla precalculada: búsqueda directa
+        if self.ranking_table is not None:
+            recommendations = self.ranking_table.lookup_haircuts(
+                face_shape, gender, hair_length, max_results=pool_size
+            )
+        else:
+            # Obtener todos los estilos disponibles
+            all_styles = self.style_catalog.get_haircut_styles(
+                gender=gender,
+                hair_length=hair_length
+            )
+            
+            # Filtrar y ordenar por compatibilidad
+            recommendations = self.recommendation_engine.score_haircut_styles(
+                styles=all_styles,
+                face_shape=face_shape,
+                gender=gender,
+                hair_length=hair_length,
+                top_k=pool_size,
+                user_id=user_id
+            )
+        
+        if self.reranker:
+            recommendations = self.reranker.rerank_haircuts(recommendations, max_results)
         
-        return recommendations[:max_results]
+        return recommendations
 
 
 class GenerateBeardRecommendationsUseCase:
     """Genera recomendaciones de estilos de barba"""
     
-    def __init__(self, recommendation_engine, style_catalog):
+    def __init__(self, recommendation_engine, style_catalog, ranking_table=None, reranker=None):
         self.recommendation_engine = recommendation_engine
         self.style_catalog = style_catalog
+        self.ranking_table = ranking_table
+        self.reranker = reranker
 
     def execute(
         self,
         face_shape: FaceShape,
         gender: Gender,
-        max_results: int = 5
+        max_results: int = 5,
+        user_id=None
     ) -> List[BeardStyle]:
         """
         Ejecuta el caso de uso para generar recomendaciones de barba
@@ -81,21 +122,122 @@ class GenerateBeardRecommendationsUseCase:
             face_shape: Forma del rostro
             gender: Género del usuario
             max_results: Número máximo de resultados
+            user_id: Usuario para el que se recomienda (motores personalizados)
             
         Returns:
             Lista de estilos de barba recomendados
         """
-        # Obtener todos los estilos de barba disponibles
-        all_styles = self.style_catalog.get_beard_styles(gender=gender)
+        return [
+            style for style, _ in self.execute_scored(face_shape, gender, max_results, user_id=user_id)
+        ]
+
+    def execute_scored(
+        self,
+        face_shape: FaceShape,
+        gender: Gender,
+        max_results: int = 5,
+        user_id=None
+    ) -> List[Tuple[BeardStyle, float]]:
+        """
+        Igual que execute, pero conserva el score de cada estilo
         
-        # Filtrar y ordenar por compatibilidad
-        recommendations = self.recommendation_engine.rank_beard_styles(
-            styles=all_styles,
-            face_shape=face_shape,
-            gender=gender
-        )
+        Returns:
+            Lista de (estilo, score) ordenada por score descendente
+        """
+        pool_size = self.reranker.pool_size(max_results) if self.reranker else max_results
+
+        # Tabla precalculada: búsqueda directa
+        if self.ranking_table is not None:
+            recommendations = self.ranking_table.lookup_beards(face_shape, max_results=pool_size)
+        else:
+            # Obtener todos los estilos de barba disponibles
+            all_styles = self.style_catalog.get_beard_styles(gender=gender)
+            
+            # Filtrar y ordenar por compatibilidad
+            recommendations = self.recommendation_engine.score_beard_styles(
+                styles=all_styles,
+                face_shape=face_shape,
+                top_k=pool_size,
+                user_id=user_id
+            )
+        
+        if self.reranker:
+            recommendations = self.reranker.rerank_beards(recommendations, max_results)
         
-        return recommendations[:max_results]
+        return recommendations
+
+
+class GenerateBulkRecommendationsUseCase:
+    """
+    Genera y guarda recomendaciones para muchos perfiles a la vez.
+
+    Todas las combinaciones se resuelven contra la misma instantánea del
+    catálogo y cada combinación repetida se calcula una sola vez (por usuario
+    si el motor personaliza los scores).
+    """
+    
+    def __init__(self, recommendation_engine, style_catalog, recommendation_repo,
+                 ranking_table=None, reranker=None):
+        self.haircut_use_case = GenerateHaircutRecommendationsUseCase(
+            recommendation_engine, style_catalog, ranking_table=ranking_table, reranker=reranker
+        )
+        self.beard_use_case = GenerateBeardRecommendationsUseCase(
+            recommendation_engine, style_catalog, ranking_table=ranking_table, reranker=reranker
+        )
+        self.recommendation_repo = recommendation_repo
+        self.personalized = getattr(recommendation_engine, 'personalized', False)
+
+    def execute(
+        self,
+        profiles: List[Tuple[object, FaceShape, Gender, HairLength]],
+        max_haircuts: int = 6,
+        max_beards: int = 4
+    ) -> List[Recommendation]:
+        """
+        Args:
+            profiles: Lista de (user_id, forma de rostro, género, longitud)
+            max_haircuts: Número máximo de cortes por recomendación
+            max_beards: Número máximo de barbas (solo hombres)
+            
+        Returns:
+            Recomendaciones guardadas, en el mismo orden que profiles
+        """
+        haircuts_by_key = {}
+        beards_by_shape = {}
+        recommendations = []
+
+        for user_id, face_shape, gender, hair_length in profiles:
+            scope = user_id if self.personalized else None
+            key = (scope, face_shape, gender, hair_length)
+            if key not in haircuts_by_key:
+                haircuts_by_key[key] = self.haircut_use_case.execute_scored(
+                    face_shape, gender, hair_length, max_results=max_haircuts, user_id=scope
+                )
+            scored_haircuts = haircuts_by_key[key]
+
+            beard_styles = []
+            if gender == Gender.HOMBRE:
+                if (scope, face_shape) not in beards_by_shape:
+                    beards_by_shape[(scope, face_shape)] = self.beard_use_case.execute(
+                        face_shape, gender, max_results=max_beards, user_id=scope
+                    )
+                beard_styles = beards_by_shape[(scope, face_shape)]
+
+            confidence = 0.0
+            if scored_haircuts:
+                confidence = sum(score for _, score in scored_haircuts) / len(scored_haircuts)
+
+            recommendations.append(Recommendation(
+                user_id=user_id,
+                face_shape=face_shape,
+                gender=gender,
+                hair_length=hair_length,
+                haircut_styles=[style for style, _ in scored_haircuts],
+                beard_styles=list(beard_styles),
+                confidence_score=confidence
+            ))
+
+        return self.recommendation_repo.save_many(recommendations)
 
 
 class SaveRecommendationUseCase:
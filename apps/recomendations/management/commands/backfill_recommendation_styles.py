@@ -0,0 +1,90 @@
+"""
+Comando Django para poblar la tabla recommendation_styles a partir de los
+campos JSON haircut_styles_ids / beard_styles_ids de las recomendaciones
+existentes.
+"""
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.recomendations.models import RecommendationModel, RecommendationStyleModel
+
+
+def parse_style_ids(raw) -> list:
+    """IDs de estilo guardados como texto JSON ('[1, 2]')"""
+    if not raw:
+        return []
+    ids = json.loads(raw) if isinstance(raw, str) else raw
+    return [int(style_id) for style_id in ids]
+
+
+class Command(BaseCommand):
+    help = 'Rellena la tabla de enlaces recomendación → estilo desde los campos JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Borra todos los enlaces y los vuelve a generar'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Recomendaciones procesadas por transacción'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        if options['rebuild']:
+            deleted, _ = RecommendationStyleModel.objects.all().delete()
+            self.stdout.write(self.style.WARNING(f'Enlaces eliminados: {deleted}'))
+
+        # Solo las recomendaciones que aún no tienen enlaces
+        queryset = (
+            RecommendationModel.objects
+            .filter(style_links__isnull=True)
+            .only('id', 'face_shape', 'haircut_styles_ids', 'beard_styles_ids')
+            .order_by('id')
+        )
+
+        processed = 0
+        created = 0
+        skipped = 0
+        batch = []
+        for recommendation in queryset.iterator(chunk_size=batch_size):
+            try:
+                batch.extend(RecommendationStyleModel.links_for(
+                    recommendation,
+                    parse_style_ids(recommendation.haircut_styles_ids),
+                    parse_style_ids(recommendation.beard_styles_ids)
+                ))
+            except (ValueError, TypeError) as e:
+                skipped += 1
+                self.stdout.write(self.style.WARNING(
+                    f'⚠ Recomendación {recommendation.id} con IDs inválidos: {e}'
+                ))
+                continue
+
+            processed += 1
+            if processed % batch_size == 0:
+                created += self._flush(batch)
+                batch = []
+                self.stdout.write(f'  {processed} recomendaciones procesadas...')
+
+        created += self._flush(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Backfill completado: {processed} recomendaciones, '
+            f'{created} enlaces creados, {skipped} omitidas'
+        ))
+
+    @staticmethod
+    def _flush(links) -> int:
+        if not links:
+            return 0
+        with transaction.atomic():
+            RecommendationStyleModel.objects.bulk_create(links, batch_size=1000)
+        return len(links)
@@ -7,6 +7,7 @@ import os
 from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.core.files import File 
+from django.db import transaction
 from apps.recomendations.models import (
     HaircutStyleModel,
     BeardStyleModel
@@ -27,18 +28,22 @@ class Command(BaseCommand):
     def handle(self, *args, **kwargs):
         self.stdout.write('Iniciando carga de estilos...')
         
-        # Limpiar datos existentes (opcional)
-        if self.confirm_action('¿Deseas eliminar los estilos existentes?'):
-            HaircutStyleModel.objects.all().delete()
-            BeardStyleModel.objects.all().delete()
-            self.stdout.write(self.style.WARNING('Estilos existentes eliminados'))
-        
-        self.stdout.write(self.style.NOTICE('--- CARGANDO CORTES DE CABELLO ---'))
-        self.load_men_haircuts()
-        self.load_women_haircuts()
-        
-        self.stdout.write(self.style.NOTICE('--- CARGANDO ESTILOS DE BARBA ---'))
-        self.load_beard_styles()
+        clear = self.confirm_action('¿Deseas eliminar los estilos existentes?')
+
+        # Una sola transacción: el catálogo en memoria se refresca una vez al final
+        with transaction.atomic():
+            # Limpiar datos existentes (opcional)
+            if clear:
+                HaircutStyleModel.objects.all().delete()
+                BeardStyleModel.objects.all().delete()
+                self.stdout.write(self.style.WARNING('Estilos existentes eliminados'))
+
+            self.stdout.write(self.style.NOTICE('--- CARGANDO CORTES DE CABELLO ---'))
+            self.load_men_haircuts()
+            self.load_women_haircuts()
+
+            self.stdout.write(self.style.NOTICE('--- CARGANDO ESTILOS DE BARBA ---'))
+            self.load_beard_styles()
         
         self.stdout.write(self.style.SUCCESS('\n✓ Carga de datos inicial completada exitosamente'))
     
@@ -60,7 +65,8 @@ class Command(BaseCommand):
 
         try:
             style_instance = Model(**data_to_save)
-            with open(image_full_path, 'rb') as f:
+            # Savepoint: un estilo con error no aborta el resto de la carga
+            with open(image_full_path, 'rb') as f, transaction.atomic():
                 style_instance.image.save(os.path.basename(image_full_path), File(f), save=False)
                 style_instance.save()
             self.stdout.write(f"  > Creado: {data.get('name', 'Estilo sin nombre')} ({Model.__name__})")
@@ -0,0 +1,106 @@
+from django.db import migrations
+
+# Copia congelada de los mapas de apps/recomendations/adapters/persistence/
+# normalization.py en el momento de esta migración: la migración no debe
+# cambiar si ese módulo cambia.
+FACE_SHAPE_DB_TO_ENUM = {
+    'oval': 'oval',
+    'ovalada': 'oval',
+    'ovalado': 'oval',
+    'redonda': 'redondo',
+    'redondo': 'redondo',
+    'cuadrada': 'cuadrado',
+    'cuadrado': 'cuadrado',
+    'corazón': 'corazon',
+    'corazon': 'corazon',
+    'diamante': 'diamante',
+    'triangular': 'triangular',
+}
+GENDER_DB_TO_ENUM = {
+    'men': 'hombre',
+    'male': 'hombre',
+    'hombre': 'hombre',
+    'masculino': 'hombre',
+    'women': 'mujer',
+    'female': 'mujer',
+    'mujer': 'mujer',
+    'femenino': 'mujer',
+}
+HAIR_LENGTH_DB_TO_ENUM = {
+    'corto': 'corto',
+    'short': 'corto',
+    'medio': 'medio',
+    'medium': 'medio',
+    'largo': 'largo',
+    'long': 'largo',
+}
+
+
+def normalize_values(values, mapping):
+    """Valores canónicos sin duplicados (los no reconocidos, en minúsculas)"""
+    normalized = []
+    for value in values or []:
+        key = str(value).lower().strip()
+        key = mapping.get(key, key)
+        if key not in normalized:
+            normalized.append(key)
+    return normalized
+
+
+# Índices GIN (jsonb_path_ops) para las consultas de contención (@>).
+# Solo existen en PostgreSQL; en SQLite los filtros recurren a una búsqueda
+# de texto sobre el JSON normalizado (ver DjangoStyleRepository._filter_contains).
+GIN_INDEXES = [
+    ('haircut_styles_shapes_gin', 'HaircutStyleModel', 'suitable_for_shapes'),
+    ('haircut_styles_genders_gin', 'HaircutStyleModel', 'suitable_for_gender'),
+    ('haircut_styles_lengths_gin', 'HaircutStyleModel', 'hair_length_required'),
+    ('beard_styles_shapes_gin', 'BeardStyleModel', 'suitable_for_shapes'),
+]
+
+
+def normalize_existing_styles(apps, schema_editor):
+    HaircutStyleModel = apps.get_model('recomendations', 'HaircutStyleModel')
+    BeardStyleModel = apps.get_model('recomendations', 'BeardStyleModel')
+
+    haircuts = list(HaircutStyleModel.objects.all())
+    for model in haircuts:
+        model.suitable_for_shapes = normalize_values(model.suitable_for_shapes, FACE_SHAPE_DB_TO_ENUM)
+        model.suitable_for_gender = normalize_values(model.suitable_for_gender, GENDER_DB_TO_ENUM)
+        model.hair_length_required = normalize_values(model.hair_length_required, HAIR_LENGTH_DB_TO_ENUM)
+    HaircutStyleModel.objects.bulk_update(
+        haircuts, ['suitable_for_shapes', 'suitable_for_gender', 'hair_length_required'], batch_size=500
+    )
+
+    beards = list(BeardStyleModel.objects.all())
+    for model in beards:
+        model.suitable_for_shapes = normalize_values(model.suitable_for_shapes, FACE_SHAPE_DB_TO_ENUM)
+    BeardStyleModel.objects.bulk_update(beards, ['suitable_for_shapes'], batch_size=500)
+
+
+def create_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, model_name, column in GIN_INDEXES:
+        table = apps.get_model('recomendations', model_name)._meta.db_table
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" USING gin ("{column}" jsonb_path_ops)'
+        )
+
+
+def drop_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in GIN_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recomendations', '0006_alter_beardstylemodel_suitable_for_shapes'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_existing_styles, migrations.RunPython.noop),
+        migrations.RunPython(create_gin_indexes, drop_gin_indexes),
+    ]
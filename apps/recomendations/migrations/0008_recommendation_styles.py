@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recomendations', '0007_normalize_style_values_and_gin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationStyleModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('style_type', models.CharField(choices=[('haircut', 'Corte'), ('beard', 'Barba')], max_length=10)),
+                ('style_id', models.IntegerField()),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('face_shape', models.CharField(max_length=50)),
+                ('recommendation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='style_links', to='recomendations.recommendationmodel')),
+            ],
+            options={
+                'db_table': 'recommendation_styles',
+                'indexes': [models.Index(fields=['style_type', 'style_id'], name='rec_style_type_id_idx'), models.Index(fields=['style_type', 'face_shape', 'style_id'], name='rec_style_shape_idx')],
+                'constraints': [models.UniqueConstraint(fields=('recommendation', 'style_type', 'position'), name='recommendation_style_position_unique')],
+            },
+        ),
+    ]
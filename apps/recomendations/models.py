@@ -8,6 +8,10 @@ from django.contrib.auth.models import User
 from django.contrib.postgres.fields import ArrayField
 
 from apps.auth_app.adapters.persistence.models import UserModel
+from apps.recomendations.adapters.persistence.normalization import (
+    normalize_haircut_fields,
+    normalize_beard_fields
+)
 
 class RecommendationModel(models.Model):
     user = models.ForeignKey(
@@ -32,6 +36,61 @@ class RecommendationModel(models.Model):
         db_table = 'recommendations'
         ordering = ['-created_at']
 
+
+class RecommendationStyleModel(models.Model):
+    """
+    Enlace normalizado recomendación → estilo recomendado.
+
+    Replica haircut_styles_ids / beard_styles_ids en filas para que los
+    "top estilos" y los desgloses por forma de rostro sean un GROUP BY.
+    """
+
+    HAIRCUT = 'haircut'
+    BEARD = 'beard'
+    STYLE_TYPE_CHOICES = [
+        (HAIRCUT, 'Corte'),
+        (BEARD, 'Barba'),
+    ]
+
+    recommendation = models.ForeignKey(
+        RecommendationModel,
+        on_delete=models.CASCADE,
+        related_name='style_links'
+    )
+    style_type = models.CharField(max_length=10, choices=STYLE_TYPE_CHOICES)
+    style_id = models.IntegerField()
+    position = models.PositiveSmallIntegerField(default=0)
+    # Copia de recommendation.face_shape para agrupar sin JOIN
+    face_shape = models.CharField(max_length=50)
+
+    class Meta:
+        db_table = 'recommendation_styles'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recommendation', 'style_type', 'position'],
+                name='recommendation_style_position_unique'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['style_type', 'style_id'], name='rec_style_type_id_idx'),
+            models.Index(fields=['style_type', 'face_shape', 'style_id'], name='rec_style_shape_idx'),
+        ]
+
+    @classmethod
+    def links_for(cls, recommendation, haircut_ids, beard_ids):
+        """Filas de enlace (sin guardar) de una recomendación"""
+        return [
+            cls(
+                recommendation=recommendation,
+                style_type=style_type,
+                style_id=style_id,
+                position=position,
+                face_shape=recommendation.face_shape
+            )
+            for style_type, ids in ((cls.HAIRCUT, haircut_ids), (cls.BEARD, beard_ids))
+            for position, style_id in enumerate(ids)
+        ]
+
 from django.db import models
 import os
 
@@ -104,10 +163,9 @@ class HaircutStyleModel(models.Model):
     
 
     def save(self, *args, **kwargs):
-        # Aquí haces tu lógica personalizada
-        # Ejemplo: asegurarte de que el campo JSON esté bien formateado
-        if isinstance(self.suitable_for_shapes, list):
-            self.suitable_for_shapes = self.suitable_for_shapes
+        # Guardar formas, géneros y longitudes con los valores canónicos
+        # para poder filtrar por contención en la BD
+        normalize_haircut_fields(self)
 
         # Luego guardas normalmente
         super().save(*args, **kwargs)
@@ -159,6 +217,11 @@ class BeardStyleModel(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Guardar las formas con los valores canónicos (ver HaircutStyleModel.save)
+        normalize_beard_fields(self)
+        super().save(*args, **kwargs)
+
     @property
     def image_url(self):
         if self.image:
@@ -12,6 +12,10 @@ class RecommendationRepository(ABC):
     def save(self, recommendation: Recommendation):
         pass
 
+    @abstractmethod
+    def save_many(self, recommendations: List[Recommendation]) -> List[Recommendation]:
+        pass
+
     @abstractmethod
     def get_by_user(self, user_id: int) -> List[Recommendation]:
         pass
@@ -0,0 +1,92 @@
+"""
+Señales del catálogo de estilos: invalidan la caché en memoria, recolocan el
+estilo en la tabla de rankings y reconstruyen el índice de similares cuando se
+crea, modifica o elimina (una vez por transacción). El feedback nuevo se pliega en el motor colaborativo
+si está cargado.
+"""
+
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.feedback.adapters.persistence.models import FeedbackModel
+from apps.recomendations.models import HaircutStyleModel, BeardStyleModel
+from apps.recomendations.adapters.persistence.catalog_cache import style_catalog_cache
+from apps.recomendations.adapters.ml.ranking_table import get_ranking_table
+from apps.recomendations.adapters.ml.similarity_index import get_similarity_index
+from apps.recomendations.adapters.ml.collaborative_engine import (
+    feedback_entries,
+    get_collaborative_engine,
+    style_name_maps
+)
+
+
+# Estilos cambiados en la transacción en curso de cada hilo (las conexiones
+# de Django son por hilo). Cada save registra un on_commit, pero el primero que
+# se ejecuta procesa todo el lote: una carga masiva invalida el catálogo y
+# reconstruye el índice de similares una sola vez, no una por estilo.
+_pending = threading.local()
+
+
+def _pending_ids():
+    if not hasattr(_pending, 'haircuts'):
+        _pending.haircuts = set()
+        _pending.beards = set()
+    return _pending.haircuts, _pending.beards
+
+
+def refresh_pending_styles():
+    """Invalida el catálogo y recoloca los estilos pendientes del hilo"""
+    haircut_ids, beard_ids = _pending_ids()
+    if not haircut_ids and not beard_ids:
+        return
+    haircuts, beards = set(haircut_ids), set(beard_ids)
+    haircut_ids.clear()
+    beard_ids.clear()
+
+    style_catalog_cache.invalidate()
+    table = get_ranking_table()
+    for style_id in haircuts:
+        table.update_haircut(style_id)
+    for style_id in beards:
+        table.update_beard(style_id)
+    get_similarity_index().refresh()
+
+
+@receiver(post_save, sender=HaircutStyleModel)
+@receiver(post_delete, sender=HaircutStyleModel)
+def haircut_style_changed(sender, instance, **kwargs):
+    """Tras el commit: invalidar el catálogo y recolocar el corte"""
+    _pending_ids()[0].add(instance.pk)
+    transaction.on_commit(refresh_pending_styles)
+
+
+@receiver(post_save, sender=BeardStyleModel)
+@receiver(post_delete, sender=BeardStyleModel)
+def beard_style_changed(sender, instance, **kwargs):
+    """Tras el commit: invalidar el catálogo y recolocar la barba"""
+    _pending_ids()[1].add(instance.pk)
+    transaction.on_commit(refresh_pending_styles)
+
+
+@receiver(post_save, sender=FeedbackModel)
+@receiver(post_delete, sender=FeedbackModel)
+def feedback_changed(sender, instance, **kwargs):
+    """Tras el commit: plegar la valoración en el motor colaborativo"""
+    engine = get_collaborative_engine(create=False)
+    if engine is None:
+        return
+
+    feedback_id = instance.pk
+    deleted = kwargs.get('signal') is post_delete
+
+    def refresh():
+        entries = []
+        if not deleted:
+            haircut_ids, beard_ids = style_name_maps()
+            entries = feedback_entries(instance, haircut_ids, beard_ids)
+        engine.update_feedback(feedback_id, entries)
+
+    transaction.on_commit(refresh)
@@ -0,0 +1,466 @@
+import json
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.auth_app.adapters.persistence.models import ProfileModel, UserModel
+from apps.recomendations.adapters.ml.collaborative_engine import CollaborativeRecommendationEngine
+from apps.recomendations.adapters.ml.diversity import MMRReranker
+from apps.recomendations.adapters.ml.ranking_table import RecommendationRankingTable
+from apps.recomendations.adapters.ml.recommendation_engine import (
+    RuleBasedRecommendationEngine,
+    StyleCatalogServiceImpl
+)
+from apps.recomendations.adapters.ml.similarity_index import StyleSimilarityIndex, get_similarity_index
+from apps.recomendations.adapters.ml.vectorized_engine import VectorizedRecommendationEngine
+from apps.recomendations.adapters.persistence.catalog_cache import StyleCatalogCache, style_catalog_cache
+from apps.recomendations.adapters.persistence.repositories import DjangoRecommendationRepository, DjangoStyleRepository
+from apps.recomendations.core.entities import (
+    BeardStyle,
+    FaceShape,
+    Gender,
+    HairLength,
+    HaircutStyle,
+    Recommendation
+)
+from apps.recomendations.core.use_cases import (
+    GenerateBeardRecommendationsUseCase,
+    GenerateHaircutRecommendationsUseCase
+)
+from apps.recomendations.models import (
+    BeardStyleModel,
+    HaircutStyleModel,
+    RecommendationModel,
+    RecommendationStyleModel
+)
+from apps.reports.adapters.persistence.rollups import DjangoRollupRepository
+
+
+class GenerateBulkAccessTest(TestCase):
+    """El endpoint masivo escribe perfiles de cualquier usuario: solo administradores"""
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('recomendations:generate_bulk')
+        self.target = UserModel.objects.create_user(email='destino@example.com', password='x')
+        self.body = json.dumps({'profiles': [{'user_id': str(self.target.id), 'face_shape': 'oval'}]})
+
+    def _post(self):
+        return self.client.post(self.url, self.body, content_type='application/json')
+
+    def test_anonymous_is_rejected(self):
+        response = self._post()
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(RecommendationModel.objects.exists())
+        self.assertFalse(ProfileModel.objects.filter(user=self.target).exists())
+
+    def test_non_admin_is_rejected(self):
+        self.client.force_login(UserModel.objects.create_user(email='usuario@example.com', password='x'))
+        response = self._post()
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(RecommendationModel.objects.exists())
+
+    def test_admin_can_generate(self):
+        admin = UserModel.objects.create_user(email='admin@example.com', password='x')
+        admin.groups.add(Group.objects.create(name='Administrador'))
+        self.client.force_login(admin)
+        response = self._post()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+        self.assertEqual(RecommendationModel.objects.filter(user=self.target).count(), 1)
+
+    def test_session_callers_need_csrf_token(self):
+        admin = UserModel.objects.create_user(email='admin-csrf@example.com', password='x')
+        admin.groups.add(Group.objects.create(name='Administrador'))
+        self.client.handler.enforce_csrf_checks = True
+        self.client.force_login(admin)
+        self.assertEqual(self._post().status_code, 403)
+
+
+class SaveManyTest(TestCase):
+    """bulk_create/bulk_update: número de consultas independiente del tamaño del lote"""
+
+    def setUp(self):
+        self.repository = DjangoRecommendationRepository()
+
+    def _users(self, count, prefix):
+        return [
+            UserModel.objects.create_user(email=f'{prefix}{index}@example.com', password='x')
+            for index in range(count)
+        ]
+
+    def _recommendation(self, user, face_shape, score):
+        return Recommendation(
+            user_id=user.id,
+            face_shape=face_shape,
+            gender=Gender.HOMBRE,
+            hair_length=HairLength.MEDIO,
+            confidence_score=score
+        )
+
+    def _count_queries(self, users):
+        with CaptureQueriesContext(connection) as queries:
+            self.repository.save_many([self._recommendation(user, FaceShape.OVAL, 0.8) for user in users])
+        return len(queries)
+
+    def test_queries_do_not_grow_with_batch(self):
+        small = self._count_queries(self._users(2, 'small'))
+        large = self._count_queries(self._users(25, 'large'))
+        self.assertEqual(small, large)
+
+    def test_profile_updated_only_by_equal_or_better_score(self):
+        kept, replaced, new = self._users(3, 'profile')
+        for user in (kept, replaced):
+            self.repository.save_many([self._recommendation(user, FaceShape.OVAL, 0.9)])
+
+        self.repository.save_many([
+            self._recommendation(kept, FaceShape.REDONDO, 0.5),
+            self._recommendation(replaced, FaceShape.CUADRADO, 0.95),
+            self._recommendation(new, FaceShape.CORAZON, 0.1),
+        ])
+
+        shapes = dict(ProfileModel.objects.values_list('user_id', 'face_shape'))
+        self.assertEqual(shapes[kept.id], FaceShape.OVAL.value)
+        self.assertEqual(shapes[replaced.id], FaceShape.CUADRADO.value)
+        self.assertEqual(shapes[new.id], FaceShape.CORAZON.value)
+        self.assertEqual(RecommendationModel.objects.count(), 5)
+
+    def test_links_written_in_order_and_counted_per_shape(self):
+        first, second = self._users(2, 'links')
+        recommendations = [
+            self._recommendation(first, FaceShape.OVAL, 0.8),
+            self._recommendation(second, FaceShape.REDONDO, 0.7),
+        ]
+        recommendations[0].haircut_styles = [HaircutStyle(id=3, name='A'), HaircutStyle(id=1, name='B')]
+        recommendations[0].beard_styles = [BeardStyle(id=7, name='C')]
+        recommendations[1].haircut_styles = [HaircutStyle(id=1, name='B')]
+        self.repository.save_many(recommendations)
+
+        links = RecommendationStyleModel.objects.order_by('recommendation_id', 'style_type', 'position')
+        self.assertEqual(
+            [(link.recommendation_id, link.style_type, link.position, link.style_id, link.face_shape)
+             for link in links],
+            [
+                (recommendations[0].id, 'beard', 0, 7, 'oval'),
+                (recommendations[0].id, 'haircut', 0, 3, 'oval'),
+                (recommendations[0].id, 'haircut', 1, 1, 'oval'),
+                (recommendations[1].id, 'haircut', 0, 1, 'redondo'),
+            ]
+        )
+
+        # El desglose por forma del informe coincide con el GROUP BY sobre los enlaces
+        grouped = {
+            (row['face_shape'], row['style_id']): row['total']
+            for row in RecommendationStyleModel.objects.filter(style_type='haircut')
+            .values('face_shape', 'style_id').annotate(total=Count('id')).order_by()
+        }
+        breakdown = DjangoRollupRepository().top_styles_by_shape('haircut', limit=5)
+        self.assertEqual(
+            {(shape, style['id']): style['count'] for shape, styles in breakdown.items() for style in styles},
+            grouped
+        )
+
+
+class BackfillRecommendationStylesTest(TestCase):
+    """El backfill crea los enlaces que faltan desde los campos JSON"""
+
+    def setUp(self):
+        self.user = UserModel.objects.create_user(email='backfill@example.com', password='x')
+
+    def _recommendation(self, haircut_ids, beard_ids='[]'):
+        return RecommendationModel.objects.create(
+            user=self.user, face_shape='oval', gender='hombre', hair_length='medio',
+            haircut_styles_ids=haircut_ids, beard_styles_ids=beard_ids
+        )
+
+    def _links(self, recommendation):
+        return list(
+            recommendation.style_links.order_by('style_type', 'position').values_list('style_type', 'style_id')
+        )
+
+    def test_backfill_is_idempotent_and_skips_invalid_rows(self):
+        linked = self._recommendation('[4, 2]', '[9]')
+        empty = self._recommendation('[]')
+        invalid = self._recommendation('no es json')
+
+        call_command('backfill_recommendation_styles', batch_size=2, stdout=StringIO())
+        self.assertEqual(self._links(linked), [('beard', 9), ('haircut', 4), ('haircut', 2)])
+        self.assertEqual(self._links(empty), [])
+        self.assertEqual(self._links(invalid), [])
+
+        # Sin duplicados al repetir; --rebuild regenera lo mismo
+        call_command('backfill_recommendation_styles', stdout=StringIO())
+        self.assertEqual(RecommendationStyleModel.objects.count(), 3)
+        call_command('backfill_recommendation_styles', rebuild=True, stdout=StringIO())
+        self.assertEqual(self._links(linked), [('beard', 9), ('haircut', 4), ('haircut', 2)])
+        self.assertEqual(RecommendationStyleModel.objects.count(), 3)
+
+
+class StyleCatalogCacheTest(TestCase):
+    """Cada worker tiene su instantánea; la invalidación debe llegar a todos"""
+
+    def setUp(self):
+        cache.clear()
+        self.style = HaircutStyleModel.objects.create(
+            name='Pompadour', description='Clásico', suitable_for_shapes=['oval']
+        )
+
+    def _names(self, catalog):
+        return [style.name for style in catalog.get_snapshot().haircuts]
+
+    def test_invalidation_reaches_other_workers(self):
+        worker_a, worker_b = StyleCatalogCache(), StyleCatalogCache()
+        self.assertEqual(self._names(worker_b), ['Pompadour'])
+
+        # La señal de post_save invalida la instancia global; aquí lo hace el worker A
+        HaircutStyleModel.objects.filter(pk=self.style.pk).update(name='Quiff')
+        worker_a.invalidate()
+        self.assertEqual(self._names(worker_b), ['Quiff'])
+
+    @override_settings(STYLE_CATALOG_LOCAL_TTL=0.2)
+    def test_local_cache_snapshot_expires(self):
+        catalog = StyleCatalogCache()
+        self.assertEqual(self._names(catalog), ['Pompadour'])
+
+        # Cambio cuya invalidación no llegó a este proceso
+        HaircutStyleModel.objects.filter(pk=self.style.pk).update(name='Quiff')
+        self.assertEqual(self._names(catalog), ['Pompadour'])
+        time.sleep(0.3)
+        self.assertEqual(self._names(catalog), ['Quiff'])
+
+    @override_settings(STYLE_CATALOG_LOCAL_TTL=0.1)
+    def test_unchanged_catalog_keeps_snapshot(self):
+        catalog = StyleCatalogCache()
+        snapshot = catalog.get_snapshot()
+
+        # Caducidad e invalidación sin cambios: misma instantánea, sin recalcular tablas
+        time.sleep(0.2)
+        self.assertIs(catalog.get_snapshot(), snapshot)
+        catalog.invalidate()
+        self.assertIs(catalog.get_snapshot(), snapshot)
+
+        HaircutStyleModel.objects.filter(pk=self.style.pk).update(name='Quiff')
+        catalog.invalidate()
+        changed = catalog.get_snapshot()
+        self.assertIsNot(changed, snapshot)
+        self.assertNotEqual(changed.fingerprint, snapshot.fingerprint)
+
+    def test_bulk_save_refreshes_once_per_transaction(self):
+        index = get_similarity_index()
+        with mock.patch.object(style_catalog_cache, 'invalidate') as invalidate, \
+                mock.patch.object(index, 'refresh') as refresh, \
+                self.captureOnCommitCallbacks(execute=True):
+            for number in range(5):
+                HaircutStyleModel.objects.create(name=f'Estilo {number}', suitable_for_shapes=['oval'])
+            BeardStyleModel.objects.create(name='Candado', suitable_for_shapes=['oval'])
+        invalidate.assert_called_once()
+        refresh.assert_called_once()
+
+
+class StaticCatalog:
+    """Catálogo en memoria para los casos de uso"""
+
+    def __init__(self, haircuts=(), beards=()):
+        self.haircuts = list(haircuts)
+        self.beards = list(beards)
+
+    def get_haircut_styles(self, gender=None, hair_length=None):
+        return self.haircuts
+
+    def get_beard_styles(self, gender=None):
+        return self.beards
+
+
+class CollaborativePersonalizationTest(TestCase):
+    """El user_id de la petición llega al motor y cambia el orden"""
+
+    def setUp(self):
+        self.styles = [
+            HaircutStyle(id=style_id, name=f'Estilo {style_id}', suitable_for_shapes=[FaceShape.OVAL])
+            for style_id in (1, 2, 3)
+        ]
+        # Historiales opuestos sobre los estilos 1 y 2; la forma no los distingue
+        ratings = {
+            1: [('user:a', ('haircut', 1), 5.0), ('user:a', ('haircut', 2), 1.0)],
+            2: [('user:b', ('haircut', 1), 1.0), ('user:b', ('haircut', 2), 5.0)],
+            3: [('shape:oval', ('haircut', 1), 3.0), ('shape:oval', ('haircut', 2), 3.0),
+                ('shape:oval', ('haircut', 3), 3.0)],
+        }
+        engine = CollaborativeRecommendationEngine(n_factors=2, rating_source=lambda: ratings)
+        engine.fit()
+        self.use_case = GenerateHaircutRecommendationsUseCase(engine, StaticCatalog(self.styles))
+
+    def _ranking(self, user_id):
+        return [
+            style.id for style in self.use_case.execute(
+                FaceShape.OVAL, Gender.HOMBRE, HairLength.MEDIO, max_results=3, user_id=user_id
+            )
+        ]
+
+    def test_users_with_different_history_get_different_rankings(self):
+        ranking_a, ranking_b = self._ranking('a'), self._ranking('b')
+        self.assertEqual(ranking_a[0], 1)
+        self.assertEqual(ranking_b[0], 2)
+        self.assertNotEqual(ranking_a, ranking_b)
+
+
+class EngineParityTest(TestCase):
+    """Las vías rápidas reproducen el scoring en vivo"""
+
+    SHAPES = [shape.value for shape in FaceShape]
+    LENGTHS = [length.value for length in HairLength]
+    WORDS = ['clasico', 'moderno', 'volumen', 'degradado', 'textura', 'flequillo', 'raya', 'rizado']
+
+    @classmethod
+    def setUpTestData(cls):
+        # Popularidades distintas: sin empates de score que dependan del orden de suma
+        for index in range(24):
+            HaircutStyleModel.objects.create(
+                name=f'Corte {index}',
+                description=' '.join(cls.WORDS[(index + offset) % len(cls.WORDS)] for offset in range(3)),
+                gender='women' if index % 4 == 0 else 'men',
+                suitable_for_shapes=cls.SHAPES[index % 4:index % 4 + 1 + index % 3],
+                suitable_for_gender=['hombre'] if index % 2 else ['hombre', 'mujer'],
+                hair_length_required=cls.LENGTHS[index % 3:],
+                tags=[cls.WORDS[index % len(cls.WORDS)]],
+                popularity_score=5 + index * 3.7
+            )
+        for index in range(8):
+            BeardStyleModel.objects.create(
+                name=f'Barba {index}',
+                description=' '.join(cls.WORDS[(index * 3 + offset) % len(cls.WORDS)] for offset in range(2)),
+                suitable_for_shapes=cls.SHAPES[index % 6:index % 6 + 2],
+                popularity_score=10 + index * 9.1
+            )
+
+    def setUp(self):
+        cache.clear()
+        style_catalog_cache.invalidate()
+        self.catalog = StyleCatalogServiceImpl(DjangoStyleRepository())
+        self.reference = RuleBasedRecommendationEngine()
+        self.engine = VectorizedRecommendationEngine()
+
+    def _ids(self, scored):
+        return [style.id for style, _ in scored]
+
+    def _assert_same_ranking(self, scored, expected):
+        self.assertEqual(self._ids(scored), self._ids(expected))
+        for (_, score), (_, expected_score) in zip(scored, expected):
+            self.assertAlmostEqual(score, expected_score, places=9)
+
+    def test_vectorized_top_k_matches_reference(self):
+        for face_shape, gender, hair_length in RecommendationRankingTable.haircut_keys():
+            styles = self.catalog.get_haircut_styles(gender=gender, hair_length=hair_length)
+            expected = self.reference.score_haircut_styles(styles, face_shape, gender, hair_length)
+            self.assertTrue(expected)
+            for top_k in (1, 5, None):
+                scored = self.engine.score_haircut_styles(styles, face_shape, gender, hair_length, top_k=top_k)
+                self._assert_same_ranking(scored, expected[:top_k])
+
+        beards = self.catalog.get_beard_styles()
+        for face_shape in FaceShape:
+            expected = self.reference.score_beard_styles(beards, face_shape)
+            self._assert_same_ranking(self.engine.score_beard_styles(beards, face_shape, top_k=4), expected[:4])
+
+    def test_ranking_table_matches_live_scoring(self):
+        table = RecommendationRankingTable(self.engine, self.catalog)
+        for face_shape, gender, hair_length in table.haircut_keys():
+            styles = self.catalog.get_haircut_styles(gender=gender, hair_length=hair_length)
+            self._assert_same_ranking(
+                table.lookup_haircuts(face_shape, gender, hair_length, max_results=6),
+                self.engine.score_haircut_styles(styles, face_shape, gender, hair_length, top_k=6)
+            )
+
+        beards = self.catalog.get_beard_styles()
+        for face_shape in FaceShape:
+            self._assert_same_ranking(
+                table.lookup_beards(face_shape, max_results=4),
+                self.engine.score_beard_styles(beards, face_shape, top_k=4)
+            )
+
+    def test_incremental_update_matches_rebuild(self):
+        table = RecommendationRankingTable(self.engine, self.catalog)
+        table.rebuild()
+
+        # Un estilo cambia de popularidad y otro se desactiva
+        styles = list(HaircutStyleModel.objects.order_by('id')[:2])
+        HaircutStyleModel.objects.filter(pk=styles[0].pk).update(popularity_score=99.5)
+        HaircutStyleModel.objects.filter(pk=styles[1].pk).update(is_active=False)
+        style_catalog_cache.invalidate()
+        for style in styles:
+            table.update_haircut(style.pk)
+
+        rebuilt = RecommendationRankingTable(self.engine, self.catalog)
+        for key in table.haircut_keys():
+            self._assert_same_ranking(
+                table.lookup_haircuts(*key, max_results=24), rebuilt.lookup_haircuts(*key, max_results=24)
+            )
+
+    def test_encoding_cache_is_thread_safe(self):
+        engine = VectorizedRecommendationEngine(cache_size=2)
+        catalogs = [self.catalog.get_haircut_styles(gender=gender) for gender in Gender]
+        errors = []
+
+        def encode_all():
+            try:
+                for _ in range(200):
+                    for styles in catalogs:
+                        self.assertEqual(engine.encode(styles).styles, tuple(styles))
+            except Exception as e:
+                errors.append(e)
+
+        # Más catálogos que huecos: cada llamada desaloja otra entrada
+        threads = [threading.Thread(target=encode_all) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(engine._encodings), 2)
+
+    def test_diversity_rerank_agrees_with_and_without_table(self):
+        index = StyleSimilarityIndex(style_catalog_cache.get_snapshot)
+        table = RecommendationRankingTable(self.engine, self.catalog)
+        rankings = {}
+
+        for diversity in (0.0, 0.3):
+            reranker = MMRReranker(index, diversity=diversity)
+            live = GenerateHaircutRecommendationsUseCase(self.engine, self.catalog, reranker=reranker)
+            cached = GenerateHaircutRecommendationsUseCase(
+                self.engine, self.catalog, ranking_table=table, reranker=reranker
+            )
+            for face_shape, gender, hair_length in table.haircut_keys():
+                expected = live.execute_scored(face_shape, gender, hair_length, max_results=4)
+                rankings.setdefault(diversity, []).append(self._ids(expected))
+                self._assert_same_ranking(
+                    cached.execute_scored(face_shape, gender, hair_length, max_results=4), expected
+                )
+                if not diversity:
+                    # Sin diversidad MMR conserva el top-k por relevancia
+                    styles = self.catalog.get_haircut_styles(gender=gender, hair_length=hair_length)
+                    self._assert_same_ranking(
+                        expected, self.engine.score_haircut_styles(styles, face_shape, gender, hair_length, top_k=4)
+                    )
+
+            live_beards = GenerateBeardRecommendationsUseCase(self.engine, self.catalog, reranker=reranker)
+            cached_beards = GenerateBeardRecommendationsUseCase(
+                self.engine, self.catalog, ranking_table=table, reranker=reranker
+            )
+            for face_shape in FaceShape:
+                self._assert_same_ranking(
+                    cached_beards.execute_scored(face_shape, Gender.HOMBRE, max_results=3),
+                    live_beards.execute_scored(face_shape, Gender.HOMBRE, max_results=3)
+                )
+
+        # Con diversidad el reordenamiento cambia al menos una combinación
+        self.assertNotEqual(rankings[0.0], rankings[0.3])
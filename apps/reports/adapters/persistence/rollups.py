@@ -0,0 +1,257 @@
+"""
+Tablas de agregados diarios (rollups) del informe estadístico.
+
+Los contadores se incrementan en la misma transacción que guarda el análisis
+o la recomendación, con un único INSERT ... ON CONFLICT DO UPDATE por lote
+(PostgreSQL y SQLite lo soportan), y se decrementan al borrarlos. El informe
+solo lee estas tablas: el coste de una consulta depende del número de días
+del rango, no del histórico. rebuild_rollups los recalcula desde cero.
+"""
+
+from collections import Counter
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.db import connections, router
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from apps.recomendations.adapters.persistence.normalization import FACE_SHAPE_DB_TO_ENUM
+from apps.reports.models import DailyFaceShapeRollup, DailyStyleRollup
+
+FACE_SHAPE_KEY = ('day', 'face_shape')
+STYLE_KEY = ('day', 'face_shape', 'style_type', 'style_id')
+
+
+def canonical_face_shape(value) -> str:
+    """Valor canónico del enum FaceShape ('Ovalada' -> 'oval')"""
+    key = str(value or '').lower().strip()
+    face_shape = FACE_SHAPE_DB_TO_ENUM.get(key)
+    return face_shape.value if face_shape is not None else key
+
+
+def rollup_day(moment) -> date:
+    """Día (zona horaria actual) en el que se contabiliza un registro"""
+    if moment is None:
+        moment = timezone.now()
+    if isinstance(moment, datetime):
+        if timezone.is_aware(moment):
+            return timezone.localdate(moment)
+        return moment.date()
+    return moment
+
+
+def upsert_counts(model, key_fields: Sequence[str], counts: Dict[tuple, Dict[str, int]],
+                  batch_size: int = 500) -> int:
+    """
+    Suma `counts` ({clave: {contador: n}}) a las filas de `model`, creando
+    las que falten. Devuelve el número de claves afectadas.
+    """
+    if not counts:
+        return 0
+
+    counter_fields = sorted({field for values in counts.values() for field in values})
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = list(key_fields) + counter_fields
+    row_sql = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    conflict_sql = (
+        f" ON CONFLICT ({', '.join(quote(field) for field in key_fields)}) DO UPDATE SET "
+        + ', '.join(f'{quote(field)} = {table}.{quote(field)} + EXCLUDED.{quote(field)}'
+                    for field in counter_fields)
+    )
+    day_index = list(key_fields).index('day')
+
+    rows = []
+    for key, values in counts.items():
+        key = list(key)
+        key[day_index] = connection.ops.adapt_datefield_value(key[day_index])
+        rows.append(key + [values.get(field, 0) for field in counter_fields])
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            sql = (
+                f"INSERT INTO {table} ({', '.join(quote(column) for column in columns)}) "
+                f"VALUES {', '.join([row_sql] * len(batch))}{conflict_sql}"
+            )
+            cursor.execute(sql, [value for row in batch for value in row])
+    return len(rows)
+
+
+def decrement_counts(model, key_fields: Sequence[str], counts: Dict[tuple, Dict[str, int]]) -> int:
+    """
+    Resta `counts` de las filas de `model` sin bajar de cero (una fila que no
+    existe, p. ej. anterior a los rollups, se ignora). Devuelve las filas
+    actualizadas.
+    """
+    updated = 0
+    for key, values in counts.items():
+        updated += model.objects.filter(**dict(zip(key_fields, key))).update(**{
+            field: Greatest(F(field) - n, Value(0)) for field, n in values.items()
+        })
+    return updated
+
+
+def _recommendation_counts(recommendations) -> Tuple[Counter, Counter]:
+    """Contadores por (día, forma) y por (día, forma, tipo, estilo)"""
+    shape_counts = Counter()
+    style_counts = Counter()
+    for created_at, face_shape, haircut_ids, beard_ids in recommendations:
+        day = rollup_day(created_at)
+        face_shape = canonical_face_shape(face_shape)
+        shape_counts[(day, face_shape)] += 1
+        for style_type, ids in ((DailyStyleRollup.HAIRCUT, haircut_ids),
+                                (DailyStyleRollup.BEARD, beard_ids)):
+            for style_id in ids:
+                style_counts[(day, face_shape, style_type, int(style_id))] += 1
+    return shape_counts, style_counts
+
+
+class DjangoRollupRepository:
+    """Escritura incremental y lectura por rango de fechas de los rollups"""
+
+    def record_analyses(self, analyses: Iterable[Tuple[object, str]]) -> None:
+        """
+        Contabiliza análisis faciales
+
+        Args:
+            analyses: Pares (created_at, face_shape)
+        """
+        counts = Counter(
+            (rollup_day(created_at), canonical_face_shape(face_shape))
+            for created_at, face_shape in analyses
+        )
+        upsert_counts(
+            DailyFaceShapeRollup,
+            FACE_SHAPE_KEY,
+            {key: {'analyses': n} for key, n in counts.items()}
+        )
+
+    def record_recommendations(
+        self,
+        recommendations: Iterable[Tuple[object, str, List[int], List[int]]]
+    ) -> None:
+        """
+        Contabiliza recomendaciones y los estilos recomendados
+
+        Args:
+            recommendations: Tuplas (created_at, face_shape, haircut_ids, beard_ids)
+        """
+        shape_counts, style_counts = _recommendation_counts(recommendations)
+        upsert_counts(
+            DailyFaceShapeRollup,
+            FACE_SHAPE_KEY,
+            {key: {'recommendations': n} for key, n in shape_counts.items()}
+        )
+        upsert_counts(
+            DailyStyleRollup,
+            STYLE_KEY,
+            {key: {'count': n} for key, n in style_counts.items()}
+        )
+
+    def remove_analyses(self, analyses: Iterable[Tuple[object, str]]) -> None:
+        """Descuenta análisis borrados (pares (created_at, face_shape))"""
+        counts = Counter(
+            (rollup_day(created_at), canonical_face_shape(face_shape))
+            for created_at, face_shape in analyses
+        )
+        decrement_counts(
+            DailyFaceShapeRollup,
+            FACE_SHAPE_KEY,
+            {key: {'analyses': n} for key, n in counts.items()}
+        )
+
+    def remove_recommendations(
+        self,
+        recommendations: Iterable[Tuple[object, str, List[int], List[int]]]
+    ) -> None:
+        """Descuenta recomendaciones borradas y sus estilos (mismas tuplas que record_recommendations)"""
+        shape_counts, style_counts = _recommendation_counts(recommendations)
+        decrement_counts(
+            DailyFaceShapeRollup,
+            FACE_SHAPE_KEY,
+            {key: {'recommendations': n} for key, n in shape_counts.items()}
+        )
+        decrement_counts(
+            DailyStyleRollup,
+            STYLE_KEY,
+            {key: {'count': n} for key, n in style_counts.items()}
+        )
+
+    @staticmethod
+    def _in_range(queryset, date_from: Optional[date], date_to: Optional[date]):
+        if date_from:
+            queryset = queryset.filter(day__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(day__lte=date_to)
+        return queryset
+
+    def face_shape_counts(self, date_from: Optional[date] = None,
+                          date_to: Optional[date] = None) -> Dict[str, Dict[str, int]]:
+        """
+        Análisis y recomendaciones por forma de rostro en el rango [date_from, date_to]
+
+        Returns:
+            {face_shape: {'analyses': n, 'recommendations': m}}
+        """
+        rows = (
+            self._in_range(DailyFaceShapeRollup.objects.all(), date_from, date_to)
+            .values('face_shape')
+            .annotate(analyses=Sum('analyses'), recommendations=Sum('recommendations'))
+            .order_by()
+        )
+        return {
+            row['face_shape']: {
+                'analyses': row['analyses'] or 0,
+                'recommendations': row['recommendations'] or 0,
+            }
+            for row in rows
+        }
+
+    def top_styles(self, style_type: str, limit: int = 3,
+                   date_from: Optional[date] = None, date_to: Optional[date] = None,
+                   face_shape: Optional[str] = None) -> List[Dict]:
+        """
+        Estilos más recomendados en el rango
+
+        Returns:
+            Lista [{'id': style_id, 'count': n}] ordenada de mayor a menor
+        """
+        queryset = self._in_range(
+            DailyStyleRollup.objects.filter(style_type=style_type), date_from, date_to
+        )
+        if face_shape:
+            queryset = queryset.filter(face_shape=canonical_face_shape(face_shape))
+
+        rows = (
+            queryset
+            .values('style_id')
+            .annotate(total=Sum('count'))
+            .order_by('-total', 'style_id')[:limit]
+        )
+        return [{'id': row['style_id'], 'count': row['total']} for row in rows]
+
+    def top_styles_by_shape(self, style_type: str, limit: int = 3,
+                            date_from: Optional[date] = None,
+                            date_to: Optional[date] = None) -> Dict[str, List[Dict]]:
+        """
+        Top de estilos por forma de rostro en el rango, con un único GROUP BY
+
+        Returns:
+            {face_shape: [{'id': style_id, 'count': n}, ...]}
+        """
+        rows = (
+            self._in_range(DailyStyleRollup.objects.filter(style_type=style_type), date_from, date_to)
+            .values('face_shape', 'style_id')
+            .annotate(total=Sum('count'))
+            .order_by('face_shape', '-total', 'style_id')
+        )
+        breakdown = {}
+        for row in rows:
+            styles = breakdown.setdefault(row['face_shape'], [])
+            if len(styles) < limit:
+                styles.append({'id': row['style_id'], 'count': row['total']})
+        return breakdown
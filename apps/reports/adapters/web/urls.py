@@ -1,5 +1,5 @@
 from django.urls import path
-from apps.reports.adapters.web.views import GenerateReportView, DownloadReportView
+from apps.reports.adapters.web.views import GenerateReportView, DownloadReportView, informe, db_metrics
 
 
 app_name = 'reports'
@@ -7,4 +7,6 @@ app_name = 'reports'
 urlpatterns = [
     path('generate/', GenerateReportView.as_view(), name='generate'),
     path('download/', DownloadReportView.as_view(), name='download'),
+    path('informe/', informe, name='informe'),
+    path('db-metrics/', db_metrics, name='db_metrics'),
 ]
\ No newline at end of file
@@ -3,11 +3,13 @@ import os
 from django.http import Http404
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import Count
-from collections import Counter
+from datetime import date
 from Proyecto_OPENCV import settings
-from apps.auth_app.adapters.persistence.models import ProfileModel  # Asegúrate de importar
-from apps.recomendations.models import RecommendationModel  # Asegúrate de importar
+from apps.recomendations.core.entities import FaceShape
+from apps.reports.models import DailyStyleRollup
+from apps.reports.adapters.persistence.rollups import DjangoRollupRepository
+from apps.shared.utils.db_routing import read_from_replica
+from apps.shared.utils.db_metrics import snapshot as db_metrics_snapshot
 
 import os
 from django.http import FileResponse, JsonResponse, Http404
@@ -22,38 +24,66 @@ from ...adapters.external.pdf_generator import ReportLabPDFGenerator
 def is_admin(user):
     return user.is_staff or user.is_superuser
 # Create your views here.
+def parse_report_date(value):
+    """Fecha ISO (YYYY-MM-DD) del filtro del informe, o None si falta o es inválida"""
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
 @login_required
 @user_passes_test(is_admin)
+@read_from_replica
 def informe(request):
-    # 1. Conteo de perfiles por tipo de rostro
-    face_shape_counts = dict(
-        ProfileModel.objects.values('face_shape').annotate(count=Count('face_shape')).values_list('face_shape', 'count')
+    # Rango opcional ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD (ambos incluidos).
+    # Todo se lee de los rollups diarios: el coste no depende del histórico
+    date_from = parse_report_date(request.GET.get('date_from'))
+    date_to = parse_report_date(request.GET.get('date_to'))
+    rollups = DjangoRollupRepository()
+
+    # 1. Análisis por tipo de rostro (todos los tipos, incluso con 0)
+    shape_counts = rollups.face_shape_counts(date_from, date_to)
+    face_shape_counts = {
+        shape.value: shape_counts.get(shape.value, {}).get('analyses', 0)
+        for shape in FaceShape
+    }
+    # 2 y 3. Top 3 cortes y barbas más recomendados
+    top_haircuts = rollups.top_styles(DailyStyleRollup.HAIRCUT, limit=3, date_from=date_from, date_to=date_to)
+    top_beards = rollups.top_styles(DailyStyleRollup.BEARD, limit=3, date_from=date_from, date_to=date_to)
+    # 4. Desglose por tipo de rostro: top 3 cortes y barbas de cada forma
+    haircuts_by_shape = rollups.top_styles_by_shape(
+        DailyStyleRollup.HAIRCUT, limit=3, date_from=date_from, date_to=date_to
+    )
+    beards_by_shape = rollups.top_styles_by_shape(
+        DailyStyleRollup.BEARD, limit=3, date_from=date_from, date_to=date_to
     )
-    # Asegurar que todos los tipos estén incluidos (incluso si count=0)
-    all_shapes = ['oval', 'round', 'square', 'heart', 'diamond', 'oblong']
-    face_shape_counts = {shape: face_shape_counts.get(shape, 0) for shape in all_shapes}
-    # 2. Top 3 cortes de cabello más repetidos
-    haircut_counter = Counter()
-    for rec in RecommendationModel.objects.all():
-        if rec.haircut_styles_ids:
-            ids = json.loads(rec.haircut_styles_ids)
-            haircut_counter.update(ids)
-    top_haircuts = [{'id': k, 'count': v} for k, v in haircut_counter.most_common(3)]
-    # 3. Top 3 barbas más repetidas
-    beard_counter = Counter()
-    for rec in RecommendationModel.objects.all():
-        if rec.beard_styles_ids:
-            ids = json.loads(rec.beard_styles_ids)
-            beard_counter.update(ids)
-    top_beards = [{'id': k, 'count': v} for k, v in beard_counter.most_common(3)]
+    shape_breakdown = [
+        {
+            'face_shape': shape.value,
+            'haircuts': haircuts_by_shape.get(shape.value, []),
+            'beards': beards_by_shape.get(shape.value, []),
+        }
+        for shape in FaceShape
+    ]
     context = {
         'face_shape_counts': face_shape_counts,
         'top_haircuts': top_haircuts,
         'top_beards': top_beards,
+        'shape_breakdown': shape_breakdown,
+        'date_from': date_from.isoformat() if date_from else '',
+        'date_to': date_to.isoformat() if date_to else '',
     }
     return render(request, 'informe.html', context)
 
 
+@login_required
+@user_passes_test(is_admin)
+def db_metrics(request):
+    """Conexiones a la BD del worker que atiende la petición (JSON)"""
+    return JsonResponse(db_metrics_snapshot())
+
+
 class GenerateReportView(View):
     """
     Vista para generar un reporte PDF del análisis facial.
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class ReportsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.reports'
+
+    def ready(self):
+        """
+        Registrar las señales que mantienen los rollups del informe y las
+        métricas de conexiones a la BD.
+        """
+        from apps.reports import signals  # noqa: F401
+        from apps.shared.utils import db_metrics  # noqa: F401
@@ -0,0 +1,113 @@
+"""
+Comando Django para medir cuánto ahorra por petición reutilizar la conexión
+a la base de datos (CONN_MAX_AGE) frente a abrir una nueva en cada petición.
+
+Recorre las vistas de historial y estadísticas con el cliente de pruebas de
+Django y el guardado de un análisis tal como lo hace el worker en segundo
+plano. El cliente de pruebas no cierra conexiones al terminar la petición, así
+que se llama a close_old_connections como haría un worker: la conexión se
+cierra o se reutiliza según CONN_MAX_AGE. La vista de
+resultados del análisis no se incluye porque necesita la cámara.
+
+Los análisis de prueba (forma 'benchmark') y sus rollups se borran al terminar.
+"""
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from apps.feedback.adapters.persistence.background import AnalysisPersistenceWorker, AnalysisRecord
+from apps.feedback.adapters.persistence.models import AnalysisHistoryModel
+from apps.feedback.adapters.persistence.repositories import DjangoAnalysisHistoryRepository
+from apps.reports.models import DailyFaceShapeRollup
+from apps.shared.utils import db_metrics
+
+VIEWS = ('feedback:history_list', 'feedback:history_api', 'feedback:statistics')
+BENCHMARK_SHAPE = 'benchmark'
+
+
+class Command(BaseCommand):
+    help = 'Compara la latencia por petición con y sin conexiones persistentes a la BD'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True, help='Usuario con cuyo historial se mide')
+        parser.add_argument('--requests', type=int, default=50, help='Peticiones por vista y modo')
+        parser.add_argument('--conn-max-age', type=int, default=60, help='CONN_MAX_AGE del modo persistente')
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(email=options['email']).first()
+        if user is None:
+            raise CommandError(f"No existe el usuario {options['email']}")
+
+        self.connection = connections['default']
+        if self.connection.settings_dict.get('OPTIONS', {}).get('pool'):
+            self.stdout.write(self.style.WARNING(
+                '⚠ El alias usa pool: la conexión "nueva" de cada petición sale del pool'
+            ))
+        original_age = self.connection.settings_dict.get('CONN_MAX_AGE', 0)
+
+        setup_test_environment()
+        try:
+            client = Client()
+            client.force_login(user)
+            scenarios = [(name, self._view_request(client, reverse(name))) for name in VIEWS]
+            scenarios.append(('guardar análisis', self._persist_request(user)))
+
+            rows = []
+            for label, run in scenarios:
+                run()  # Calentamiento (plantillas, caché de consultas)
+                closed = self._measure(run, 0, options['requests'])
+                persistent = self._measure(run, options['conn_max_age'], options['requests'])
+                rows.append((label, closed, persistent))
+        finally:
+            self._set_conn_max_age(original_age)
+            teardown_test_environment()
+            AnalysisHistoryModel.objects.filter(user=user, face_shape=BENCHMARK_SHAPE).delete()
+            DailyFaceShapeRollup.objects.filter(face_shape=BENCHMARK_SHAPE).delete()
+
+        self.stdout.write(f"\n{'Vista':<28}{'sin reutilizar':>16}{'persistente':>14}{'ahorro':>10}{'conexiones':>14}")
+        for label, closed, persistent in rows:
+            saved = closed['mean'] - persistent['mean']
+            self.stdout.write(
+                f"{label:<28}{closed['mean']:>13.2f} ms{persistent['mean']:>11.2f} ms"
+                f"{saved:>7.2f} ms{closed['opened']:>7} → {persistent['opened']}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {options['requests']} peticiones por vista y modo ({self.connection.vendor})"
+        ))
+
+    def _view_request(self, client, url):
+        def run():
+            response = client.get(url)
+            close_old_connections()
+            if response.status_code != 200:
+                raise CommandError(f'{url} respondió {response.status_code}')
+        return run
+
+    def _persist_request(self, user):
+        # Mismo ciclo que un trabajo del pool: close_old_connections antes y después
+        worker = AnalysisPersistenceWorker(DjangoAnalysisHistoryRepository(), eager=True)
+
+        def run():
+            worker._run(AnalysisRecord.create(user.id, BENCHMARK_SHAPE, 0, {}, {}, 0))
+        return run
+
+    def _set_conn_max_age(self, value):
+        self.connection.close()
+        self.connection.settings_dict['CONN_MAX_AGE'] = value
+
+    def _measure(self, run, conn_max_age, requests):
+        self._set_conn_max_age(conn_max_age)
+        db_metrics.reset()
+        timings = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - start) * 1000)
+        opened = db_metrics.snapshot()['connections'][self.connection.alias]['opened']
+        return {'mean': statistics.mean(timings), 'median': statistics.median(timings), 'opened': opened}
@@ -0,0 +1,74 @@
+"""
+Comando Django para reconstruir desde cero los rollups diarios del informe
+(análisis por forma de rostro, recomendaciones y estilos recomendados).
+
+Los estilos se leen de la tabla recommendation_styles: si hay recomendaciones
+antiguas sin enlaces, ejecutar antes backfill_recommendation_styles.
+"""
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+from apps.feedback.adapters.persistence.models import AnalysisHistoryModel
+from apps.recomendations.models import RecommendationModel, RecommendationStyleModel
+from apps.reports.models import DailyFaceShapeRollup, DailyStyleRollup
+from apps.reports.adapters.persistence.rollups import (
+    FACE_SHAPE_KEY,
+    STYLE_KEY,
+    canonical_face_shape,
+    upsert_counts
+)
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los rollups diarios del informe desde las tablas de detalle'
+
+    def handle(self, *args, **options):
+        shape_counts = defaultdict(Counter)
+
+        # GROUP BY día × forma de rostro (las variantes se unifican después)
+        analyses = (
+            AnalysisHistoryModel.objects
+            .annotate(day=TruncDate('created_at'))
+            .values('day', 'face_shape')
+            .annotate(total=Count('id'))
+            .order_by()
+        )
+        for row in analyses:
+            shape_counts[(row['day'], canonical_face_shape(row['face_shape']))]['analyses'] += row['total']
+
+        recommendations = (
+            RecommendationModel.objects
+            .annotate(day=TruncDate('created_at'))
+            .values('day', 'face_shape')
+            .annotate(total=Count('id'))
+            .order_by()
+        )
+        for row in recommendations:
+            shape_counts[(row['day'], canonical_face_shape(row['face_shape']))]['recommendations'] += row['total']
+
+        style_counts = defaultdict(Counter)
+        links = (
+            RecommendationStyleModel.objects
+            .annotate(day=TruncDate('recommendation__created_at'))
+            .values('day', 'face_shape', 'style_type', 'style_id')
+            .annotate(total=Count('id'))
+            .order_by()
+        )
+        for row in links:
+            key = (row['day'], canonical_face_shape(row['face_shape']), row['style_type'], row['style_id'])
+            style_counts[key]['count'] += row['total']
+
+        with transaction.atomic():
+            DailyFaceShapeRollup.objects.all().delete()
+            DailyStyleRollup.objects.all().delete()
+            shape_rows = upsert_counts(DailyFaceShapeRollup, FACE_SHAPE_KEY, shape_counts)
+            style_rows = upsert_counts(DailyStyleRollup, STYLE_KEY, style_counts)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Rollups reconstruidos: {shape_rows} filas por forma de rostro, '
+            f'{style_rows} filas por estilo'
+        ))
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyFaceShapeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('face_shape', models.CharField(max_length=50)),
+                ('analyses', models.PositiveIntegerField(db_default=0, default=0)),
+                ('recommendations', models.PositiveIntegerField(db_default=0, default=0)),
+            ],
+            options={
+                'db_table': 'rollup_daily_face_shapes',
+                'constraints': [models.UniqueConstraint(fields=('day', 'face_shape'), name='rollup_face_shape_day_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyStyleRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('face_shape', models.CharField(max_length=50)),
+                ('style_type', models.CharField(choices=[('haircut', 'Corte'), ('beard', 'Barba')], max_length=10)),
+                ('style_id', models.IntegerField()),
+                ('count', models.PositiveIntegerField(db_default=0, default=0)),
+            ],
+            options={
+                'db_table': 'rollup_daily_styles',
+                'indexes': [models.Index(fields=['style_type', 'day'], name='rollup_style_type_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'face_shape', 'style_type', 'style_id'), name='rollup_style_day_unique')],
+            },
+        ),
+    ]
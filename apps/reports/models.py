@@ -1,3 +1,61 @@
 from django.db import models
 
-# Create your models here.
+
+class DailyFaceShapeRollup(models.Model):
+    """
+    Contadores diarios por forma de rostro.
+
+    Se incrementan al guardar análisis y recomendaciones, así el informe no
+    recorre las tablas de detalle.
+    """
+
+    day = models.DateField()
+    face_shape = models.CharField(max_length=50)
+    analyses = models.PositiveIntegerField(default=0, db_default=0)
+    recommendations = models.PositiveIntegerField(default=0, db_default=0)
+
+    class Meta:
+        db_table = 'rollup_daily_face_shapes'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'face_shape'],
+                name='rollup_face_shape_day_unique'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.face_shape}: {self.analyses} análisis, {self.recommendations} recomendaciones"
+
+
+class DailyStyleRollup(models.Model):
+    """
+    Veces que se recomendó cada estilo por día y forma de rostro.
+    """
+
+    HAIRCUT = 'haircut'
+    BEARD = 'beard'
+    STYLE_TYPE_CHOICES = [
+        (HAIRCUT, 'Corte'),
+        (BEARD, 'Barba'),
+    ]
+
+    day = models.DateField()
+    face_shape = models.CharField(max_length=50)
+    style_type = models.CharField(max_length=10, choices=STYLE_TYPE_CHOICES)
+    style_id = models.IntegerField()
+    count = models.PositiveIntegerField(default=0, db_default=0)
+
+    class Meta:
+        db_table = 'rollup_daily_styles'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'face_shape', 'style_type', 'style_id'],
+                name='rollup_style_day_unique'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['style_type', 'day'], name='rollup_style_type_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.style_type}#{self.style_id} ({self.face_shape}): {self.count}"
@@ -0,0 +1,49 @@
+"""
+Señales del informe: cada análisis facial nuevo incrementa los rollups diarios
+en la misma transacción en la que se guarda, y borrar un análisis o una
+recomendación (también en cascada al borrar un usuario) los decrementa. Las
+recomendaciones nuevas se contabilizan en DjangoRecommendationRepository.
+"""
+
+import json
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.feedback.adapters.persistence.models import AnalysisHistoryModel
+from apps.recomendations.models import RecommendationModel
+from apps.reports.adapters.persistence.rollups import DjangoRollupRepository
+
+
+def _style_ids(raw) -> list:
+    """IDs guardados como texto JSON; vacío si el campo está corrupto"""
+    try:
+        ids = json.loads(raw) if isinstance(raw, str) else (raw or [])
+        return [int(style_id) for style_id in ids]
+    except (ValueError, TypeError):
+        return []
+
+
+@receiver(post_save, sender=AnalysisHistoryModel)
+def analysis_created(sender, instance, created, raw=False, **kwargs):
+    """Contabilizar el análisis en su día y forma de rostro"""
+    if not created or raw:
+        return
+    DjangoRollupRepository().record_analyses([(instance.created_at, instance.face_shape)])
+
+
+@receiver(post_delete, sender=AnalysisHistoryModel)
+def analysis_deleted(sender, instance, **kwargs):
+    """Descontar el análisis borrado"""
+    DjangoRollupRepository().remove_analyses([(instance.created_at, instance.face_shape)])
+
+
+@receiver(post_delete, sender=RecommendationModel)
+def recommendation_deleted(sender, instance, **kwargs):
+    """Descontar la recomendación borrada y sus estilos"""
+    DjangoRollupRepository().remove_recommendations([(
+        instance.created_at,
+        instance.face_shape,
+        _style_ids(instance.haircut_styles_ids),
+        _style_ids(instance.beard_styles_ids),
+    )])
@@ -1,3 +1,152 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count, Q
 from django.test import TestCase
+from django.urls import reverse
+
+from apps.auth_app.adapters.persistence.models import UserModel
+from apps.feedback.adapters.persistence.models import AnalysisHistoryModel
+from apps.recomendations.adapters.persistence.repositories import DjangoRecommendationRepository
+from apps.recomendations.core.entities import (
+    BeardStyle,
+    FaceShape,
+    Gender,
+    HairLength,
+    HaircutStyle,
+    Recommendation
+)
+from apps.recomendations.models import RecommendationModel, RecommendationStyleModel
+from apps.reports.adapters.persistence.rollups import DjangoRollupRepository, canonical_face_shape
+from apps.reports.models import DailyFaceShapeRollup, DailyStyleRollup
+
+
+class InformeViewTest(TestCase):
+    """El informe lee los rollups, incluido el desglose por tipo de rostro"""
+
+    def setUp(self):
+        admin = UserModel.objects.create_user(email='admin@example.com', password='x', is_staff=True)
+        self.client.force_login(admin)
+        DjangoRollupRepository().record_recommendations([
+            (date(2026, 1, 10), 'Ovalada', [5, 3], [8]),
+            (date(2026, 1, 10), 'oval', [3], []),
+            (date(2026, 2, 1), 'redondo', [5], [8]),
+        ])
+
+    def test_shape_breakdown(self):
+        response = self.client.get(reverse('reports:informe'))
+        self.assertEqual(response.status_code, 200)
+        breakdown = {row['face_shape']: row for row in response.context['shape_breakdown']}
+        self.assertEqual(breakdown['oval']['haircuts'], [{'id': 3, 'count': 2}, {'id': 5, 'count': 1}])
+        self.assertEqual(breakdown['oval']['beards'], [{'id': 8, 'count': 1}])
+        self.assertEqual(breakdown['redondo']['haircuts'], [{'id': 5, 'count': 1}])
+        self.assertEqual(breakdown['cuadrado']['haircuts'], [])
+        self.assertContains(response, 'Top 3 por Tipo de Rostro')
+
+    def test_shape_breakdown_in_date_range(self):
+        breakdown = DjangoRollupRepository().top_styles_by_shape(
+            DailyStyleRollup.HAIRCUT, limit=1, date_from=date(2026, 1, 15)
+        )
+        self.assertEqual(breakdown, {'redondo': [{'id': 5, 'count': 1}]})
+
+
+class RollupConsistencyTest(TestCase):
+    """Los rollups incrementales coinciden con las tablas de detalle y con rebuild_rollups"""
+
+    def setUp(self):
+        self.user = UserModel.objects.create_user(email='rollups@example.com', password='x')
+        self.rollups = DjangoRollupRepository()
+        repository = DjangoRecommendationRepository()
+
+        for face_shape in ('Ovalada', 'oval', 'redondo', 'Corazón'):
+            AnalysisHistoryModel.objects.create(user=self.user, face_shape=face_shape, confidence=70.0)
+
+        self.recommendations = []
+        for face_shape, haircut_ids, beard_ids in (
+            (FaceShape.OVAL, [1, 2], [7]),
+            (FaceShape.OVAL, [2], [7, 8]),
+            (FaceShape.REDONDO, [2, 3], []),
+        ):
+            self.recommendations.append(repository.save(Recommendation(
+                user_id=self.user.id,
+                face_shape=face_shape,
+                gender=Gender.HOMBRE,
+                hair_length=HairLength.MEDIO,
+                haircut_styles=[HaircutStyle(id=style_id, name=f'Corte {style_id}') for style_id in haircut_ids],
+                beard_styles=[BeardStyle(id=style_id, name=f'Barba {style_id}') for style_id in beard_ids],
+            )))
+
+    def _expected_shapes(self):
+        expected = {}
+        for model, field in ((AnalysisHistoryModel, 'analyses'), (RecommendationModel, 'recommendations')):
+            for face_shape in model.objects.values_list('face_shape', flat=True):
+                counts = expected.setdefault(canonical_face_shape(face_shape), {'analyses': 0, 'recommendations': 0})
+                counts[field] += 1
+        return expected
+
+    def _expected_styles(self, style_type):
+        rows = (
+            RecommendationStyleModel.objects.filter(style_type=style_type)
+            .values('style_id').annotate(total=Count('id')).order_by('-total', 'style_id')
+        )
+        return [{'id': row['style_id'], 'count': row['total']} for row in rows]
+
+    def _assert_matches_detail(self):
+        shapes = {
+            face_shape: counts for face_shape, counts in self.rollups.face_shape_counts().items()
+            if counts['analyses'] or counts['recommendations']
+        }
+        self.assertEqual(shapes, self._expected_shapes())
+        for style_type in (DailyStyleRollup.HAIRCUT, DailyStyleRollup.BEARD):
+            top = [style for style in self.rollups.top_styles(style_type, limit=10) if style['count']]
+            self.assertEqual(top, self._expected_styles(style_type))
+
+    def test_incremental_rollups_match_rebuild(self):
+        self._assert_matches_detail()
+        incremental = (
+            list(DailyFaceShapeRollup.objects.values_list('day', 'face_shape', 'analyses', 'recommendations')),
+            list(DailyStyleRollup.objects.values_list('day', 'face_shape', 'style_type', 'style_id', 'count')),
+        )
+
+        call_command('rebuild_rollups', stdout=StringIO())
+        self._assert_matches_detail()
+        rebuilt = (
+            list(DailyFaceShapeRollup.objects.values_list('day', 'face_shape', 'analyses', 'recommendations')),
+            list(DailyStyleRollup.objects.values_list('day', 'face_shape', 'style_type', 'style_id', 'count')),
+        )
+        self.assertEqual(sorted(incremental[0]), sorted(rebuilt[0]))
+        self.assertEqual(sorted(incremental[1]), sorted(rebuilt[1]))
+
+    def test_upsert_adds_to_existing_rows(self):
+        # Segunda escritura sobre las mismas claves: ON CONFLICT suma, no duplica
+        day = DailyFaceShapeRollup.objects.values_list('day', flat=True).first()
+        self.rollups.record_analyses([(day, 'oval'), (day, 'Ovalada')])
+        self.rollups.record_recommendations([(day, 'oval', [2], [])])
+
+        row = DailyFaceShapeRollup.objects.get(day=day, face_shape='oval')
+        self.assertEqual((row.analyses, row.recommendations), (4, 3))
+        self.assertEqual(
+            DailyStyleRollup.objects.get(day=day, face_shape='oval', style_type='haircut', style_id=2).count, 3
+        )
+        self.assertEqual(DailyFaceShapeRollup.objects.filter(day=day, face_shape='oval').count(), 1)
+
+    def test_deletes_decrement_rollups(self):
+        AnalysisHistoryModel.objects.filter(face_shape='redondo').delete()
+        RecommendationModel.objects.get(id=self.recommendations[0].id).delete()
+        self._assert_matches_detail()
+
+        # Borrar el usuario borra en cascada el resto: todo queda a cero
+        self.user.delete()
+        self.assertFalse(
+            DailyFaceShapeRollup.objects.filter(Q(analyses__gt=0) | Q(recommendations__gt=0)).exists()
+        )
+        self.assertFalse(DailyStyleRollup.objects.filter(count__gt=0).exists())
 
-# Create your tests here.
+    def test_delete_without_rollup_row_does_not_go_negative(self):
+        DailyFaceShapeRollup.objects.all().delete()
+        DailyStyleRollup.objects.all().delete()
+        RecommendationModel.objects.get(id=self.recommendations[0].id).delete()
+        AnalysisHistoryModel.objects.first().delete()
+        self.assertFalse(DailyFaceShapeRollup.objects.exists())
+        self.assertFalse(DailyStyleRollup.objects.exists())
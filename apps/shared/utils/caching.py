@@ -0,0 +1,23 @@
+"""
+Utilidades sobre el backend de caché.
+
+LocMemCache (el backend por defecto si CACHES no se configura) vive en la
+memoria de cada proceso: una invalidación hecha en un worker no llega a los
+demás. Lo que se cachea con invalidación por señales debe usar entonces un
+TTL corto en lugar del largo pensado para una caché compartida (Redis,
+Memcached, base de datos...).
+"""
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_shared_cache(alias: str = 'default') -> bool:
+    """True si el backend es compartido entre procesos"""
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+def invalidation_timeout(shared_timeout, local_timeout, alias: str = 'default'):
+    """TTL para entradas invalidadas por señales según el backend"""
+    return shared_timeout if is_shared_cache(alias) else local_timeout
@@ -0,0 +1,85 @@
+"""
+Métricas de conexiones a la base de datos por proceso (worker).
+
+Cuenta las peticiones atendidas y las conexiones abiertas por alias: con
+conexiones persistentes (CONN_MAX_AGE) la proporción de conexiones nuevas
+por petición debe acercarse a 0. Si el alias usa el pool nativo de Django
+(OPTIONS['pool'], requiere psycopg 3 + psycopg_pool) se añaden las
+estadísticas del pool.
+"""
+
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict
+
+from django.core.signals import request_finished
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_lock = threading.Lock()
+_started_at = time.time()
+_requests = 0
+_opened = Counter()
+
+
+@receiver(connection_created)
+def _connection_created(sender, connection, **kwargs):
+    with _lock:
+        _opened[connection.alias] += 1
+
+
+@receiver(request_finished)
+def _request_finished(sender, **kwargs):
+    global _requests
+    with _lock:
+        _requests += 1
+
+
+def _pool_stats(connection) -> Dict:
+    pool = getattr(connection, 'pool', None)
+    if pool is None:
+        return {}
+    try:
+        return dict(pool.get_stats())
+    except Exception as e:
+        return {'error': str(e)}
+
+
+def snapshot() -> Dict:
+    """Estado actual de las conexiones de este proceso"""
+    with _lock:
+        requests_served = _requests
+        opened = dict(_opened)
+
+    aliases = {}
+    for alias in connections:
+        connection = connections[alias]
+        settings_dict = connection.settings_dict
+        opened_count = opened.get(alias, 0)
+        aliases[alias] = {
+            'vendor': connection.vendor,
+            'conn_max_age': settings_dict.get('CONN_MAX_AGE', 0),
+            'health_checks': settings_dict.get('CONN_HEALTH_CHECKS', False),
+            'pooled': bool(settings_dict.get('OPTIONS', {}).get('pool')),
+            'opened': opened_count,
+            'opened_per_request': round(opened_count / requests_served, 3) if requests_served else None,
+            'pool': _pool_stats(connection),
+        }
+
+    return {
+        'pid': os.getpid(),
+        'uptime_s': round(time.time() - _started_at, 1),
+        'requests': requests_served,
+        'connections': aliases,
+    }
+
+
+def reset():
+    """Pone a cero los contadores (benchmarks)"""
+    global _requests
+    with _lock:
+        _requests = 0
+        _opened.clear()
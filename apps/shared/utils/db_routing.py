@@ -0,0 +1,108 @@
+"""
+Enrutado de lecturas a una réplica de solo lectura.
+
+Solo las vistas marcadas con @read_from_replica (informes, estadísticas,
+listados de historial y de perfiles) leen de la réplica; todo lo demás, y
+cualquier escritura, va a 'default'. Si la réplica no está configurada en
+DATABASES el router siempre devuelve 'default'.
+
+Lectura de lo propio escrito: al guardar un análisis o un feedback se fija
+al usuario a la base principal durante REPLICA_PIN_SECONDS (marca en caché,
+válida también para el worker que guarda en segundo plano). Dentro de una
+petición, tras la primera escritura el resto de lecturas van a 'default'.
+"""
+
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_ALIAS = 'replica'
+DEFAULT_PIN_SECONDS = 5
+
+_use_replica = ContextVar('use_replica', default=False)
+_wrote = ContextVar('wrote_to_primary', default=False)
+
+
+def _pin_key(user_id) -> str:
+    return f'db_primary_pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Las lecturas del usuario irán a la base principal durante unos segundos"""
+    if user_id is not None:
+        cache.set(_pin_key(user_id), True, getattr(settings, 'REPLICA_PIN_SECONDS', DEFAULT_PIN_SECONDS))
+
+
+def is_pinned(user_id) -> bool:
+    return user_id is not None and bool(cache.get(_pin_key(user_id)))
+
+
+class replica_reads:
+    """
+    Context manager: las lecturas del bloque pueden ir a la réplica salvo que
+    el usuario esté fijado a la principal
+    """
+
+    def __init__(self, user_id=None):
+        self.user_id = user_id
+
+    def __enter__(self):
+        self._tokens = (
+            _use_replica.set(not is_pinned(self.user_id)),
+            _wrote.set(False),
+        )
+        return self
+
+    def __exit__(self, *exc_info):
+        use_token, wrote_token = self._tokens
+        _use_replica.reset(use_token)
+        _wrote.reset(wrote_token)
+
+
+def read_from_replica(view):
+    """Decorador para vistas de solo lectura (informes e historial)"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        user = getattr(request, 'user', None)
+        user_id = user.pk if user is not None and user.is_authenticated else None
+        with replica_reads(user_id):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Router de DATABASE_ROUTERS: lecturas marcadas a la réplica, escrituras a 'default'"""
+
+    def __init__(self, replica_alias: Optional[str] = None):
+        self._replica_alias = replica_alias
+
+    @property
+    def replica_alias(self) -> Optional[str]:
+        if self._replica_alias is not None:
+            return self._replica_alias
+        return REPLICA_ALIAS if REPLICA_ALIAS in settings.DATABASES else None
+
+    def db_for_read(self, model, **hints):
+        replica = self.replica_alias
+        if replica is None or not _use_replica.get() or _wrote.get():
+            return DEFAULT_DB_ALIAS
+        # Dentro de una transacción en la principal se lee lo que ella ve
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        if _use_replica.get():
+            _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # La réplica contiene los mismos datos que la principal
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
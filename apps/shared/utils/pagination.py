@@ -0,0 +1,167 @@
+"""
+Paginación por cursor (keyset) para listados que crecen sin límite.
+
+En lugar de OFFSET, cada página filtra "después de la última fila vista"
+sobre una ordenación única (p. ej. (-created_at, -id)), así que el coste de
+una página no depende de lo profunda que esté y aprovecha los índices
+existentes. Los cursores son opacos: base64 de los valores de la última (o
+primera) fila y la dirección.
+
+Como no hay números de página, el total es solo una estimación que se cachea
+unos minutos en lugar de ejecutar un COUNT en cada página.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Optional, Sequence, Tuple
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def _json_value(value):
+    """Valores de la clave serializables sin perder precisión (microsegundos)"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    return value
+
+
+def encode_cursor(values: Sequence, direction: str = NEXT) -> str:
+    """Cursor opaco a partir de los valores de la clave de ordenación"""
+    payload = json.dumps([direction, [_json_value(value) for value in values]], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, list]]:
+    """(dirección, valores) de un cursor, o None si falta o no es válido"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError, binascii.Error):
+        return None
+    if direction not in (NEXT, PREVIOUS) or not isinstance(values, list):
+        return None
+    return direction, values
+
+
+def _after(ordering: Sequence[str], values: Sequence, reverse: bool = False) -> Q:
+    """
+    Condición "fila posterior a `values`" según la ordenación:
+    (a > x) OR (a = x AND b > y) OR ... (con < en los campos descendentes)
+    """
+    condition = Q()
+    equal = Q()
+    for order_field, value in zip(ordering, values):
+        name = order_field.lstrip('-')
+        descending = order_field.startswith('-') != reverse
+        condition |= equal & Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def _reversed(ordering: Sequence[str]) -> List[str]:
+    return [name[1:] if name.startswith('-') else f'-{name}' for name in ordering]
+
+
+@dataclass
+class KeysetPage:
+    """
+    Página de resultados con cursores. Imita la interfaz de
+    django.core.paginator.Page que usan las plantillas (iteración,
+    has_next(), has_previous(), has_other_pages())
+    """
+    object_list: list
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
+    count_estimate: Optional[int] = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+def keyset_paginate(queryset, ordering: Sequence[str], cursor: Optional[str] = None,
+                    page_size: int = 10) -> KeysetPage:
+    """
+    Devuelve una página de `queryset` ordenado por `ordering`
+
+    Args:
+        queryset: QuerySet ya filtrado
+        ordering: Campos de ordenación; el último debe ser único (p. ej. 'id')
+        cursor: Cursor recibido de una página anterior (None = primera página)
+        page_size: Elementos por página
+    """
+    ordering = list(ordering)
+    names = [name.lstrip('-') for name in ordering]
+    decoded = decode_cursor(cursor)
+    if decoded and len(decoded[1]) != len(ordering):
+        decoded = None
+
+    direction, values = decoded or (NEXT, None)
+    backwards = direction == PREVIOUS
+
+    page_queryset = queryset.order_by(*(_reversed(ordering) if backwards else ordering))
+    try:
+        if values is not None:
+            page_queryset = page_queryset.filter(_after(ordering, values, reverse=backwards))
+        rows = list(page_queryset[:page_size + 1])
+    except (ValidationError, ValueError, TypeError):
+        # Cursor manipulado con valores que no encajan en los campos
+        return keyset_paginate(queryset, ordering, None, page_size)
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+
+    key = lambda row: [getattr(row, name) for name in names]  # noqa: E731
+    if backwards:
+        has_next, has_previous = values is not None, has_more
+    else:
+        has_next, has_previous = has_more, values is not None
+
+    return KeysetPage(
+        object_list=rows,
+        next_cursor=encode_cursor(key(rows[-1]), NEXT) if rows and has_next else None,
+        previous_cursor=encode_cursor(key(rows[0]), PREVIOUS) if rows and has_previous else None,
+    )
+
+
+def cached_count(queryset, key: Optional[str] = None, timeout: int = 300) -> int:
+    """
+    COUNT(*) de `queryset` cacheado `timeout` segundos (estimación para
+    listados paginados por cursor). Sin `key` se usa un hash de la consulta.
+    """
+    if key is None:
+        sql = str(queryset.order_by().query)
+        key = f"keyset_count:{queryset.model._meta.label_lower}:{hashlib.md5(sql.encode()).hexdigest()}"
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
@@ -1,4 +1,7 @@
+from apps.auth_app.adapters.persistence.permissions import get_permission_snapshot
 
 
 def is_admin(user):
-    return user.is_authenticated and user.groups.filter(name='Administrador').exists()
\ No newline at end of file
+    """Pertenece al grupo Administrador (instantánea cacheada, sin consultas)"""
+    snapshot = get_permission_snapshot(user)
+    return snapshot is not None and snapshot.is_admin